@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional
+import asyncio
 import re
+from source_registry import SOURCE_REF_PATTERN
 from utils import create_gemini_model
 
 class APAReference(BaseModel):
@@ -115,10 +117,34 @@ class APAFormatterAgent:
     
     def _generate_title_from_content(self, abstract):
         """Generate a descriptive title from abstract content"""
+        try:
+            response = self.model.invoke(self._title_prompt(abstract))
+            return self._clean_generated_title(response.content, abstract)
+        except Exception as e:
+            print(f"Error generating title: {e}")
+            return "Research Paper"
+
+    async def _agenerate_title_from_content(self, abstract):
+        try:
+            response = await self.model.ainvoke(self._title_prompt(abstract))
+            return self._clean_generated_title(response.content, abstract)
+        except Exception as e:
+            print(f"Error generating title: {e}")
+            return "Research Paper"
+
+    def _clean_generated_title(self, content, abstract):
+        title = content.strip()
+        # Clean up the response
+        title = title.strip('"\'\\')
+        if len(title) > 100:  # Fallback if too long
+            title = abstract.strip()[:200].split('.')[0][:50] + "..."
+        return title
+
+    def _title_prompt(self, abstract):
         # Truncate abstract and clean it up
         cleaned_abstract = abstract.strip()[:200]
         
-        prompt = f"""
+        return f"""
         Generate a concise, descriptive title (maximum 10 words) for a research paper based on this abstract excerpt:
         
         Abstract: {cleaned_abstract}
@@ -130,18 +156,6 @@ class APAFormatterAgent:
         
         Respond with only the title, no quotes or extra text:
         """
-        
-        try:
-            response = self.model.invoke(prompt)
-            title = response.content.strip()
-            # Clean up the response
-            title = title.strip('"\'\\')
-            if len(title) > 100:  # Fallback if too long
-                title = cleaned_abstract.split('.')[0][:50] + "..."
-            return title
-        except Exception as e:
-            print(f"Error generating title: {e}")
-            return "Research Paper"
 
     def _format_apa_reference_entry(self, ref: APAReference) -> str:
         authors_list = ref.authors
@@ -172,33 +186,60 @@ class APAFormatterAgent:
         Returns:
             A FormattedReport object containing the final report and reference list.
         """
+        titles = []
+        for source in sources:
+            abstract = self._abstract_for_missing_title(source)
+            titles.append(self._generate_title_from_content(abstract) if abstract else None)
+        return self._build_formatted_report(raw_content, sources, titles)
+
+    async def aformat_report(self, raw_content: str, sources: list) -> FormattedReport:
+        """Async variant of format_report; missing titles are generated concurrently."""
+        async def title_for(source):
+            abstract = self._abstract_for_missing_title(source)
+            return await self._agenerate_title_from_content(abstract) if abstract else None
+
+        titles = await asyncio.gather(*(title_for(source) for source in sources))
+        return self._build_formatted_report(raw_content, sources, titles)
+
+    def _has_usable_title(self, source):
+        title = (source.get("title") or "").strip()
+        return bool(title) and title.lower() not in ["untitled", "no title", "n/a"]
+
+    def _abstract_for_missing_title(self, source):
+        """Abstract to generate a title from, or None if the source has a usable title (or no abstract)"""
+        if self._has_usable_title(source):
+            return None
+        abstract = source.get("abstract", "")
+        return abstract if abstract and len(abstract) > 20 else None
+
+    def _build_formatted_report(self, raw_content: str, sources: list, generated_titles: list) -> FormattedReport:
         # This is a placeholder implementation for inline citation placement.
         # A sophisticated model would intelligently place citations.
         # For now, we'll just append a generic one or replace placeholders.
         
         report_with_citations = raw_content
         
-        # Replace placeholders like [Source 1] with actual inline citations
-        for i, source_info in enumerate(sources):
-            placeholder = f"[Source {i+1}]"
-            inline_citation = self._format_inline_citation(source_info)
-            report_with_citations = report_with_citations.replace(placeholder, inline_citation)
+        # Replace placeholders like [Source 1] with actual inline citations in one pass;
+        # the number is the source's global ID (its position for unregistered sources)
+        inline_citations = {
+            source_info.get("source_id", i + 1): self._format_inline_citation(source_info)
+            for i, source_info in enumerate(sources)
+        }
+        report_with_citations = SOURCE_REF_PATTERN.sub(
+            lambda match: inline_citations.get(int(match.group(1)), match.group(0)), report_with_citations
+        )
 
         references = []
-        for source in sources:
+        for source, generated_title in zip(sources, generated_titles):
             # Use improved extraction methods
             authors = self._improve_author_extraction(source)
             year = self._extract_year_from_source(source)
             
-            # Enhanced title and source formatting
-            title = source.get("title", "").strip()
-            if not title or title.lower() in ["untitled", "no title", "n/a"]:
-                # Try to generate a descriptive title from abstract
-                abstract = source.get("abstract", "")
-                if abstract and len(abstract) > 20:
-                    title = self._generate_title_from_content(abstract)
-                else:
-                    title = "Untitled"
+            # Enhanced title and source formatting; descriptive titles were generated from the abstract
+            if self._has_usable_title(source):
+                title = source["title"].strip()
+            else:
+                title = generated_title or "Untitled"
             
             # Better source identification
             source_name = source.get("source", "")
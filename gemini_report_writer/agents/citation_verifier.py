@@ -1,6 +1,8 @@
 
+import asyncio
 import re
 import json
+from source_registry import SourceRegistry
 from utils import create_gemini_model
 
 class CitationVerifierAgent:
@@ -40,7 +42,54 @@ class CitationVerifierAgent:
         """Validate that the report content is factually supported by sources"""
         if not sources:
             return {'accurate': False, 'reason': 'No sources provided for validation'}
-        
+
+        try:
+            response = self.content_verifier.invoke(self._accuracy_prompt(report_content, sources))
+            return self._parse_accuracy(response.content)
+        except Exception as e:
+            return self._accuracy_error(e)
+
+    async def avalidate_content_accuracy(self, report_content, sources):
+        """Async variant of validate_content_accuracy"""
+        if not sources:
+            return {'accurate': False, 'reason': 'No sources provided for validation'}
+
+        try:
+            response = await self.content_verifier.ainvoke(self._accuracy_prompt(report_content, sources))
+            return self._parse_accuracy(response.content)
+        except Exception as e:
+            return self._accuracy_error(e)
+
+    def _parse_accuracy(self, content):
+        result_text = content.strip()
+        
+        # Extract JSON from response
+        json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
+        if json_match:
+            result = json.loads(json_match.group())
+            return result
+        else:
+            # Fallback parsing
+            accurate = 'true' in result_text.lower() or 'accurate' in result_text.lower()
+            return {
+                'accurate': accurate,
+                'confidence': 0.5,
+                'issues': ['Could not parse detailed response'],
+                'unsupported_claims': [],
+                'contradictions': []
+            }
+
+    def _accuracy_error(self, e):
+        print(f"Error validating content accuracy: {e}")
+        return {
+            'accurate': False,
+            'confidence': 0.0,
+            'issues': [f'Validation error: {str(e)}'],
+            'unsupported_claims': [],
+            'contradictions': []
+        }
+
+    def _accuracy_prompt(self, report_content, sources):
         # Create a summary of all available source content
         sources_summary = []
         for i, source in enumerate(sources[:10]):  # Limit to avoid context overflow
@@ -52,7 +101,7 @@ class CitationVerifierAgent:
         
         sources_text = "\n\n---\n\n".join(sources_summary)
         
-        prompt = f"""
+        return f"""
         You are a fact-checking expert. Evaluate whether the report content is factually accurate and properly supported by the provided sources.
         
         REPORT CONTENT TO VERIFY:
@@ -76,36 +125,6 @@ class CitationVerifierAgent:
             "contradictions": ["contradictions found"]
         }}
         """
-        
-        try:
-            response = self.content_verifier.invoke(prompt)
-            result_text = response.content.strip()
-            
-            # Extract JSON from response
-            import json
-            json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                return result
-            else:
-                # Fallback parsing
-                accurate = 'true' in result_text.lower() or 'accurate' in result_text.lower()
-                return {
-                    'accurate': accurate,
-                    'confidence': 0.5,
-                    'issues': ['Could not parse detailed response'],
-                    'unsupported_claims': [],
-                    'contradictions': []
-                }
-        except Exception as e:
-            print(f"Error validating content accuracy: {e}")
-            return {
-                'accurate': False,
-                'confidence': 0.0,
-                'issues': [f'Validation error: {str(e)}'],
-                'unsupported_claims': [],
-                'contradictions': []
-            }
     
     def verify_citations(self, report, cached_sources=None):
         """Comprehensive citation and content verification"""
@@ -117,38 +136,57 @@ class CitationVerifierAgent:
         citations = self.extract_all_citations(report)
         print(f"Found {len(citations)} citations to verify")
         
+        registry = SourceRegistry(cached_sources)
         flags = []
+        cited_ids = set()
         
-        # Verify each citation
+        # Verify each citation against the source it resolves to
         for citation in citations:
-            if citation['type'] == 'doi':
-                flag = self._verify_doi_citation(citation, cached_sources, report)
-            elif citation['type'] == 'inline':
-                flag = self._verify_inline_citation(citation, cached_sources, report)
-            elif citation['type'] == 'source_ref':
-                flag = self._verify_source_reference(citation, cached_sources, report)
-            
+            source, flag = self._match_citation(citation, registry)
+            if source:
+                cited_ids.add(source['source_id'])
+                flag = self._verify_content_support(source, report, citation)
             if flag:
                 flags.append(flag)
         
         # Perform content accuracy validation
         content_validation = self.validate_content_accuracy(report, cached_sources)
+        return self._verification_result(citations, flags, content_validation, registry, cited_ids)
+
+    async def averify_citations(self, report, cached_sources=None):
+        """Async variant of verify_citations; citations and the accuracy check are verified concurrently"""
+        if not cached_sources:
+            print("Warning: No cached sources provided for citation verification.")
+            return {"status": "error", "needs_revision": True, "message": "No sources to verify against"}
         
-        # Check for unused sources (sources that weren't cited)
-        cited_sources = set()
-        for citation in citations:
-            if citation['type'] == 'source_ref':
-                cited_sources.add(citation['source_number'])
-        
-        unused_sources = []
-        for i in range(len(cached_sources)):
-            if (i + 1) not in cited_sources:
-                unused_sources.append(i + 1)
+        citations = self.extract_all_citations(report)
+        print(f"Found {len(citations)} citations to verify")
+
+        registry = SourceRegistry(cached_sources)
+        cited_ids = set()
+
+        async def verify(citation):
+            source, flag = self._match_citation(citation, registry)
+            if flag:
+                return flag
+            cited_ids.add(source['source_id'])
+            return await self._averify_content_support(source, report, citation)
+
+        *citation_flags, content_validation = await asyncio.gather(
+            *(verify(citation) for citation in citations),
+            self.avalidate_content_accuracy(report, cached_sources)
+        )
+        flags = [flag for flag in citation_flags if flag]
+        return self._verification_result(citations, flags, content_validation, registry, cited_ids)
+
+    def _verification_result(self, citations, flags, content_validation, registry, cited_ids):
+        # Check for unused sources: IDs no citation (of any kind) resolved to
+        unused_sources = [source['source_id'] for source in registry if source['source_id'] not in cited_ids]
         
         # Determine if revision is needed
         citation_issues = any(flag["label"] not in ["supported", "verified"] for flag in flags)
         content_issues = not content_validation['accurate']
-        unused_source_issues = len(unused_sources) > len(cached_sources) * self.unused_source_threshold
+        unused_source_issues = len(unused_sources) > len(registry) * self.unused_source_threshold
         
         needs_revision = citation_issues or content_issues or unused_source_issues
         
@@ -166,34 +204,46 @@ class CitationVerifierAgent:
             }
         }
 
-    def _verify_doi_citation(self, citation, sources, report):
-        """Verify DOI-based citations"""
+    def citation_text(self, citation):
+        """The citation as it appears in the report text"""
+        if citation['type'] == 'doi':
+            return citation['identifier']
+        if citation['type'] == 'inline':
+            return f"({citation['author']}, {citation['year']})"
+        return f"[Source {citation['source_number']}]"
+
+    def _match_citation(self, citation, registry):
+        """Find the registered source a citation refers to. Returns (source, None) or (None, failure_flag)"""
+        if citation['type'] == 'doi':
+            return self._match_doi_citation(citation, registry)
+        elif citation['type'] == 'inline':
+            return self._match_inline_citation(citation, registry)
+        return self._match_source_reference(citation, registry)
+
+    def _match_doi_citation(self, citation, registry):
         doi = citation['identifier']
-        matching_source = None
-        
-        for source in sources:
-            if source and source.get('doi') == doi:
-                matching_source = source
-                break
+        matching_source = registry.find_doi(doi)
         
         if not matching_source:
-            return {"type": "doi", "identifier": doi, "label": "source_not_found", "message": "DOI not found in sources"}
+            return None, {"type": "doi", "identifier": doi, "text": doi, "label": "source_not_found", "message": "DOI not found in sources"}
         
-        return self._verify_content_support(matching_source, report, citation)
+        return matching_source, None
     
-    def _verify_inline_citation(self, citation, sources, report):
-        """Verify inline citations like (Author, Year)"""
+    def _match_inline_citation(self, citation, registry):
+        """Match inline citations like (Author, Year)"""
         author = citation['author']
         year = citation['year']
+        # The formatter cites several authors as "A & B" or "A et al."; match on the first
+        first_author = re.sub(r'\s+et al\.?$', '', author).split(' & ')[0].strip().lower()
         
         # Find matching source by author and year
         matching_source = None
-        for source in sources:
+        for source in registry:
             source_authors = source.get('authors', [])
             source_year = str(source.get('year', ''))
             
             # Check if author matches any source author
-            author_match = any(author.lower() in str(src_author).lower() for src_author in source_authors)
+            author_match = any(first_author in str(src_author).lower() for src_author in source_authors)
             year_match = year == source_year or (year == 'n.d.' and not source_year)
             
             if author_match and year_match:
@@ -201,26 +251,40 @@ class CitationVerifierAgent:
                 break
         
         if not matching_source:
-            return {"type": "inline", "citation": f"({author}, {year})", "label": "source_not_found", "message": "No matching source found"}
+            return None, {"type": "inline", "citation": f"({author}, {year})", "text": self.citation_text(citation), "label": "source_not_found", "message": "No matching source found"}
         
-        return self._verify_content_support(matching_source, report, citation)
+        return matching_source, None
     
-    def _verify_source_reference(self, citation, sources, report):
-        """Verify [Source X] references"""
+    def _match_source_reference(self, citation, registry):
+        """Match [Source X] references; X is the source's global ID"""
         source_num = citation['source_number']
+        source = registry.get(source_num)
         
-        if source_num <= 0 or source_num > len(sources):
-            return {"type": "source_ref", "source_number": source_num, "label": "invalid_reference", "message": "Source number out of range"}
+        if not source:
+            return None, {"type": "source_ref", "source_number": source_num, "text": self.citation_text(citation), "label": "invalid_reference", "message": "Source number out of range"}
         
-        source = sources[source_num - 1]  # Convert to 0-based index
-        return self._verify_content_support(source, report, citation)
+        return source, None
     
     def _verify_content_support(self, source, report, citation):
         """Verify that source actually supports the content where it's cited"""
+        try:
+            response = self.model.invoke(self._support_prompt(source, report, citation))
+            return self._support_flag(response.content, source, citation)
+        except Exception as e:
+            return self._support_error(e, citation)
+
+    async def _averify_content_support(self, source, report, citation):
+        try:
+            response = await self.model.ainvoke(self._support_prompt(source, report, citation))
+            return self._support_flag(response.content, source, citation)
+        except Exception as e:
+            return self._support_error(e, citation)
+
+    def _support_prompt(self, source, report, citation):
         source_title = source.get('title', 'No title')
         source_abstract = source.get('abstract', 'No abstract')
         
-        prompt = f"""
+        return f"""
         Verify if this source supports the claims made in the report.
         
         Source: {source_title}
@@ -238,31 +302,33 @@ class CitationVerifierAgent:
         
         Respond with only one of these labels:
         """
-        
-        try:
-            response = self.model.invoke(prompt)
-            label = response.content.strip().lower()
-            
-            if 'supported' in label:
-                result_label = 'supported'
-            elif 'mentioned' in label:
-                result_label = 'mentioned'
-            elif 'disputed' in label:
-                result_label = 'disputed'
-            else:
-                result_label = 'irrelevant'
-                
-            return {
-                "type": citation.get('type', 'unknown'),
-                "citation": str(citation),
-                "label": result_label,
-                "source_title": source_title
-            }
+
+    def _support_flag(self, content, source, citation):
+        label = content.strip().lower()
+        
+        if 'supported' in label:
+            result_label = 'supported'
+        elif 'mentioned' in label:
+            result_label = 'mentioned'
+        elif 'disputed' in label:
+            result_label = 'disputed'
+        else:
+            result_label = 'irrelevant'
             
-        except Exception as e:
-            return {
-                "type": citation.get('type', 'unknown'),
-                "citation": str(citation),
-                "label": "error",
-                "message": str(e)
-            }
+        return {
+            "type": citation.get('type', 'unknown'),
+            "citation": str(citation),
+            "text": self.citation_text(citation),
+            "label": result_label,
+            "source_id": source.get('source_id'),
+            "source_title": source.get('title', 'No title')
+        }
+
+    def _support_error(self, e, citation):
+        return {
+            "type": citation.get('type', 'unknown'),
+            "citation": str(citation),
+            "text": self.citation_text(citation),
+            "label": "error",
+            "message": str(e)
+        }
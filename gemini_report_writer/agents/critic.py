@@ -7,7 +7,13 @@ class CriticAgent:
         self.model = create_gemini_model(agent_role="critic")
 
     def critique_outline(self, outline):
-        prompt = dedent(f"""
+        return self.model.invoke(self._critique_outline_prompt(outline)).content
+
+    async def acritique_outline(self, outline):
+        return (await self.model.ainvoke(self._critique_outline_prompt(outline))).content
+
+    def _critique_outline_prompt(self, outline):
+        return dedent(f"""
             You are an expert critic. Your task is to provide a constructive and actionable critique of the following report outline.
 
             **Outline:**
@@ -21,10 +27,15 @@ class CriticAgent:
             If the outline is well-structured and comprehensive, start your response with "APPROVED".
             Otherwise, start your response with "REVISE" and provide specific, numbered points of feedback. Each point should be a clear and actionable suggestion for improvement.
         """)
-        return self.model.invoke(prompt).content
 
     def critique_research(self, research_plan, research_results):
-        prompt = dedent(f"""
+        return self.model.invoke(self._critique_research_prompt(research_plan, research_results)).content
+
+    async def acritique_research(self, research_plan, research_results):
+        return (await self.model.ainvoke(self._critique_research_prompt(research_plan, research_results))).content
+
+    def _critique_research_prompt(self, research_plan, research_results):
+        return dedent(f"""
             You are an expert critic. You need to verify if the research results align with the research plan.
 
             **Research Plan:**
@@ -38,10 +49,15 @@ class CriticAgent:
             If the research is sufficient and well-aligned with the plan, start your response with "APPROVED".
             Otherwise, start with "REVISE" and provide specific feedback on what needs to be improved, added, or clarified.
         """)
-        return self.model.invoke(prompt).content
 
     def critique_report(self, report):
-        prompt = dedent(f"""
+        return self.model.invoke(self._critique_report_prompt(report)).content
+
+    async def acritique_report(self, report):
+        return (await self.model.ainvoke(self._critique_report_prompt(report))).content
+
+    def _critique_report_prompt(self, report):
+        return dedent(f"""
             You are an expert critic. Critique the following draft report.
 
             **Report:**
@@ -55,4 +71,3 @@ class CriticAgent:
             If the report is ready for publication, start your response with "APPROVED".
             Otherwise, start with "REVISE" and provide specific, actionable feedback for improvement.
         """)
-        return self.model.invoke(prompt).content
@@ -1,38 +1,45 @@
-
-import requests
 import json
+import http_client
 
 class GrammarGateAgent:
     def __init__(self, languagetool_api_url="https://languagetool.org/api/v2/check"):
         self.api_url = languagetool_api_url
 
-    def check_grammar_and_style(self, text):
-        payload = {
+    def _payload(self, text):
+        return {
             'language': 'en-US',
             'text': text
         }
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded'
-        }
+
+    def _parse_result(self, result):
+        errors = []
+        for match in result.get('matches', []):
+            errors.append({
+                'message': match['message'],
+                'shortMessage': match.get('shortMessage', ''),
+                'context': match['context']['text'][match['context']['offset']:match['context']['offset'] + match['context']['length']],
+                'offset': match['context']['offset'],
+                'length': match['context']['length'],
+                'text_offset': match.get('offset'),  # Position in the checked text
+                'ruleId': match['rule']['id'],
+                'ruleDescription': match['rule']['description']
+            })
+        
+        return {"status": "success", "errors": errors, "error_count": len(errors)}
+
+    def check_grammar_and_style(self, text):
+        try:
+            result = http_client.post_form(self.api_url, self._payload(text))
+            return self._parse_result(result)
+        except http_client.HTTP_ERRORS as e:
+            print(f"Error during LanguageTool API call: {e}")
+            return {"status": "error", "message": str(e), "errors": [], "error_count": 0}
+
+    async def acheck_grammar_and_style(self, text):
         try:
-            response = requests.post(self.api_url, data=payload, headers=headers)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            result = response.json()
-            
-            errors = []
-            for match in result.get('matches', []):
-                errors.append({
-                    'message': match['message'],
-                    'shortMessage': match.get('shortMessage', ''),
-                    'context': match['context']['text'][match['context']['offset']:match['context']['offset'] + match['context']['length']],
-                    'offset': match['context']['offset'],
-                    'length': match['context']['length'],
-                    'ruleId': match['rule']['id'],
-                    'ruleDescription': match['rule']['description']
-                })
-            
-            return {"status": "success", "errors": errors, "error_count": len(errors)}
-        except requests.exceptions.RequestException as e:
+            result = await http_client.apost_form(self.api_url, self._payload(text))
+            return self._parse_result(result)
+        except http_client.HTTP_ERRORS as e:
             print(f"Error during LanguageTool API call: {e}")
             return {"status": "error", "message": str(e), "errors": [], "error_count": 0}
 
@@ -6,7 +6,19 @@ class PlannerAgent:
         self.model = create_gemini_model(agent_role="planner")
 
     def create_outline(self, topic):
-        prompt = dedent(f"""
+        return self.model.invoke(self._outline_prompt(topic)).content
+
+    async def acreate_outline(self, topic):
+        return (await self.model.ainvoke(self._outline_prompt(topic))).content
+
+    def refine_outline(self, topic, critique):
+        return self.model.invoke(self._refine_prompt(topic, critique)).content
+
+    async def arefine_outline(self, topic, critique):
+        return (await self.model.ainvoke(self._refine_prompt(topic, critique))).content
+
+    def _outline_prompt(self, topic):
+        return dedent(f"""
             You are an expert planner specializing in academic and policy reports on economics.
             Your task is to create a detailed, well-structured outline for a report on the following topic:
 
@@ -22,15 +34,13 @@ class PlannerAgent:
 
             Please provide a comprehensive and logically flowing outline that is ready for a critic's review.
         """)
-        return self.model.invoke(prompt).content
 
-    def refine_outline(self, topic, critique):
-        prompt = dedent(f"""
+    def _refine_prompt(self, topic, critique):
+        return dedent(f"""
             You are an expert planner. You have received the following critique on your initial outline for a report on **{topic}**.
 
             **Critique:**
             {critique}
 
             Please revise the outline to address all the points in the critique. Be specific and ensure the new outline is more robust, comprehensive, and directly responds to the feedback provided. The revised outline should be a significant improvement over the previous version.
-        """)
-        return self.model.invoke(prompt).content
\ No newline at end of file
+        """)
\ No newline at end of file
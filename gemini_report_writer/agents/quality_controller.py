@@ -1,10 +1,13 @@
 from utils import create_gemini_model
+import asyncio
 import re
 import json
 
 class QualityControllerAgent:
-    def __init__(self, quality_thresholds=None):
+    def __init__(self, quality_thresholds=None, max_concurrent_assessments=None):
         self.model = create_gemini_model(agent_role="quality_controller")
+        # Upper bound on assessments of one report in flight at once (async path); None runs all five together
+        self.max_concurrent_assessments = max_concurrent_assessments
         
         # Configurable quality thresholds
         default_thresholds = {
@@ -79,40 +82,91 @@ class QualityControllerAgent:
             # 5. Citation Quality Assessment
             assessments['citations'] = self._assess_citation_quality(truncated_content, sources)
             
-            # Calculate overall quality score
-            overall_score = self._calculate_overall_score(assessments)
+            return self._assessment_result(assessments, sanitized_content, report_content)
             
-            # Determine if revision is needed
-            needs_revision = (
-                assessments['coherence']['score'] < self.minimum_coherence_score or
-                assessments['accuracy']['score'] < self.minimum_factual_accuracy or
-                assessments['source_usage']['score'] < self.minimum_source_usage or
-                overall_score < self.minimum_overall_score
+        except Exception as e:
+            return self._assessment_error(e)
+
+    async def aassess_content_quality(self, report_content, sources, section_research_results=None):
+        """Async variant of assess_content_quality; the five assessments run concurrently"""
+        try:
+            sanitized_content = self._sanitize_content(report_content)
+            truncated_content = self._smart_truncate(sanitized_content)
+            semaphore = asyncio.Semaphore(self.max_concurrent_assessments) if self.max_concurrent_assessments else None
+
+            async def bounded(assessment):
+                if semaphore is None:
+                    return await assessment
+                async with semaphore:
+                    return await assessment
+
+            async def completeness():
+                if not section_research_results:
+                    return self._assess_completeness(truncated_content, section_research_results)
+                return await self._aget_llm_assessment(self._completeness_prompt(truncated_content, section_research_results), 'completeness')
+
+            async def source_usage():
+                prompt, citation_ratio = self._source_usage_prompt(truncated_content, sources)
+                assessment = await self._aget_llm_assessment(prompt, 'source_usage')
+                return self._adjust_source_usage(assessment, citation_ratio)
+
+            coherence, accuracy, usage, complete, citations = await asyncio.gather(
+                bounded(self._aget_llm_assessment(self._coherence_prompt(truncated_content), 'coherence')),
+                bounded(self._aget_llm_assessment(self._factual_accuracy_prompt(truncated_content, sources), 'factual_accuracy')),
+                bounded(source_usage()),
+                bounded(completeness()),
+                bounded(self._aget_llm_assessment(self._citation_quality_prompt(truncated_content, sources), 'citation_quality')),
             )
-            
-            return {
-                'overall_score': overall_score,
-                'needs_revision': needs_revision,
-                'assessments': assessments,
-                'recommendations': self._generate_recommendations(assessments),
-                'content_truncated': len(sanitized_content) != len(report_content)
+            assessments = {
+                'coherence': coherence,
+                'accuracy': accuracy,
+                'source_usage': usage,
+                'completeness': complete,
+                'citations': citations,
             }
-            
+            return self._assessment_result(assessments, sanitized_content, report_content)
+
         except Exception as e:
-            print(f"Error in quality assessment: {e}")
-            # Return safe fallback assessment
-            return {
-                'overall_score': 0.5,
-                'needs_revision': True,
-                'assessments': {},
-                'recommendations': ['Quality assessment failed - manual review required'],
-                'error': str(e),
-                'content_truncated': False
-            }
+            return self._assessment_error(e)
+
+    def _assessment_result(self, assessments, sanitized_content, report_content):
+        # Calculate overall quality score
+        overall_score = self._calculate_overall_score(assessments)
+        
+        # Determine if revision is needed
+        needs_revision = (
+            assessments['coherence']['score'] < self.minimum_coherence_score or
+            assessments['accuracy']['score'] < self.minimum_factual_accuracy or
+            assessments['source_usage']['score'] < self.minimum_source_usage or
+            overall_score < self.minimum_overall_score
+        )
+        
+        return {
+            'overall_score': overall_score,
+            'needs_revision': needs_revision,
+            'assessments': assessments,
+            'recommendations': self._generate_recommendations(assessments),
+            'content_truncated': len(sanitized_content) != len(report_content)
+        }
+
+    def _assessment_error(self, e):
+        print(f"Error in quality assessment: {e}")
+        # Return safe fallback assessment
+        return {
+            'overall_score': 0.5,
+            'needs_revision': True,
+            'assessments': {},
+            'recommendations': ['Quality assessment failed - manual review required'],
+            'error': str(e),
+            'content_truncated': False
+        }
     
     def _assess_coherence(self, content):
         """Assess the logical flow and coherence of the content"""
-        prompt = f"""
+        return self._get_llm_assessment(self._coherence_prompt(content), 'coherence')
+
+    def _coherence_prompt(self, content):
+        return f"""
         Evaluate the coherence and logical flow of this report content.
         
         Content: {content}
@@ -133,11 +187,12 @@ class QualityControllerAgent:
             "improvement_suggestions": ["specific suggestions"]
         }}
         """
-        
-        return self._get_llm_assessment(prompt, 'coherence')
     
     def _assess_factual_accuracy(self, content, sources):
         """Assess factual accuracy against provided sources"""
+        return self._get_llm_assessment(self._factual_accuracy_prompt(content, sources), 'factual_accuracy')
+
+    def _factual_accuracy_prompt(self, content, sources):
         # Create source summaries for context
         source_summaries = []
         for i, source in enumerate(sources[:5]):  # Limit to top 5
@@ -147,7 +202,7 @@ class QualityControllerAgent:
         
         sources_text = "\n\n".join(source_summaries)
         
-        prompt = f"""
+        return f"""
         Evaluate the factual accuracy of this report content against the provided sources.
         
         Content: {content}
@@ -172,12 +227,24 @@ class QualityControllerAgent:
             "well_supported": ["well-documented claims"]
         }}
         """
-        
-        return self._get_llm_assessment(prompt, 'factual_accuracy')
     
     def _assess_source_usage(self, content, sources):
         """Assess how effectively sources are used in the content"""
+        prompt, citation_ratio = self._source_usage_prompt(content, sources)
+        assessment = self._get_llm_assessment(prompt, 'source_usage')
+        return self._adjust_source_usage(assessment, citation_ratio)
+
+    def _adjust_source_usage(self, assessment, citation_ratio):
+        # Adjust score based on citation ratio
+        if assessment and 'score' in assessment:
+            ratio_penalty = max(0, 0.5 - citation_ratio) if citation_ratio < 0.5 else 0
+            assessment['score'] = max(0, assessment['score'] - ratio_penalty)
+            assessment['citation_ratio'] = citation_ratio
         
+        return assessment
+
+    def _source_usage_prompt(self, content, sources):
+        """Return the source usage prompt and the measured citation ratio"""
         # Count citations and references
         citation_patterns = [
             r'\(([^(),]+),\s*(\d{4}|n\.d\.)\)',  # (Author, Year)
@@ -217,25 +284,19 @@ class QualityControllerAgent:
             "citation_placement": "appropriate/inappropriate"
         }}
         """
-        
-        assessment = self._get_llm_assessment(prompt, 'source_usage')
-        
-        # Adjust score based on citation ratio
-        if assessment and 'score' in assessment:
-            ratio_penalty = max(0, 0.5 - citation_ratio) if citation_ratio < 0.5 else 0
-            assessment['score'] = max(0, assessment['score'] - ratio_penalty)
-            assessment['citation_ratio'] = citation_ratio
-        
-        return assessment
+        return prompt, citation_ratio
     
     def _assess_completeness(self, content, section_research_results):
         """Assess whether the content fully addresses the planned sections"""
         if not section_research_results:
             return {'score': 0.8, 'note': 'No section research data available for completeness assessment'}
         
+        return self._get_llm_assessment(self._completeness_prompt(content, section_research_results), 'completeness')
+
+    def _completeness_prompt(self, content, section_research_results):
         planned_sections = list(section_research_results.keys())
         
-        prompt = f"""
+        return f"""
         Evaluate whether this report content adequately covers the planned sections.
         
         Content: {content}
@@ -259,12 +320,13 @@ class QualityControllerAgent:
             "coverage_gaps": ["important topics missing"]
         }}
         """
-        
-        return self._get_llm_assessment(prompt, 'completeness')
     
     def _assess_citation_quality(self, content, sources):
         """Assess the quality and appropriateness of citations"""
-        prompt = f"""
+        return self._get_llm_assessment(self._citation_quality_prompt(content, sources), 'citation_quality')
+
+    def _citation_quality_prompt(self, content, sources):
+        return f"""
         Evaluate the quality of citations in this report content.
         
         Content: {content}
@@ -288,33 +350,44 @@ class QualityControllerAgent:
             "citation_consistency": "consistent/inconsistent"
         }}
         """
-        
-        return self._get_llm_assessment(prompt, 'citation_quality')
     
     def _get_llm_assessment(self, prompt, assessment_type):
         """Get LLM assessment with error handling"""
         try:
             response = self.model.invoke(prompt)
-            result_text = response.content.strip()
-            
-            # Extract JSON from response
-            json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            else:
-                # Fallback for non-JSON responses
-                return {
-                    'score': 0.5,
-                    'note': f'Could not parse {assessment_type} assessment',
-                    'raw_response': result_text[:200]
-                }
+            return self._parse_assessment(response.content, assessment_type)
         except Exception as e:
-            print(f"Error in {assessment_type} assessment: {e}")
+            return self._assessment_failure(e, assessment_type)
+
+    async def _aget_llm_assessment(self, prompt, assessment_type):
+        try:
+            response = await self.model.ainvoke(prompt)
+            return self._parse_assessment(response.content, assessment_type)
+        except Exception as e:
+            return self._assessment_failure(e, assessment_type)
+
+    def _parse_assessment(self, content, assessment_type):
+        result_text = content.strip()
+        
+        # Extract JSON from response
+        json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group())
+        else:
+            # Fallback for non-JSON responses
             return {
-                'score': 0.0,
-                'error': str(e),
-                'note': f'Assessment failed for {assessment_type}'
+                'score': 0.5,
+                'note': f'Could not parse {assessment_type} assessment',
+                'raw_response': result_text[:200]
             }
+
+    def _assessment_failure(self, e, assessment_type):
+        print(f"Error in {assessment_type} assessment: {e}")
+        return {
+            'score': 0.0,
+            'error': str(e),
+            'note': f'Assessment failed for {assessment_type}'
+        }
     
     def _calculate_overall_score(self, assessments):
         """Calculate weighted overall quality score"""
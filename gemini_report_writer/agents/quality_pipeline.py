@@ -1,6 +1,7 @@
 import json
 import time
 import os
+import uuid
 import yaml
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, field
@@ -195,23 +196,35 @@ class QualityValidationPipeline:
     
     def start_quality_tracking(self, topic: str, workflow_id: str = None) -> SystemQualityReport:
         """Initialize quality tracking for a new workflow"""
+        self.current_report = self.new_quality_report(topic, workflow_id)
+        return self.current_report
+
+    def new_quality_report(self, topic: str, workflow_id: str = None) -> SystemQualityReport:
+        """Create a quality report owned by the caller, leaving the pipeline's session untouched"""
         if not workflow_id:
-            workflow_id = f"workflow_{int(time.time())}"
-            
-        self.current_report = SystemQualityReport(
+            # Workflow IDs key durable checkpoints, so they must stay unique across concurrent runs
+            workflow_id = f"workflow_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+
+        print(f"🎯 Quality tracking started for: {topic}")
+        return SystemQualityReport(
             workflow_id=workflow_id,
             topic=topic
         )
-        
-        print(f"🎯 Quality tracking started for: {topic}")
-        return self.current_report
     
     def validate_outline_quality(self, outline: List[str], topic: str) -> StageQualityReport:
         """Validate outline quality and coherence"""
+        relevance_score = self._assess_outline_topic_relevance(outline, topic)
+        return self._outline_quality_report(outline, topic, relevance_score)
+
+    async def avalidate_outline_quality(self, outline: List[str], topic: str) -> StageQualityReport:
+        """Async variant of validate_outline_quality"""
+        relevance_score = await self._aassess_outline_topic_relevance(outline, topic)
+        return self._outline_quality_report(outline, topic, relevance_score)
+
+    def _outline_quality_report(self, outline: List[str], topic: str, relevance_score: float) -> StageQualityReport:
         metrics = []
         
         # 1. Topic relevance assessment
-        relevance_score = self._assess_outline_topic_relevance(outline, topic)
         threshold = self.get_threshold('outline_quality_threshold')
         metrics.append(QualityMetric(
             name="topic_relevance",
@@ -390,28 +403,30 @@ class QualityValidationPipeline:
         print(f"🧩 Coherence Quality: {overall_score:.2f} ({'✅ PASS' if stage_passed else '❌ FAIL'})")
         return report
     
-    def finalize_quality_report(self) -> SystemQualityReport:
-        """Finalize and return the complete quality report"""
-        if not self.current_report:
+    def finalize_quality_report(self, quality_report: Optional[SystemQualityReport] = None) -> SystemQualityReport:
+        """Finalize and return the complete quality report (defaults to the tracked session)"""
+        quality_report = quality_report or self.current_report
+        if not quality_report:
             raise ValueError("No quality tracking session active")
             
-        self.current_report.end_time = time.time()
+        quality_report.end_time = time.time()
         
         # Print final summary
         print(f"\n📊 FINAL QUALITY REPORT")
-        print(f"Overall Score: {self.current_report.overall_score:.2f}")
-        print(f"Quality Gates: {self.current_report.quality_gates_passed}/{self.current_report.quality_gates_total}")
-        print(f"Recommendation: {self.current_report.final_recommendation}")
+        print(f"Overall Score: {quality_report.overall_score:.2f}")
+        print(f"Quality Gates: {quality_report.quality_gates_passed}/{quality_report.quality_gates_total}")
+        print(f"Recommendation: {quality_report.final_recommendation}")
         
-        return self.current_report
+        return quality_report
     
-    def should_terminate_early(self) -> bool:
+    def should_terminate_early(self, quality_report: Optional[SystemQualityReport] = None) -> bool:
         """Determine if workflow should terminate early due to quality issues"""
-        if not self.get_setting('pipeline_settings.enable_early_termination', True) or not self.current_report:
+        quality_report = quality_report or self.current_report
+        if not self.get_setting('pipeline_settings.enable_early_termination', True) or not quality_report:
             return False
             
         # Check if we have multiple failing stages
-        failing_stages = [r for r in self.current_report.stage_reports if not r.passed]
+        failing_stages = [r for r in quality_report.stage_reports if not r.passed]
         failing_threshold = self.get_setting('pipeline_settings.failing_stages_for_termination', 2)
         
         if len(failing_stages) >= failing_threshold:
@@ -424,7 +439,33 @@ class QualityValidationPipeline:
     def _assess_outline_topic_relevance(self, outline: List[str], topic: str) -> float:
         """Assess how well outline sections relate to the main topic"""
         try:
-            prompt = f"""
+            response = self.model.invoke(self._outline_relevance_prompt(outline, topic))
+            return self._parse_outline_relevance(response.content, outline, topic)
+        except Exception as e:
+            print(f"Error assessing outline relevance: {e}")
+            return 0.5
+
+    async def _aassess_outline_topic_relevance(self, outline: List[str], topic: str) -> float:
+        try:
+            response = await self.model.ainvoke(self._outline_relevance_prompt(outline, topic))
+            return self._parse_outline_relevance(response.content, outline, topic)
+        except Exception as e:
+            print(f"Error assessing outline relevance: {e}")
+            return 0.5
+
+    def _parse_outline_relevance(self, content: str, outline: List[str], topic: str) -> float:
+        score_text = content.strip()
+        
+        # Extract numeric score
+        try:
+            score = float(score_text)
+            return max(0.0, min(1.0, score))
+        except ValueError:
+            # Fallback scoring based on keyword overlap
+            return self._calculate_keyword_overlap(outline, topic)
+
+    def _outline_relevance_prompt(self, outline: List[str], topic: str) -> str:
+        return f"""
             Evaluate how well this outline relates to the topic "{topic}".
             
             Outline sections:
@@ -437,21 +478,6 @@ class QualityValidationPipeline:
             
             Respond with only a number between 0.0 and 1.0:
             """
-            
-            response = self.model.invoke(prompt)
-            score_text = response.content.strip()
-            
-            # Extract numeric score
-            try:
-                score = float(score_text)
-                return max(0.0, min(1.0, score))
-            except ValueError:
-                # Fallback scoring based on keyword overlap
-                return self._calculate_keyword_overlap(outline, topic)
-                
-        except Exception as e:
-            print(f"Error assessing outline relevance: {e}")
-            return 0.5
     
     def _assess_outline_structure(self, outline: List[str]) -> float:
         """Assess structural coherence of the outline"""
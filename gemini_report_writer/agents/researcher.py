@@ -13,6 +13,29 @@ class ResearcherAgent:
 
     def validate_research_feasibility(self, section_title, sources, main_topic):
         """Check if research can be conducted with given sources for the section"""
+        rejection = self._check_source_thresholds(sources)
+        if rejection:
+            return rejection
+        
+        # Additional topic-section coherence check
+        section_relevance = self._assess_section_topic_alignment(section_title, main_topic, sources)
+        return self._feasibility_result(sources, section_relevance)
+
+    async def avalidate_research_feasibility(self, section_title, sources, main_topic):
+        """Async variant of validate_research_feasibility"""
+        rejection = self._check_source_thresholds(sources)
+        if rejection:
+            return rejection
+        
+        section_relevance = await self._aassess_section_topic_alignment(section_title, main_topic, sources)
+        return self._feasibility_result(sources, section_relevance)
+
+    def _average_relevance(self, sources):
+        relevance_scores = [s.get('topic_relevance', 0.0) for s in sources]
+        return sum(relevance_scores) / len(relevance_scores) if relevance_scores else 0.0
+
+    def _check_source_thresholds(self, sources):
+        """Return a rejection result if the sources fail the count/relevance thresholds, else None"""
         if not sources:
             return {
                 'feasible': False,
@@ -29,8 +52,7 @@ class ResearcherAgent:
             }
         
         # Check source relevance quality
-        relevance_scores = [s.get('topic_relevance', 0.0) for s in sources]
-        avg_relevance = sum(relevance_scores) / len(relevance_scores) if relevance_scores else 0.0
+        avg_relevance = self._average_relevance(sources)
         
         if avg_relevance < self.minimum_relevance_threshold:
             return {
@@ -38,10 +60,9 @@ class ResearcherAgent:
                 'reason': f'Low source relevance: {avg_relevance:.2f} < {self.minimum_relevance_threshold}',
                 'recommendation': 'skip_section'
             }
-        
-        # Additional topic-section coherence check
-        section_relevance = self._assess_section_topic_alignment(section_title, main_topic, sources)
-        
+        return None
+
+    def _feasibility_result(self, sources, section_relevance):
         if section_relevance < self.section_alignment_threshold:
             return {
                 'feasible': False,
@@ -51,13 +72,33 @@ class ResearcherAgent:
         
         return {
             'feasible': True,
-            'quality_score': avg_relevance,
+            'quality_score': self._average_relevance(sources),
             'source_count': len(sources),
             'section_relevance': section_relevance
         }
     
     def _assess_section_topic_alignment(self, section_title, main_topic, sources):
         """Assess how well the section aligns with the main topic given available sources"""
+        try:
+            response = self.model.invoke(self._alignment_prompt(section_title, main_topic, sources))
+            return self._parse_alignment_score(response.content)
+        except Exception as e:
+            print(f"Error assessing section alignment: {e}")
+            return 0.5  # Default to moderate alignment if assessment fails
+
+    async def _aassess_section_topic_alignment(self, section_title, main_topic, sources):
+        try:
+            response = await self.model.ainvoke(self._alignment_prompt(section_title, main_topic, sources))
+            return self._parse_alignment_score(response.content)
+        except Exception as e:
+            print(f"Error assessing section alignment: {e}")
+            return 0.5
+
+    def _parse_alignment_score(self, content):
+        score = float(content.strip())
+        return max(0.0, min(1.0, score))
+
+    def _alignment_prompt(self, section_title, main_topic, sources):
         # Create a summary of available source content
         source_summaries = []
         for source in sources[:5]:  # Limit to top 5 sources to avoid context overflow
@@ -67,7 +108,7 @@ class ResearcherAgent:
         
         sources_summary = "\n".join(source_summaries)
         
-        prompt = f"""
+        return f"""
         Assess the alignment between this section and the main topic based on available sources.
         
         Main Topic: {main_topic}
@@ -91,14 +132,6 @@ class ResearcherAgent:
         
         Respond with only the numerical score (e.g., 0.7):
         """
-        
-        try:
-            response = self.model.invoke(prompt)
-            score = float(response.content.strip())
-            return max(0.0, min(1.0, score))
-        except Exception as e:
-            print(f"Error assessing section alignment: {e}")
-            return 0.5  # Default to moderate alignment if assessment fails
     
     def conduct_research(self, section_title, sources, main_topic=None):
         """Conduct focused research with quality validation"""
@@ -106,13 +139,41 @@ class ResearcherAgent:
         if main_topic:
             validation = self.validate_research_feasibility(section_title, sources, main_topic)
             if not validation['feasible']:
-                return {
-                    'content': f"[SECTION SKIPPED: {validation['reason']}]",
-                    'skipped': True,
-                    'reason': validation['reason'],
-                    'recommendation': validation['recommendation']
-                }
+                return self._skipped_result(validation)
+        
+        research_content = self.model.invoke(self._research_prompt(section_title, sources, main_topic)).content
+        return self._research_result(research_content, sources)
+
+    async def aconduct_research(self, section_title, sources, main_topic=None):
+        """Async variant of conduct_research"""
+        if main_topic:
+            validation = await self.avalidate_research_feasibility(section_title, sources, main_topic)
+            if not validation['feasible']:
+                return self._skipped_result(validation)
         
+        research_content = (await self.model.ainvoke(self._research_prompt(section_title, sources, main_topic))).content
+        return self._research_result(research_content, sources)
+
+    def _skipped_result(self, validation):
+        return {
+            'content': f"[SECTION SKIPPED: {validation['reason']}]",
+            'skipped': True,
+            'reason': validation['reason'],
+            'recommendation': validation['recommendation']
+        }
+
+    def _research_result(self, research_content, sources):
+        return {
+            'content': research_content,
+            'skipped': False,
+            'source_count': len(sources),
+            'quality_metrics': {
+                'avg_relevance': sum(s.get('topic_relevance', 0) for s in sources) / len(sources) if sources else 0,
+                'source_count': len(sources)
+            }
+        }
+
+    def _research_prompt(self, section_title, sources, main_topic):
         formatted_sources = []
         for i, source in enumerate(sources):
             title = source.get('title', 'N/A')
@@ -130,7 +191,7 @@ class ResearcherAgent:
             avg_relevance = sum(s.get('topic_relevance', 0) for s in sources) / len(sources)
             quality_note = f"\n\n**Research Quality Context:**\n- {len(sources)} sources available\n- Average relevance score: {avg_relevance:.2f}\n- Main topic: {main_topic}"
         
-        prompt = dedent(f"""
+        return dedent(f"""
             You are an expert researcher. Your task is to synthesize information for the following section of a report:
 
             **Section Title:** {section_title}
@@ -148,20 +209,14 @@ class ResearcherAgent:
             **Provided Sources:**
             {sources_text}{quality_note}
         """)
-        
-        research_content = self.model.invoke(prompt).content
-        
-        return {
-            'content': research_content,
-            'skipped': False,
-            'source_count': len(sources),
-            'quality_metrics': {
-                'avg_relevance': sum(s.get('topic_relevance', 0) for s in sources) / len(sources) if sources else 0,
-                'source_count': len(sources)
-            }
-        }
 
     def refine_research(self, research_plan, critique, sources, main_topic=None):
+        return self.model.invoke(self._refine_prompt(research_plan, critique, sources)).content
+
+    async def arefine_research(self, research_plan, critique, sources, main_topic=None):
+        return (await self.model.ainvoke(self._refine_prompt(research_plan, critique, sources))).content
+
+    def _refine_prompt(self, research_plan, critique, sources):
         formatted_sources = []
         for i, source in enumerate(sources):
             title = source.get('title', 'N/A')
@@ -173,7 +228,7 @@ class ResearcherAgent:
             formatted_sources.append(f"Source {i+1}:\nTitle: {title}\nAbstract: {abstract}\nDOI: {doi}\nAuthors: {authors}\nYear: {year}\n---")
         sources_text = "\n".join(formatted_sources)
         
-        prompt = dedent(f"""
+        return dedent(f"""
             You are an expert researcher. You have received the following critique on your research for a specific section.
 
             **Research Plan (for this section):**
@@ -186,5 +241,4 @@ class ResearcherAgent:
             {sources_text}
 
             Please refine your research for this section to address the critique. Find additional information from the provided sources, clarify points, and ensure the research is comprehensive. Explicitly mention when information is corroborated by multiple sources. Ensure all claims are grounded in the provided sources. Be very explicit about which source (by Source number) supports which claim.
-        """)
-        return self.model.invoke(prompt).content
\ No newline at end of file
+        """)
\ No newline at end of file
@@ -1,22 +1,75 @@
+import asyncio
+import copy
 import json
 import os
-import requests
+import re
 import redis
-from utils import create_gemini_model
-from tavily import TavilyClient
+import redis.asyncio as aioredis
+import cassette
+import http_client
+import tracing
+from singleflight import SingleFlight, recording_scope
+from utils import create_gemini_model, LoopLocal, SEARCH_REQUESTS
+from tavily import TavilyClient, AsyncTavilyClient
+
+OPENALEX_WORKS_URL = "https://api.openalex.org/works"
+
+# Uncached source gathering per core topic, shared by concurrent retrievals; reranking scores
+# the sources in place, so every retrieval gets its own copy
+SOURCE_GATHERING = SingleFlight(copy=copy.deepcopy)
 
 class RetrieverAgent:
     def __init__(self, redis_host='localhost', redis_port=6379, redis_db=0):
-        self.redis_client = redis.Redis(host=redis_host, port=redis_port, db=redis_db)
+        # Cache reads and searches go through the run's cassette too, so replayed runs see the same cache hits
+        self.redis_client = tracing.TracedClient(
+            cassette.RecordedClient(redis.Redis(host=redis_host, port=redis_port, db=redis_db), "redis"), "redis"
+        )
+        self._async_redis = LoopLocal(lambda: tracing.TracedClient(
+            cassette.RecordedClient(aioredis.Redis(host=redis_host, port=redis_port, db=redis_db), "redis", is_async=True), "redis"
+        ))
         self.model = create_gemini_model(agent_role="retriever")
-        self.tavily = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+        self.tavily = cassette.RecordedClient(TavilyClient(api_key=os.getenv("TAVILY_API_KEY")), "tavily")
+        self._async_tavily = LoopLocal(
+            lambda: cassette.RecordedClient(AsyncTavilyClient(api_key=os.getenv("TAVILY_API_KEY")), "tavily", is_async=True)
+        )
         
         # Topic relevance threshold for filtering sources
         self.relevance_threshold = 0.7
 
+    @property
+    def async_redis_client(self):
+        """redis.asyncio client bound to the running event loop"""
+        return self._async_redis.get()
+
     def _generate_core_queries(self, topic):
         """Generate focused, topic-specific queries for better source retrieval"""
-        prompt = f"""
+        try:
+            response = self.model.invoke(self._core_queries_prompt(topic))
+            return self._parse_core_queries(response.content, topic)
+        except Exception as e:
+            print(f"Error generating queries: {e}")
+            return [topic]
+
+    async def _agenerate_core_queries(self, topic):
+        try:
+            response = await self.model.ainvoke(self._core_queries_prompt(topic))
+            return self._parse_core_queries(response.content, topic)
+        except Exception as e:
+            print(f"Error generating queries: {e}")
+            return [topic]
+
+    def _parse_core_queries(self, content, topic):
+        queries_text = content.strip()
+        # Extract JSON from response
+        json_match = re.search(r'\[.*\]', queries_text, re.DOTALL)
+        if json_match:
+            queries = json.loads(json_match.group())
+            return queries[:5]  # Limit to 5 queries
+        # Fallback to original topic if parsing fails
+        return [topic]
+
+    def _core_queries_prompt(self, topic):
+        return f"""
         Generate 3-5 focused search queries for the topic: "{topic}"
         
         Requirements:
@@ -32,28 +85,52 @@ class RetrieverAgent:
         Topic: {topic}
         Queries:
         """
-        
-        try:
-            response = self.model.invoke(prompt)
-            queries_text = response.content.strip()
-            # Extract JSON from response
-            import re
-            json_match = re.search(r'\[.*\]', queries_text, re.DOTALL)
-            if json_match:
-                queries = json.loads(json_match.group())
-                return queries[:5]  # Limit to 5 queries
-            else:
-                # Fallback to original topic if parsing fails
-                return [topic]
-        except Exception as e:
-            print(f"Error generating queries: {e}")
-            return [topic]
     
     def _validate_topic_relevance_batch(self, sources, original_topic):
         """Use LLM to validate multiple sources in a single call for better performance"""
         if not sources:
             return {}
-            
+
+        try:
+            response = self.model.invoke(self._batch_validation_prompt(sources, original_topic))
+            return self._parse_batch_scores(response.content, len(sources))
+        except Exception as e:
+            print(f"Error in batch validation: {e}")
+            return {}
+
+    async def _avalidate_topic_relevance_batch(self, sources, original_topic):
+        if not sources:
+            return {}
+
+        try:
+            response = await self.model.ainvoke(self._batch_validation_prompt(sources, original_topic))
+            return self._parse_batch_scores(response.content, len(sources))
+        except Exception as e:
+            print(f"Error in batch validation: {e}")
+            return {}
+
+    def _parse_batch_scores(self, content, source_count):
+        score_text = content.strip()
+        
+        # Extract JSON from response
+        json_match = re.search(r'\{.*\}', score_text, re.DOTALL)
+        if not json_match:
+            print("Warning: Could not parse JSON response from batch validation")
+            return {}
+
+        scores_dict = json.loads(json_match.group())
+        # Convert string keys to integers and validate scores
+        validated_scores = {}
+        for key, score in scores_dict.items():
+            try:
+                idx = int(key) - 1  # Convert to 0-based index
+                if 0 <= idx < source_count:
+                    validated_scores[idx] = max(0.0, min(1.0, float(score)))
+            except (ValueError, TypeError):
+                continue
+        return validated_scores
+
+    def _batch_validation_prompt(self, sources, original_topic):
         # Prepare batch validation prompt
         source_summaries = []
         for i, source in enumerate(sources):
@@ -65,7 +142,7 @@ class RetrieverAgent:
         
         sources_text = "\n---\n".join(source_summaries)
         
-        prompt = f"""
+        return f"""
         Evaluate the relevance of these sources to the topic: "{original_topic}"
         
         Rate each source on a scale of 0.0 to 1.0 where:
@@ -89,43 +166,39 @@ class RetrieverAgent:
         
         JSON Response:
         """
-        
-        try:
-            response = self.model.invoke(prompt)
-            score_text = response.content.strip()
-            
-            # Extract JSON from response
-            import re
-            json_match = re.search(r'\{.*\}', score_text, re.DOTALL)
-            if json_match:
-                scores_dict = json.loads(json_match.group())
-                # Convert string keys to integers and validate scores
-                validated_scores = {}
-                for key, score in scores_dict.items():
-                    try:
-                        idx = int(key) - 1  # Convert to 0-based index
-                        if 0 <= idx < len(sources):
-                            validated_scores[idx] = max(0.0, min(1.0, float(score)))
-                    except (ValueError, TypeError):
-                        continue
-                return validated_scores
-            else:
-                print("Warning: Could not parse JSON response from batch validation")
-                return {}
-                
-        except Exception as e:
-            print(f"Error in batch validation: {e}")
-            return {}
     
     def _validate_topic_relevance(self, source, original_topic):
         """Fallback method for single source validation"""
+        if not source.get('title') and not source.get('abstract'):
+            return 0.0
+
+        try:
+            response = self.model.invoke(self._single_validation_prompt(source, original_topic))
+            return self._parse_single_score(response.content)
+        except Exception as e:
+            print(f"Error validating relevance: {e}")
+            return 0.0  # Default to irrelevant if validation fails
+
+    async def _avalidate_topic_relevance(self, source, original_topic):
+        if not source.get('title') and not source.get('abstract'):
+            return 0.0
+
+        try:
+            response = await self.model.ainvoke(self._single_validation_prompt(source, original_topic))
+            return self._parse_single_score(response.content)
+        except Exception as e:
+            print(f"Error validating relevance: {e}")
+            return 0.0
+
+    def _parse_single_score(self, content):
+        score = float(content.strip())
+        return max(0.0, min(1.0, score))  # Clamp between 0.0 and 1.0
+
+    def _single_validation_prompt(self, source, original_topic):
         title = source.get('title', '')
         abstract = source.get('abstract', '')
         
-        if not title and not abstract:
-            return 0.0
-        
-        prompt = f"""
+        return f"""
         Evaluate the relevance of this source to the topic: "{original_topic}"
         
         Source Title: {title}
@@ -146,114 +219,135 @@ class RetrieverAgent:
         
         Respond with only the numerical score (e.g., 0.8):
         """
-        
-        try:
-            response = self.model.invoke(prompt)
-            score_text = response.content.strip()
-            score = float(score_text)
-            return max(0.0, min(1.0, score))  # Clamp between 0.0 and 1.0
-        except Exception as e:
-            print(f"Error validating relevance: {e}")
-            return 0.0  # Default to irrelevant if validation fails
 
     def _query_openalex(self, queries, results_per_page=10):
         """Query OpenAlex with multiple focused queries"""
         all_sources = []
         for query in queries:
             print(f"Querying OpenAlex for query: {query}")
-            url = f"https://api.openalex.org/works?search={query}&per_page={results_per_page}"
-            headers = {
-                'User-Agent': 'gemini-report-writer/1.0 (mailto:gemini-report-writer-support@example.com)'
-            }
             try:
-                response = requests.get(url, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-                sources = []
-                for work in data.get('results', [])[:results_per_page]: # Limit results
-                    doi = work.get('doi')
-                    if doi and doi.startswith("https://doi.org/"):
-                        doi = doi[len("https://doi.org/"):]
-
-                    abstract_inverted_index = work.get('abstract_inverted_index')
-                    abstract = ""
-                    if abstract_inverted_index:
-                        words = [(word, idx) for word, indices in abstract_inverted_index.items() for idx in indices]
-                        words.sort(key=lambda x: x[1])
-                        abstract = " ".join([word for word, idx in words])
-
-                    authors = [author.get('display_name') for author in work.get('authorships', []) if author.get('display_name')]
-                    year = work.get('publication_year')
-                    citations = work.get('cited_by_count', 0)
-
-                    primary_location = work.get('primary_location') or {}
-                    source_info = primary_location.get('source') or {}
-                    journal_name = source_info.get('display_name')
-
-                    biblio = work.get('biblio') or {}
-                    first_page = biblio.get('first_page')
-                    last_page = biblio.get('last_page')
-                    pages = f"{first_page}-{last_page}" if first_page and last_page else None
-
-                    sources.append({
-                        "title": work.get('title'),
-                        "abstract": abstract,
-                        "doi": doi,
-                        "source": "OpenAlex",
-                        "authors": authors,
-                        "year": year,
-                        "journal": journal_name,
-                        "citations": citations,
-                        "url": work.get('id')
-                    })
-                all_sources.extend(sources)
-            except requests.exceptions.RequestException as e:
+                data = http_client.get_json(OPENALEX_WORKS_URL, params={'search': query, 'per_page': results_per_page})
+                all_sources.extend(self._parse_openalex_results(data, results_per_page))
+            except http_client.HTTP_ERRORS as e:
                 print(f"Error querying OpenAlex for query '{query}': {e}")
                 continue
         
         return all_sources
 
+    async def _aquery_openalex(self, queries, results_per_page=10):
+        """Async variant of _query_openalex; all queries are issued concurrently"""
+        async def query_one(query):
+            print(f"Querying OpenAlex for query: {query}")
+            try:
+                data = await http_client.aget_json(OPENALEX_WORKS_URL, params={'search': query, 'per_page': results_per_page})
+                return self._parse_openalex_results(data, results_per_page)
+            except http_client.HTTP_ERRORS as e:
+                print(f"Error querying OpenAlex for query '{query}': {e}")
+                return []
+
+        results = await asyncio.gather(*(query_one(query) for query in queries))
+        return [source for sources in results for source in sources]
+
+    @staticmethod
+    def _reconstruct_abstract(abstract_inverted_index):
+        """Rebuild abstract text from OpenAlex's word -> positions index"""
+        if not abstract_inverted_index:
+            return ""
+        words = [(word, idx) for word, indices in abstract_inverted_index.items() for idx in indices]
+        words.sort(key=lambda x: x[1])
+        return " ".join([word for word, idx in words])
+
+    def _parse_openalex_results(self, data, results_per_page):
+        sources = []
+        for work in data.get('results', [])[:results_per_page]: # Limit results
+            doi = work.get('doi')
+            if doi and doi.startswith("https://doi.org/"):
+                doi = doi[len("https://doi.org/"):]
+
+            abstract = self._reconstruct_abstract(work.get('abstract_inverted_index'))
+
+            authors = [author.get('display_name') for author in work.get('authorships', []) if author.get('display_name')]
+            year = work.get('publication_year')
+            citations = work.get('cited_by_count', 0)
+
+            primary_location = work.get('primary_location') or {}
+            source_info = primary_location.get('source') or {}
+            journal_name = source_info.get('display_name')
+
+            biblio = work.get('biblio') or {}
+            first_page = biblio.get('first_page')
+            last_page = biblio.get('last_page')
+            pages = f"{first_page}-{last_page}" if first_page and last_page else None
+
+            sources.append({
+                "title": work.get('title'),
+                "abstract": abstract,
+                "doi": doi,
+                "source": "OpenAlex",
+                "authors": authors,
+                "year": year,
+                "journal": journal_name,
+                "citations": citations,
+                "url": work.get('id')
+            })
+        return sources
+
     def _extract_author_with_llm(self, url):
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            content = response.text
-            prompt = f"""Please extract the author's name from the following web page content. The author might be an individual or an organization. If no author is explicitly mentioned, state 'No Author Specified'.
-
-            Content:
-            {content[:4000]}
+            content = http_client.get_text(url)
+            author_response = self.model.invoke(self._author_prompt(content))
+            return author_response.content.strip()
+        except http_client.HTTP_ERRORS as e:
+            print(f"Could not fetch URL {url} for author extraction: {e}")
+            return "No Author Specified"
+        except Exception as e:
+            print(f"An error occurred during author extraction with LLM: {e}")
+            return "No Author Specified"
 
-            Author:"""
-            author_response = self.model.invoke(prompt)
+    async def _aextract_author_with_llm(self, url):
+        try:
+            content = await http_client.aget_text(url)
+            author_response = await self.model.ainvoke(self._author_prompt(content))
             return author_response.content.strip()
-        except requests.exceptions.RequestException as e:
+        except http_client.HTTP_ERRORS as e:
             print(f"Could not fetch URL {url} for author extraction: {e}")
             return "No Author Specified"
         except Exception as e:
             print(f"An error occurred during author extraction with LLM: {e}")
             return "No Author Specified"
 
+    def _author_prompt(self, content):
+        return f"""Please extract the author's name from the following web page content. The author might be an individual or an organization. If no author is explicitly mentioned, state 'No Author Specified'.
+
+            Content:
+            {content[:4000]}
+
+            Author:"""
+
+    def _web_source(self, res, author):
+        return {
+            "title": res.get('title'),
+            "abstract": res.get('content'),
+            "url": res.get('url'),
+            "source": "Web Search",
+            "authors": [author], # Ensure it's a list
+            "year": res.get('published_date', '').split('-')[0] if res.get('published_date') else "n.d."
+        }
+
     def _query_google_search(self, queries, num_results=10):
         """Query Google Search with multiple focused queries"""
         all_sources = []
         for query in queries:
             print(f"Querying Google Search for query: {query}")
             try:
-                results = self.tavily.search(query=query, search_depth="advanced", max_results=num_results)
+                with SEARCH_REQUESTS.slot(), tracing.span("tavily.search", "http", query=query):
+                    results = self.tavily.search(query=query, search_depth="advanced", max_results=num_results)
                 sources = []
                 for res in results.get('results', [])[:num_results]: # Limit results
                     author = res.get('author')
                     if not author:
                         author = self._extract_author_with_llm(res.get('url'))
-
-                    sources.append({
-                        "title": res.get('title'),
-                        "abstract": res.get('content'),
-                        "url": res.get('url'),
-                        "source": "Web Search",
-                        "authors": [author], # Ensure it's a list
-                        "year": res.get('published_date', '').split('-')[0] if res.get('published_date') else "n.d."
-                    })
+                    sources.append(self._web_source(res, author))
                 all_sources.extend(sources)
             except Exception as e:
                 print(f"Error querying Google Search for query '{query}': {e}")
@@ -261,22 +355,36 @@ class RetrieverAgent:
         
         return all_sources
 
+    async def _aquery_google_search(self, queries, num_results=10):
+        """Async variant of _query_google_search; queries and author lookups run concurrently"""
+        tavily = self._async_tavily.get()
+
+        async def author_for(res):
+            return res.get('author') or await self._aextract_author_with_llm(res.get('url'))
+
+        async def query_one(query):
+            print(f"Querying Google Search for query: {query}")
+            try:
+                async with SEARCH_REQUESTS.aslot():
+                    with tracing.span("tavily.search", "http", query=query):
+                        results = await tavily.search(query=query, search_depth="advanced", max_results=num_results)
+                hits = results.get('results', [])[:num_results] # Limit results
+                authors = await asyncio.gather(*(author_for(res) for res in hits))
+                return [self._web_source(res, author) for res, author in zip(hits, authors)]
+            except Exception as e:
+                print(f"Error querying Google Search for query '{query}': {e}")
+                return []
+
+        results = await asyncio.gather(*(query_one(query) for query in queries))
+        return [source for sources in results for source in sources]
+
     def rerank_and_filter_sources(self, sources, original_topic, k=10):
         """Intelligent reranking and filtering using batch LLM-based relevance validation"""
         print("Validating and reranking sources with batch LLM validation...")
         if not sources:
             return []
 
-        # Remove duplicates based on title and URL
-        seen = set()
-        unique_sources = []
-        for source in sources:
-            identifier = (source.get('title', ''), source.get('url', ''), source.get('doi', ''))
-            if identifier not in seen:
-                seen.add(identifier)
-                unique_sources.append(source)
-        
-        print(f"Processing {len(unique_sources)} unique sources for relevance validation...")
+        unique_sources = self._unique_sources(sources)
         
         # Batch validate topic relevance for better performance
         batch_scores = self._validate_topic_relevance_batch(unique_sources, original_topic)
@@ -288,6 +396,38 @@ class RetrieverAgent:
             for i, source in enumerate(unique_sources):
                 batch_scores[i] = self._validate_topic_relevance(source, original_topic)
         
+        return self._score_and_select(sources, unique_sources, batch_scores, k)
+
+    async def arerank_and_filter_sources(self, sources, original_topic, k=10):
+        """Async variant of rerank_and_filter_sources"""
+        print("Validating and reranking sources with batch LLM validation...")
+        if not sources:
+            return []
+
+        unique_sources = self._unique_sources(sources)
+        batch_scores = await self._avalidate_topic_relevance_batch(unique_sources, original_topic)
+        
+        if not batch_scores:
+            print("Batch validation failed, falling back to individual validation...")
+            scores = await asyncio.gather(*(self._avalidate_topic_relevance(source, original_topic) for source in unique_sources))
+            batch_scores = dict(enumerate(scores))
+        
+        return self._score_and_select(sources, unique_sources, batch_scores, k)
+
+    def _unique_sources(self, sources):
+        # Remove duplicates based on title and URL
+        seen = set()
+        unique_sources = []
+        for source in sources:
+            identifier = (source.get('title', ''), source.get('url', ''), source.get('doi', ''))
+            if identifier not in seen:
+                seen.add(identifier)
+                unique_sources.append(source)
+        
+        print(f"Processing {len(unique_sources)} unique sources for relevance validation...")
+        return unique_sources
+
+    def _score_and_select(self, sources, unique_sources, batch_scores, k):
         # Calculate quality scores and apply dynamic thresholding
         scored_sources = []
         for i, source in enumerate(unique_sources):
@@ -368,28 +508,61 @@ class RetrieverAgent:
 
     def retrieve(self, topic, k=10):
         # Extract just the core topic for caching (remove section-specific info)
-        core_topic = topic.split(':')[0].strip() if ':' in topic else topic
+        core_topic = self._core_topic(topic)
         cache_key = f"rag:{core_topic}"
         
         cached_results = self.redis_client.get(cache_key)
         if cached_results:
-            print(f"Retrieving from cache for topic: {core_topic}")
-            cached_data = json.loads(cached_results)
-            
-            # Handle both old and new cache formats
-            if isinstance(cached_data, dict) and 'sources' in cached_data:
-                # New cache format with metadata
-                cached_sources = cached_data['sources']
-                cache_age = self.redis_client.time()[0] - float(cached_data.get('cached_at', 0))
-                print(f"Cache age: {cache_age/3600:.1f} hours, method: {cached_data.get('validation_method', 'unknown')}")
-            else:
-                # Old cache format - just the sources list
-                cached_sources = cached_data
-                
+            cached_sources = self._load_cached_sources(cached_results, core_topic, lambda: self.redis_client.time()[0])
             # Re-validate cached sources for the specific topic/section if needed
             # Since we now cache with relevance scores, we can reuse them for most cases
             return self.rerank_and_filter_sources(cached_sources, topic, k=k)
 
+        # Sections of one topic retrieve at once; the first to miss the cache gathers sources for all of them
+        all_sources = SOURCE_GATHERING.do((recording_scope(), cache_key), lambda: self._gather_sources(core_topic))[0]
+
+        print("---INTELLIGENT FILTERING AND RANKING---")
+        high_quality_sources = self.rerank_and_filter_sources(all_sources, topic, k=k)
+
+        # Cache the validated sources with relevance scores (only if we found quality sources)
+        if high_quality_sources:
+            cache_data = self._cache_payload(all_sources, core_topic, self.redis_client.time()[0])
+            if cache_data:
+                self.redis_client.setex(cache_key, 604800, json.dumps(cache_data))
+                print(f"Cached {len(cache_data['sources'])} validated sources with relevance scores for future use")
+        else:
+            self._warn_no_sources()
+
+        return high_quality_sources
+
+    async def aretrieve(self, topic, k=10):
+        """Async variant of retrieve using redis.asyncio and the async search clients"""
+        core_topic = self._core_topic(topic)
+        cache_key = f"rag:{core_topic}"
+        redis_client = self.async_redis_client
+        
+        cached_results = await redis_client.get(cache_key)
+        if cached_results:
+            now = (await redis_client.time())[0]
+            cached_sources = self._load_cached_sources(cached_results, core_topic, lambda: now)
+            return await self.arerank_and_filter_sources(cached_sources, topic, k=k)
+
+        all_sources = (await SOURCE_GATHERING.ado((recording_scope(), cache_key), lambda: self._agather_sources(core_topic)))[0]
+
+        print("---INTELLIGENT FILTERING AND RANKING---")
+        high_quality_sources = await self.arerank_and_filter_sources(all_sources, topic, k=k)
+
+        if high_quality_sources:
+            cache_data = self._cache_payload(all_sources, core_topic, (await redis_client.time())[0])
+            if cache_data:
+                await redis_client.setex(cache_key, 604800, json.dumps(cache_data))
+                print(f"Cached {len(cache_data['sources'])} validated sources with relevance scores for future use")
+        else:
+            self._warn_no_sources()
+
+        return high_quality_sources
+
+    def _gather_sources(self, core_topic):
         print("---GENERATING FOCUSED QUERIES---")
         queries = self._generate_core_queries(core_topic)
         print(f"Generated {len(queries)} focused queries: {queries}")
@@ -400,30 +573,55 @@ class RetrieverAgent:
         all_sources.extend(self._query_google_search(queries))
         
         print(f"Gathered {len(all_sources)} total sources from all queries")
+        return all_sources
 
-        print("---INTELLIGENT FILTERING AND RANKING---")
-        high_quality_sources = self.rerank_and_filter_sources(all_sources, topic, k=k)
+    async def _agather_sources(self, core_topic):
+        print("---GENERATING FOCUSED QUERIES---")
+        queries = await self._agenerate_core_queries(core_topic)
+        print(f"Generated {len(queries)} focused queries: {queries}")
 
-        # Cache the validated sources with relevance scores (only if we found quality sources)
-        if high_quality_sources:
-            # Cache all scored sources for potential reuse with different sections
-            # Include relevance scores to avoid re-validation
-            sources_with_scores = [s for s in all_sources if 'topic_relevance' in s and 'quality_score' in s]
-            if sources_with_scores:
-                # Create cache object with metadata
-                cache_data = {
-                    'sources': sources_with_scores,
-                    'core_topic': core_topic,
-                    'cached_at': self.redis_client.time()[0],  # Unix timestamp
-                    'validation_method': 'batch'  # We now use batch validation by default
-                }
-                self.redis_client.setex(cache_key, 604800, json.dumps(cache_data))
-                print(f"Cached {len(sources_with_scores)} validated sources with relevance scores for future use")
-        else:
-            print("⚠️  WARNING: No high-quality sources found for this topic!")
-            print("This may indicate the topic is too narrow, misspelled, or lacks recent research.")
+        print("---GATHERING SOURCES---")
+        openalex_sources, web_sources = await asyncio.gather(
+            self._aquery_openalex(queries), self._aquery_google_search(queries)
+        )
+        all_sources = openalex_sources + web_sources
+        
+        print(f"Gathered {len(all_sources)} total sources from all queries")
+        return all_sources
 
-        return high_quality_sources
+    def _core_topic(self, topic):
+        return topic.split(':')[0].strip() if ':' in topic else topic
+
+    def _load_cached_sources(self, cached_results, core_topic, now):
+        print(f"Retrieving from cache for topic: {core_topic}")
+        cached_data = json.loads(cached_results)
+        
+        # Handle both old and new cache formats
+        if isinstance(cached_data, dict) and 'sources' in cached_data:
+            # New cache format with metadata
+            cache_age = now() - float(cached_data.get('cached_at', 0))
+            print(f"Cache age: {cache_age/3600:.1f} hours, method: {cached_data.get('validation_method', 'unknown')}")
+            return cached_data['sources']
+        # Old cache format - just the sources list
+        return cached_data
+
+    def _cache_payload(self, all_sources, core_topic, cached_at):
+        """Cache object with metadata for all scored sources, or None if nothing was scored"""
+        # Cache all scored sources for potential reuse with different sections
+        # Include relevance scores to avoid re-validation
+        sources_with_scores = [s for s in all_sources if 'topic_relevance' in s and 'quality_score' in s]
+        if not sources_with_scores:
+            return None
+        return {
+            'sources': sources_with_scores,
+            'core_topic': core_topic,
+            'cached_at': cached_at,  # Unix timestamp
+            'validation_method': 'batch'  # We now use batch validation by default
+        }
+
+    def _warn_no_sources(self):
+        print("⚠️  WARNING: No high-quality sources found for this topic!")
+        print("This may indicate the topic is too narrow, misspelled, or lacks recent research.")
 
 if __name__ == '__main__':
     retriever = RetrieverAgent()
@@ -1,62 +1,152 @@
 
+import asyncio
+import json
+import re
+from langchain_core.runnables.config import ContextThreadPoolExecutor
 from textwrap import dedent
 from utils import create_gemini_model
 
+# Sections that frame the report are written after the body so they can reference it
+FRAMING_SECTION_KEYWORDS = ('introduction', 'conclusion', 'executive summary', 'abstract', 'overview', 'concluding')
+
+SECTION_HEADING_PATTERN = re.compile(r'^## (.+)$', re.MULTILINE)
+
 class WriterAgent:
-    def __init__(self):
+    def __init__(self, max_concurrent_sections=4):
         self.model = create_gemini_model(agent_role="writer", temperature=0.7)
+        self.router_model = create_gemini_model(agent_role="revision_router")
+        self.max_concurrent_sections = max(1, max_concurrent_sections)
+
+    def _is_framing_section(self, section_title):
+        title = section_title.lower()
+        return any(keyword in title for keyword in FRAMING_SECTION_KEYWORDS)
+
+    def _summarize_section(self, section_text, max_chars=300):
+        """Cheap extractive summary: the first couple of sentences of a written section."""
+        sentences = re.split(r'(?<=[.!?])\s+', section_text.strip())
+        summary = " ".join(sentences[:2])
+        if len(summary) > max_chars:
+            summary = summary[:max_chars].rsplit(' ', 1)[0] + "..."
+        return summary
+
+    def _write_section(self, section_title, section_content, section_quality, body_summaries=None):
+        return self.model.invoke(self._section_prompt(section_title, section_content, section_quality, body_summaries)).content
 
-    def write_report(self, research_results, sources, quality_summary=None, skipped_info="", temperature=0.0):
+    async def _awrite_section(self, section_title, section_content, section_quality, body_summaries=None):
+        prompt = self._section_prompt(section_title, section_content, section_quality, body_summaries)
+        return (await self.model.ainvoke(prompt)).content
+
+    def _section_prompt(self, section_title, section_content, section_quality, body_summaries=None):
+        source_count = section_quality.get('source_count', 'unknown')
+        avg_relevance = section_quality.get('avg_relevance', 'unknown')
+        
+        quality_context = ""
+        if section_quality:
+            quality_context = f"\n\n**Quality Context:** This section is based on {source_count} sources with average relevance score of {avg_relevance:.2f}."
+
+        body_context = ""
+        if body_summaries:
+            summary_lines = "\n".join(f"- {title}: {summary}" for title, summary in body_summaries.items())
+            body_context = f"\n\n**Summaries of the Finished Body Sections:**\n{summary_lines}\n\nThis is a framing section: make sure it introduces or concludes the points above consistently."
+        
+        return dedent(f"""
+            You are an expert academic writer. Your task is to write a single, cohesive section of a larger report. The section you are writing is titled: **{section_title}**.
+
+            You must base your writing *entirely* on the provided research content for this section. Focus on creating a high-quality, academically rigorous section that synthesizes the available information effectively.
+
+            **Research Content for '{section_title}':**
+            {section_content}{quality_context}{body_context}
+
+            IMPORTANT GUIDELINES:
+            1. Write only content that is well-supported by the research
+            2. If the research content indicates limitations or gaps, acknowledge them appropriately
+            3. Focus on quality and accuracy over quantity
+            4. Maintain academic rigor and avoid speculation beyond what the sources support
+
+            Write a well-structured, analytical, and comprehensive section. Ensure the prose is continuous, with NO line breaks within paragraphs, and the tone is formal and academic. Do NOT add a title to the section, as it will be added later. When you use information from a source, simply mention the source number, like [Source 1], [Source 2], etc. The formatting of citations and the reference list will be handled by another agent.
+        """)
+
+    def write_report(self, research_results, sources, quality_summary=None, skipped_info="", temperature=0.0, outline=None):
         """Generates the full report from section-specific research with quality awareness.
+        Body sections are written concurrently; framing sections (introduction,
+        conclusion, ...) are written afterwards from summaries of the body.
+        Sections appear in outline order when an outline is given.
         Leaves specific APA formatting to the APAFormatterAgent.
         """
         if quality_summary is None:
             quality_summary = {}
-            
+
+        body_titles, framing_titles = self._schedule_sections(research_results)
+
+        def write(title, body_summaries=None):
+            return self._write_section(title, research_results[title], quality_summary.get(title, {}), body_summaries)
+
+        with ContextThreadPoolExecutor(max_workers=self.max_concurrent_sections) as executor:
+            written = dict(zip(body_titles, executor.map(write, body_titles)))
+            if framing_titles:
+                body_summaries = {title: self._summarize_section(written[title]) for title in body_titles}
+                written.update(zip(framing_titles, executor.map(lambda title: write(title, body_summaries), framing_titles)))
+
+        return self._assemble_report(research_results, written, skipped_info, outline)
+
+    async def awrite_report(self, research_results, sources, quality_summary=None, skipped_info="", temperature=0.0, outline=None):
+        """Async variant of write_report; concurrency is bounded by a semaphore instead of a thread pool."""
+        if quality_summary is None:
+            quality_summary = {}
+
+        body_titles, framing_titles = self._schedule_sections(research_results)
+        semaphore = asyncio.Semaphore(self.max_concurrent_sections)
+
+        async def write(title, body_summaries=None):
+            async with semaphore:
+                return await self._awrite_section(title, research_results[title], quality_summary.get(title, {}), body_summaries)
+
+        written = dict(zip(body_titles, await asyncio.gather(*(write(title) for title in body_titles))))
+        if framing_titles:
+            body_summaries = {title: self._summarize_section(written[title]) for title in body_titles}
+            framing_texts = await asyncio.gather(*(write(title, body_summaries) for title in framing_titles))
+            written.update(zip(framing_titles, framing_texts))
+
+        return self._assemble_report(research_results, written, skipped_info, outline)
+
+    def _schedule_sections(self, research_results):
+        """Split sections into (body, framing) writing rounds."""
+        section_titles = list(research_results)
+        framing_titles = [title for title in section_titles if self._is_framing_section(title)]
+        body_titles = [title for title in section_titles if title not in framing_titles]
+        if not body_titles:
+            # Nothing to frame, so write everything in a single round
+            return section_titles, []
+        return body_titles, framing_titles
+
+    def _assemble_report(self, research_results, written, skipped_info, outline=None):
         report_sections = []
         
         # Add quality context if there are skipped sections
         if skipped_info:
             report_sections.append(f"**Research Methodology Note:** This report focuses on sections where sufficient high-quality, topic-relevant sources were available. Some planned sections were excluded due to insufficient research materials.{skipped_info}")
-        
-        for section_title, section_content in research_results.items():
-            # Get quality metrics for this section
-            section_quality = quality_summary.get(section_title, {})
-            source_count = section_quality.get('source_count', 'unknown')
-            avg_relevance = section_quality.get('avg_relevance', 'unknown')
-            
-            quality_context = ""
-            if section_quality:
-                quality_context = f"\n\n**Quality Context:** This section is based on {source_count} sources with average relevance score of {avg_relevance:.2f}."
-            
-            prompt = dedent(f"""
-                You are an expert academic writer. Your task is to write a single, cohesive section of a larger report. The section you are writing is titled: **{section_title}**.
-
-                You must base your writing *entirely* on the provided research content for this section. Focus on creating a high-quality, academically rigorous section that synthesizes the available information effectively.
-
-                **Research Content for '{section_title}':**
-                {section_content}{quality_context}
-
-                IMPORTANT GUIDELINES:
-                1. Write only content that is well-supported by the research
-                2. If the research content indicates limitations or gaps, acknowledge them appropriately
-                3. Focus on quality and accuracy over quantity
-                4. Maintain academic rigor and avoid speculation beyond what the sources support
-
-                Write a well-structured, analytical, and comprehensive section. Ensure the prose is continuous, with NO line breaks within paragraphs, and the tone is formal and academic. Do NOT add a title to the section, as it will be added later. When you use information from a source, simply mention the source number, like [Source 1], [Source 2], etc. The formatting of citations and the reference list will be handled by another agent.
-            """)
-            
-            section_text = self.model.invoke(prompt).content
-            report_sections.append(f"## {section_title}\n\n{section_text}")
+
+        # Assemble in outline order regardless of completion or research order
+        ordered = [title for title in outline or [] if title in written]
+        ordered += [title for title in research_results if title not in ordered]
+        for section_title in ordered:
+            report_sections.append(f"## {section_title}\n\n{written[section_title]}")
 
         return "\n\n".join(report_sections)
 
     def refine_report(self, report, critique, sources):
         """Refines the full report based on feedback.
-        This is a simplified refinement process. A more advanced implementation would
-        map the critique to specific sections and refine them individually.
+        Used when the report has no section headings to scope a revision to;
+        see revise_report for section-scoped revisions.
         """
-        prompt = dedent(f"""
+        revised_content = self.model.invoke(self._refine_prompt(report, critique)).content
+        return revised_content
+
+    async def arefine_report(self, report, critique, sources):
+        return (await self.model.ainvoke(self._refine_prompt(report, critique))).content
+
+    def _refine_prompt(self, report, critique):
+        return dedent(f"""
             You are an expert academic writer. You have received the following critique on your report. Please revise the full report to address the feedback.
 
             **Original Report:**
@@ -67,6 +157,144 @@ class WriterAgent:
 
             Revise the report to improve its clarity, argumentation, and style. Ensure the prose is continuous, with NO line breaks within paragraphs, and the tone is formal and academic. When you use information from a source, simply mention the source number, like [Source 1], [Source 2], etc. The formatting of citations and the reference list will be handled by another agent.
         """)
-        
-        revised_content = self.model.invoke(prompt).content
-        return revised_content
+
+    def split_sections(self, report):
+        """Split a report into (preamble, [(title, chunk), ...]) so that joining the parts rebuilds it exactly."""
+        headings = list(SECTION_HEADING_PATTERN.finditer(report))
+        if not headings:
+            return report, []
+        bounds = [m.start() for m in headings] + [len(report)]
+        sections = [(m.group(1).strip(), report[bounds[i]:bounds[i + 1]]) for i, m in enumerate(headings)]
+        return report[:bounds[0]], sections
+
+    def sections_at_offsets(self, report, offsets):
+        """Titles of the sections containing the given character offsets, in report order."""
+        preamble, sections = self.split_sections(report)
+        titles, position = [], len(preamble)
+        for title, chunk in sections:
+            if any(position <= offset < position + len(chunk) for offset in offsets):
+                titles.append(title)
+            position += len(chunk)
+        return titles
+
+    def sections_containing(self, report, snippets):
+        """Titles of the sections whose text contains any of the snippets, in report order."""
+        _, sections = self.split_sections(report)
+        return [title for title, chunk in sections if any(snippet and snippet in chunk for snippet in snippets)]
+
+    def revise_report(self, report, critique, target_sections=None):
+        """Revise only the sections the critique applies to; all other sections are kept byte for byte."""
+        preamble, sections = self.split_sections(report)
+        if not sections:
+            return self.refine_report(report, critique, None)
+        targets = self._revision_targets(critique, sections, target_sections)
+        print(f"✏️  Revising {len(targets)}/{len(sections)} sections: {targets}")
+
+        chunks = dict(sections)
+        with ContextThreadPoolExecutor(max_workers=self.max_concurrent_sections) as executor:
+            bodies = executor.map(lambda title: self._revise_section(title, chunks[title], sections, critique), targets)
+            revised = dict(zip(targets, bodies))
+        return self._replace_sections(preamble, sections, revised)
+
+    async def arevise_report(self, report, critique, target_sections=None):
+        preamble, sections = self.split_sections(report)
+        if not sections:
+            return await self.arefine_report(report, critique, None)
+        targets = await self._arevision_targets(critique, sections, target_sections)
+        print(f"✏️  Revising {len(targets)}/{len(sections)} sections: {targets}")
+
+        chunks = dict(sections)
+        semaphore = asyncio.Semaphore(self.max_concurrent_sections)
+
+        async def revise(title):
+            async with semaphore:
+                return await self._arevise_section(title, chunks[title], sections, critique)
+
+        revised = dict(zip(targets, await asyncio.gather(*(revise(title) for title in targets))))
+        return self._replace_sections(preamble, sections, revised)
+
+    def _revision_targets(self, critique, sections, target_sections=None):
+        targets = self._known_targets(critique, sections, target_sections)
+        if targets:
+            return targets
+        try:
+            return self._parse_routed_sections(self.router_model.invoke(self._routing_prompt(critique, sections)).content, sections)
+        except Exception as e:
+            print(f"Error routing critique to sections: {e}")
+            return [title for title, _ in sections]
+
+    async def _arevision_targets(self, critique, sections, target_sections=None):
+        targets = self._known_targets(critique, sections, target_sections)
+        if targets:
+            return targets
+        try:
+            response = await self.router_model.ainvoke(self._routing_prompt(critique, sections))
+            return self._parse_routed_sections(response.content, sections)
+        except Exception as e:
+            print(f"Error routing critique to sections: {e}")
+            return [title for title, _ in sections]
+
+    def _known_targets(self, critique, sections, target_sections=None):
+        """Sections attributed by the gate, else sections the critique names; [] if neither."""
+        titles = [title for title, _ in sections]
+        if target_sections:
+            targets = [title for title in titles if title in target_sections]
+            if targets:
+                return targets
+        lowered = critique.lower()
+        return [title for title in titles if title.lower() in lowered]
+
+    def _parse_routed_sections(self, content, sections):
+        """Map the router's list of section numbers to titles; an empty or unreadable answer means every section."""
+        titles = [title for title, _ in sections]
+        match = re.search(r'\[[\d\s,]*\]', content)
+        numbers = json.loads(match.group(0)) if match else []
+        targets = [titles[n - 1] for n in sorted(set(numbers)) if 1 <= n <= len(titles)]
+        return targets or titles
+
+    def _routing_prompt(self, critique, sections):
+        section_list = "\n".join(f"{i + 1}. {title}" for i, (title, _) in enumerate(sections))
+        return dedent(f"""
+            A report with the following sections received a critique.
+
+            **Sections:**
+            {section_list}
+
+            **Critique:**
+            {critique}
+
+            Which sections must be rewritten to address the critique? Respond with only a JSON list of section numbers, for example [2, 4]. Respond with [] if the critique applies to the whole report.
+        """)
+
+    def _revise_section(self, title, chunk, sections, critique):
+        return self.model.invoke(self._revise_section_prompt(title, chunk, sections, critique)).content
+
+    async def _arevise_section(self, title, chunk, sections, critique):
+        return (await self.model.ainvoke(self._revise_section_prompt(title, chunk, sections, critique))).content
+
+    def _section_body(self, chunk):
+        return SECTION_HEADING_PATTERN.sub('', chunk, count=1).strip()
+
+    def _revise_section_prompt(self, title, chunk, sections, critique):
+        other_titles = ", ".join(t for t, _ in sections if t != title)
+        return dedent(f"""
+            You are an expert academic writer. A report you wrote received the critique below. You are revising only its section titled: **{title}**. The other sections ({other_titles}) are not changing.
+
+            **Current Text of '{title}':**
+            {self._section_body(chunk)}
+
+            **Critique of the Report:**
+            {critique}
+
+            Rewrite this section to address the parts of the critique that concern it, and keep everything else about it intact. Ensure the prose is continuous, with NO line breaks within paragraphs, and the tone is formal and academic. Do NOT add a title to the section. Keep the existing source references like [Source 1], [Source 2], etc.; the formatting of citations and the reference list will be handled by another agent.
+        """)
+
+    def _replace_sections(self, preamble, sections, revised):
+        parts = [preamble]
+        for title, chunk in sections:
+            if title in revised:
+                # Keep the separator that followed the original section
+                trailing = chunk[len(chunk.rstrip()):]
+                chunk = f"## {title}\n\n{revised[title].strip()}{trailing}"
+            parts.append(chunk)
+        return "".join(parts)
@@ -0,0 +1,131 @@
+"""
+Content-addressed store for the large text payloads of a run.
+
+Abstracts, research notes and report drafts are written once to a local directory under
+the SHA-256 of their content, and AgentState holds compact "artifact:sha256:<hex>"
+references in their place. Checkpoints and state transitions then copy a short string per
+payload, identical payloads (an abstract found by several sections, an unchanged draft)
+are stored once, and text is read back only by the nodes that need it, through a
+size-bounded in-memory cache.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+REF_PREFIX = "artifact:sha256:"
+# References inside serialized state, such as stored checkpoints
+REF_PATTERN = re.compile(rb"artifact:sha256:([0-9a-f]{64})")
+DEFAULT_ARTIFACT_DIR = os.path.join(".checkpoints", "artifacts")
+
+def is_ref(value):
+    return isinstance(value, str) and len(value) == len(REF_PREFIX) + 64 and value.startswith(REF_PREFIX)
+
+class ArtifactStore:
+    """Text payloads on disk keyed by content hash, with references that resolve lazily.
+
+    Text shorter than min_size is kept inline, since a reference would not be much smaller.
+    A disabled store stores nothing but still resolves references written earlier, so
+    checkpoints of runs that used the store can be resumed either way.
+    """
+
+    def __init__(self, directory=DEFAULT_ARTIFACT_DIR, enabled=True, min_size=512, cache_bytes=32 * 1024 * 1024,
+                 compression_level=6):
+        self.directory = directory
+        self.enabled = enabled
+        self.min_size = min_size
+        self.cache_bytes = cache_bytes
+        self.compression_level = compression_level
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _remember(self, digest, text):
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return
+            self._cache[digest] = text
+            self._cached_bytes += len(text)
+            while self._cached_bytes > self.cache_bytes and len(self._cache) > 1:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted)
+
+    def put(self, text):
+        """Store text and return its reference; short text, non-text and references come back as is."""
+        if not self.enabled or not isinstance(text, str) or len(text) < self.min_size or is_ref(text):
+            return text
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if os.path.exists(path):
+            # Refreshed so payloads of live runs are not pruned
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(zlib.compress(data, self.compression_level))
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        self._remember(digest, text)
+        return REF_PREFIX + digest
+
+    def get(self, value):
+        """Text a reference points to; anything that is not a reference is returned as is."""
+        if not is_ref(value):
+            return value
+        digest = value[len(REF_PREFIX):]
+        with self._lock:
+            text = self._cache.get(digest)
+        if text is not None:
+            self._remember(digest, text)
+            return text
+        try:
+            with open(self._path(digest), "rb") as f:
+                text = zlib.decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            raise KeyError(f"Artifact {value} is missing from {self.directory}") from None
+        self._remember(digest, text)
+        return text
+
+    def prune(self, max_age_seconds, referenced=None):
+        """Delete payloads not stored or re-stored within max_age_seconds; returns how many were deleted.
+
+        referenced, if given, returns the digests still in use (by checkpoints of runs that may
+        be resumed); it is only called once there is something old enough to delete.
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+        cutoff = time.time() - max_age_seconds
+        stale = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        stale.append((name, path))
+                except FileNotFoundError:
+                    continue
+        keep = referenced() if stale and referenced else set()
+        deleted = 0
+        for digest, path in stale:
+            if digest in keep:
+                continue
+            try:
+                os.remove(path)
+                deleted += 1
+            except FileNotFoundError:
+                continue
+        return deleted
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Generate reports for many topics concurrently in one process.
+
+Topics are read from a JSONL file (objects with a "topic" and optional "id") or a
+plain text file with one topic per line. All topics share one ReportWorkflow, so
+they reuse its model clients and retriever cache, and in-flight LLM and search
+requests are capped process-wide. A manifest with per-topic status and timings is
+written next to the reports.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from main import ReportWorkflow
+from utils import configure_request_limits
+
+def load_topics(path):
+    """Read batch entries as dicts with "topic" and "id" keys."""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if path.endswith(".jsonl"):
+                record = json.loads(line)
+                entries.append({"topic": record["topic"], "id": record.get("id")})
+            else:
+                entries.append({"topic": line, "id": None})
+    ids = [entry["id"] for entry in entries if entry["id"]]
+    if len(ids) != len(set(ids)):
+        # Entries with one id would share checkpoints and a report file
+        raise ValueError(f"Duplicate ids in {path}: {sorted({i for i in ids if ids.count(i) > 1})}")
+    return entries
+
+async def run_topic(workflow, entry, slots):
+    workflow_id = entry["id"] or f"batch_{uuid.uuid4().hex[:12]}"
+    result = {"topic": entry["topic"], "workflow_id": workflow_id}
+    async with slots:
+        started = time.time()
+        result["started_at"] = started
+        try:
+            report = await workflow.arun(entry["topic"], workflow_id=workflow_id)
+            result["status"] = "completed" if report != "No report generated." else "no_report"
+            result["report_path"] = workflow.report_path(entry["topic"], workflow_id) if result["status"] == "completed" else None
+        except Exception as e:
+            # Keep going with the rest of the batch; checkpointed runs can be resumed by workflow_id
+            result["status"] = "failed"
+            result["error"] = f"{type(e).__name__}: {e}"
+            print(f"---BATCH TOPIC FAILED: {entry['topic']} ({result['error']})---")
+        result["duration_seconds"] = round(time.time() - started, 3)
+    return result
+
+async def run_batch(workflow, entries, max_concurrent_reports):
+    slots = asyncio.Semaphore(max_concurrent_reports)
+    return await asyncio.gather(*(run_topic(workflow, entry, slots) for entry in entries))
+
+def write_manifest(path, results, started, finished):
+    manifest = {
+        "started_at": started,
+        "finished_at": finished,
+        "duration_seconds": round(finished - started, 3),
+        "completed": sum(1 for r in results if r["status"] == "completed"),
+        "failed": sum(1 for r in results if r["status"] == "failed"),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate reports for a file of topics.")
+    parser.add_argument("topics_file", help="JSONL file of {\"topic\": ...} objects or a text file with one topic per line.")
+    parser.add_argument("--output-dir", default="reports", help="Directory for the reports and the manifest.")
+    parser.add_argument("--manifest", help="Manifest path (default: <output-dir>/batch_manifest.json).")
+    parser.add_argument("--max-concurrent-reports", type=int, help="Topics processed at the same time.")
+    parser.add_argument("--max-llm-requests", type=int, help="Global cap on in-flight LLM calls.")
+    parser.add_argument("--max-search-requests", type=int, help="Global cap on in-flight search and HTTP requests.")
+    args = parser.parse_args()
+
+    entries = load_topics(args.topics_file)
+    os.makedirs(args.output_dir, exist_ok=True)
+    workflow = ReportWorkflow(output_dir=args.output_dir)
+    get_setting = workflow.quality_pipeline.get_setting
+    configure_request_limits(
+        max_llm_requests=args.max_llm_requests or get_setting('performance.max_concurrent_llm_requests', 16),
+        max_search_requests=args.max_search_requests or get_setting('performance.max_concurrent_search_requests', 8),
+    )
+    max_concurrent_reports = args.max_concurrent_reports or get_setting('performance.max_concurrent_reports', 4)
+
+    print(f"---BATCH: {len(entries)} TOPICS, {max_concurrent_reports} AT A TIME---")
+    started = time.time()
+    results = asyncio.run(run_batch(workflow, entries, max_concurrent_reports))
+    manifest_path = args.manifest or os.path.join(args.output_dir, "batch_manifest.json")
+    manifest = write_manifest(manifest_path, results, started, time.time())
+    print(f"---BATCH DONE: {manifest['completed']} completed, {manifest['failed']} failed in "
+          f"{manifest['duration_seconds']:.1f}s; manifest at {manifest_path}---")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of ReportWorkflow against stubbed model and search backends.
+
+Every fixture topic is run at every outline size (benchmarks/fixtures/e2e_scenarios.json),
+each in a fresh subprocess so peak RSS and module-level caches are per scenario. Models
+come from the stub backend (LLM_BACKEND=stub) and Redis, Tavily and HTTP from
+benchmarks/stub_services, so no network or API keys are needed. For each scenario the
+benchmark records wall time, time per graph node, LLM calls per role, peak RSS and cache
+hit rates, compares them with the stored baseline and exits non-zero on regressions.
+
+Run from the gemini_report_writer directory:
+
+    python -m benchmarks.e2e                    # run and compare with the baseline
+    python -m benchmarks.e2e --update-baseline  # record a new baseline
+    python -m benchmarks.e2e --only wages-5 --async --latency 0.05
+
+Per-run budgets are lifted so large outlines measure the full pipeline. Timing baselines
+are machine specific; record them on the machine that runs the comparison.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(BENCHMARK_DIR)
+SCENARIOS_PATH = os.path.join(BENCHMARK_DIR, "fixtures", "e2e_scenarios.json")
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baselines", "e2e.json")
+RESULT_MARKER = "BENCHMARK_RESULT "
+
+# Timing differences below this many seconds are treated as noise
+MIN_TIME_DELTA = 0.05
+# Allowed drop in a cache hit rate before it counts as a regression
+HIT_RATE_TOLERANCE = 0.05
+
+def load_scenarios(path=SCENARIOS_PATH):
+    """Scenario name -> {"topic", "sections"} for every fixture topic at every outline size."""
+    with open(path, encoding="utf-8") as f:
+        fixtures = json.load(f)
+    return {
+        f"{topic_id}-{sections}": {"topic": topic, "sections": sections}
+        for topic_id, topic in fixtures["topics"].items()
+        for sections in fixtures["outline_sections"]
+    }
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def _node_times(tracer):
+    times = {}
+    for span in tracer.spans:
+        if span["category"] == "node":
+            entry = times.setdefault(span["name"], {"count": 0, "seconds": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += span["end"] - span["start"]
+    return {name: dict(entry, seconds=round(entry["seconds"], 4)) for name, entry in sorted(times.items())}
+
+def _llm_calls(tracer):
+    calls = {}
+    for span in tracer.spans:
+        if span["category"] == "llm":
+            role = span["args"].get("role")
+            calls[role] = calls.get(role, 0) + 1
+    return dict(sorted(calls.items()))
+
+def run_scenario(name, scenario, use_async=False, latency=0.0):
+    """Run one scenario in this process and return its measurements."""
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["STUB_LLM_OUTLINE_SECTIONS"] = str(scenario["sections"])
+    os.environ["STUB_LLM_LATENCY"] = str(latency)
+    sys.path.insert(0, PACKAGE_DIR)
+    import budget
+    import tracing
+    from benchmarks import stub_services
+    from main import ReportWorkflow
+
+    with stub_services.install(latency=latency), tempfile.TemporaryDirectory() as workdir:
+        # Checkpoints and reports go to a scratch directory
+        os.chdir(workdir)
+        workflow = ReportWorkflow(output_dir=workdir)
+        workflow.budget_limits = budget.BudgetLimits()
+        workflow_id = f"bench_{name}"
+        with tracing.trace(workflow_id) as tracer, contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            if use_async:
+                asyncio.run(workflow.arun(scenario["topic"], workflow_id=workflow_id))
+            else:
+                workflow.run(scenario["topic"], workflow_id=workflow_id)
+            wall_seconds = time.perf_counter() - start
+        caches = stub_services.cache_stats()
+        if workflow.llm_cache:
+            caches["llm_cache"] = workflow.llm_cache.hit_rates()["all"]
+
+    llm_calls = _llm_calls(tracer)
+    return {
+        "topic": scenario["topic"],
+        "sections": scenario["sections"],
+        "mode": "async" if use_async else "sync",
+        "wall_seconds": round(wall_seconds, 4),
+        "node_seconds": _node_times(tracer),
+        "llm_calls": llm_calls,
+        "llm_calls_total": sum(llm_calls.values()),
+        "peak_rss_mb": _peak_rss_mb(),
+        "cache_hit_rates": {cache: stats["hit_rate"] for cache, stats in caches.items()},
+    }
+
+def run_in_subprocess(name, use_async=False, latency=0.0):
+    command = [sys.executable, "-m", "benchmarks.e2e", "--run-scenario", name, "--latency", str(latency)]
+    if use_async:
+        command.append("--async")
+    completed = subprocess.run(command, cwd=PACKAGE_DIR, capture_output=True, text=True)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    raise RuntimeError(f"Scenario {name} failed:\n{completed.stderr[-4000:]}")
+
+def _slower(value, baseline, tolerance):
+    return value > baseline * (1 + tolerance) + MIN_TIME_DELTA
+
+def find_regressions(results, baseline, time_tolerance=0.5, rss_tolerance=0.25):
+    """Human-readable regressions of results against the baseline; scenarios missing from it are skipped.
+
+    The baseline holds results per mode: {"sync": {scenario: result}, "async": {...}}.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(result["mode"], {}).get(name)
+        if not base:
+            continue
+        if _slower(result["wall_seconds"], base["wall_seconds"], time_tolerance):
+            regressions.append(f"{name}: wall time {result['wall_seconds']:.2f}s vs {base['wall_seconds']:.2f}s")
+        for node, timing in result["node_seconds"].items():
+            base_timing = base["node_seconds"].get(node)
+            if base_timing and _slower(timing["seconds"], base_timing["seconds"], time_tolerance):
+                regressions.append(f"{name}: node {node} {timing['seconds']:.2f}s vs {base_timing['seconds']:.2f}s")
+        for role, calls in result["llm_calls"].items():
+            if calls > base["llm_calls"].get(role, 0):
+                regressions.append(f"{name}: {role} made {calls} LLM calls vs {base['llm_calls'].get(role, 0)}")
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + rss_tolerance):
+            regressions.append(f"{name}: peak RSS {result['peak_rss_mb']:.0f} MB vs {base['peak_rss_mb']:.0f} MB")
+        for cache, rate in result["cache_hit_rates"].items():
+            base_rate = base["cache_hit_rates"].get(cache)
+            if rate is not None and base_rate is not None and rate < base_rate - HIT_RATE_TOLERANCE:
+                regressions.append(f"{name}: {cache} hit rate {rate:.0%} vs {base_rate:.0%}")
+    return regressions
+
+def print_results(results):
+    print(f"{'scenario':<14} {'mode':<6} {'wall s':>8} {'llm calls':>10} {'rss MB':>8}  cache hit rates")
+    for name, result in results.items():
+        rates = ", ".join(f"{cache} {rate:.0%}" for cache, rate in result["cache_hit_rates"].items() if rate is not None)
+        print(f"{name:<14} {result['mode']:<6} {result['wall_seconds']:>8.2f} {result['llm_calls_total']:>10} "
+              f"{result['peak_rss_mb']:>8.1f}  {rates}")
+        slowest = sorted(result["node_seconds"].items(), key=lambda item: -item[1]["seconds"])[:3]
+        print("    slowest nodes: " + ", ".join(f"{node} {t['seconds']:.2f}s/{t['count']}" for node, t in slowest))
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the report pipeline on stubbed backends.")
+    parser.add_argument("--only", nargs="+", metavar="SCENARIO", help="Run only these scenarios (e.g. wages-5).")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Benchmark ReportWorkflow.arun.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Synthetic seconds per model and search call.")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON to compare with or update.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    parser.add_argument("--time-tolerance", type=float, default=0.5, help="Allowed relative slowdown (default 0.5).")
+    parser.add_argument("--rss-tolerance", type=float, default=0.25, help="Allowed relative peak RSS growth (default 0.25).")
+    parser.add_argument("--run-scenario", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    scenarios = load_scenarios()
+    if args.run_scenario:
+        result = run_scenario(args.run_scenario, scenarios[args.run_scenario], args.use_async, args.latency)
+        print(RESULT_MARKER + json.dumps(result))
+        return 0
+
+    names = args.only or list(scenarios)
+    unknown = [name for name in names if name not in scenarios]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}; available: {', '.join(scenarios)}")
+    results = {}
+    for name in names:
+        print(f"---BENCHMARKING {name}---", flush=True)
+        results[name] = run_in_subprocess(name, args.use_async, args.latency)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.setdefault("async" if args.use_async else "sync", {}).update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"---BASELINE UPDATED: {args.baseline}---")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one.")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = find_regressions(results, json.load(f), args.time_tolerance, args.rss_tolerance)
+    for regression in regressions:
+        print(f"❌ REGRESSION {regression}")
+    if not regressions:
+        print("✓ No regressions against the baseline")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
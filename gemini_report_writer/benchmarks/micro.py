@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks of the pure-Python hot paths whose cost grows with the data.
+
+Each benchmark runs one function on synthetic inputs at several sizes, from small up to
+10k sources and 500 KB reports, and records calls per second and the peak memory one
+call allocates (tracemalloc). From consecutive sizes it estimates how the time per call
+scales with the input (1.0 is linear, 2.0 quadratic), so quadratic behavior shows up
+here before it shows up in batch runs. Results are compared with the stored baseline;
+the run exits non-zero when a function got slower, allocates more, or scales worse.
+
+Run from the gemini_report_writer directory:
+
+    python -m benchmarks.micro                    # run and compare with the baseline
+    python -m benchmarks.micro --update-baseline  # record a new baseline
+    python -m benchmarks.micro --only extract_all_citations --quick
+
+Models are built on the stub backend but never called. Timing baselines are machine
+specific; record them on the machine that runs the comparison.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(BENCHMARK_DIR)
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baselines", "micro.json")
+
+# Scaling exponents above this are reported as superlinear
+MAX_EXPONENT = 1.5
+# Allowed growth of a scaling exponent over its baseline before it counts as a regression
+EXPONENT_TOLERANCE = 0.3
+# Per-call timings below this many seconds are too noisy to compare
+MIN_CALL_SECONDS = 1e-4
+
+WORDS = (
+    "household income shocks monetary policy labor market inflation expectations credit constraints "
+    "consumption smoothing fiscal transfers wage growth productivity employment savings investment risk "
+    "however furthermore moreover therefore evidence analysis research study"
+).split()
+SURNAMES = "Smith Garcia Chen Okafor Novak Tanaka Silva Müller Haddad Kowalski Ivanova Moreau".split()
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def make_work(rng, abstract_words=150):
+    """One OpenAlex work as returned by the /works endpoint."""
+    inverted = {}
+    for position, word in enumerate(_text(rng, abstract_words).split()):
+        inverted.setdefault(word, []).append(position)
+    return {
+        "id": f"https://openalex.org/W{rng.randint(10**6, 10**7)}",
+        "title": _text(rng, 8).capitalize(),
+        "doi": f"https://doi.org/10.{rng.randint(1000, 9999)}/{rng.getrandbits(40):x}",
+        "abstract_inverted_index": inverted,
+        "authorships": [{"display_name": f"{rng.choice('ABCDEFGH')}. {rng.choice(SURNAMES)}"} for _ in range(rng.randint(1, 4))],
+        "publication_year": rng.randint(2005, 2024),
+        "cited_by_count": rng.randint(0, 500),
+        "primary_location": {"source": {"display_name": "Journal of Synthetic Economics"}},
+        "biblio": {"first_page": "1", "last_page": str(rng.randint(10, 40))},
+    }
+
+def make_sources(count, seed=0):
+    """count distinct sources shaped like the retriever's output."""
+    rng = random.Random(seed)
+    sources = []
+    for i in range(count):
+        sources.append({
+            "title": f"{_text(rng, 6).capitalize()} {i}",
+            "abstract": _text(rng, 60),
+            "doi": f"10.{rng.randint(1000, 9999)}/{i:x}",
+            "source": "OpenAlex",
+            "authors": [f"{rng.choice('ABCDEFGH')}. {rng.choice(SURNAMES)}" for _ in range(rng.randint(1, 4))],
+            "year": rng.randint(2005, 2024),
+            "journal": "Journal of Synthetic Economics",
+            "citations": rng.randint(0, 500),
+            "url": f"https://openalex.org/W{i}",
+            "relevance_score": round(rng.random(), 2),
+        })
+    return sources
+
+def make_report(size_bytes, source_count, seed=0):
+    """A report of about size_bytes with [Source N] placeholders, inline citations and DOIs."""
+    rng = random.Random(seed)
+    paragraphs, size = [], 0
+    while size < size_bytes:
+        sentences = []
+        for _ in range(rng.randint(3, 6)):
+            sentence = _text(rng, rng.randint(10, 25)).capitalize()
+            marker = rng.random()
+            if marker < 0.4 and source_count:
+                sentence += f" [Source {rng.randint(1, source_count)}]"
+            elif marker < 0.6:
+                sentence += f" ({rng.choice(SURNAMES)}, {rng.randint(2005, 2024)})"
+            elif marker < 0.65:
+                sentence += f" (doi 10.{rng.randint(1000, 9999)}/{rng.getrandbits(32):x})"
+            sentences.append(sentence + ".")
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+def make_outline(sections, seed=0):
+    rng = random.Random(seed)
+    return [f"{i + 1}. {_text(rng, 4).title()}" for i in range(sections)]
+
+def _agents():
+    os.environ["LLM_BACKEND"] = "stub"
+    sys.path.insert(0, PACKAGE_DIR)
+    from agents.apa_formatter import APAFormatterAgent
+    from agents.citation_verifier import CitationVerifierAgent
+    from agents.quality_pipeline import QualityValidationPipeline
+    from agents.retriever import RetrieverAgent
+    # The retriever's parsing needs no Redis or search clients
+    return {
+        "retriever": RetrieverAgent.__new__(RetrieverAgent),
+        "formatter": APAFormatterAgent(),
+        "verifier": CitationVerifierAgent(),
+        "pipeline": QualityValidationPipeline(),
+    }
+
+def _merge_fanout(sources, batch=50):
+    from main import merge_sources
+    import source_registry
+    merged = []
+    # As in a workflow run, where the reducer grows the run's registry
+    with source_registry.use():
+        for start in range(0, len(sources), batch):
+            merged = merge_sources(merged, sources[start:start + batch])
+    return merged
+
+def benchmarks():
+    """Benchmark name -> (sizes, unit, setup); setup(agents, size) returns the call to time."""
+    def reconstruct_abstract(agents, words):
+        index = make_work(random.Random(words), abstract_words=words)["abstract_inverted_index"]
+        return lambda: agents["retriever"]._reconstruct_abstract(index)
+
+    def parse_openalex_results(agents, works):
+        rng = random.Random(works)
+        data = {"results": [make_work(rng) for _ in range(works)]}
+        return lambda: agents["retriever"]._parse_openalex_results(data, works)
+
+    def merge_sources(agents, count):
+        # Research fan-out: every section's sources are merged into the running list
+        sources = make_sources(count)
+        return lambda: _merge_fanout(sources)
+
+    def format_report(agents, kb):
+        # Every source has a title, so no model call is made
+        sources = make_sources(kb * 2)
+        report = make_report(kb * 1024, len(sources))
+        return lambda: agents["formatter"].format_report(report, sources)
+
+    def extract_all_citations(agents, kb):
+        report = make_report(kb * 1024, kb * 2)
+        return lambda: agents["verifier"].extract_all_citations(report)
+
+    def quality_content_heuristics(agents, kb):
+        # Outlines grow with the report, one section per 10 KB
+        pipeline = agents["pipeline"]
+        report, outline = make_report(kb * 1024, 0), make_outline(max(5, kb // 10))
+        def run():
+            pipeline._assess_content_outline_alignment(report, outline)
+            pipeline._assess_narrative_flow(report)
+            pipeline._assess_argument_consistency(report)
+            pipeline._analyze_section_coverage(report, outline)
+        return run
+
+    def quality_source_heuristics(agents, count):
+        pipeline = agents["pipeline"]
+        sources = make_sources(count)
+        research = {f"Section {i}": {"content": source["abstract"]} for i, source in enumerate(sources)}
+        def run():
+            pipeline._assess_source_quality(sources)
+            pipeline._assess_research_depth(research)
+            pipeline._calculate_avg_content_length(research)
+        return run
+
+    return {
+        "reconstruct_abstract": ([100, 1000, 10000], "words", reconstruct_abstract),
+        "parse_openalex_results": ([10, 100, 1000, 10000], "works", parse_openalex_results),
+        "merge_sources": ([100, 1000, 10000], "sources", merge_sources),
+        "format_report": ([5, 50, 500], "KB", format_report),
+        "extract_all_citations": ([5, 50, 500], "KB", extract_all_citations),
+        "quality_content_heuristics": ([5, 50, 500], "KB", quality_content_heuristics),
+        "quality_source_heuristics": ([100, 1000, 10000], "sources", quality_source_heuristics),
+    }
+
+def measure(call, min_time=0.2, min_calls=3):
+    """Seconds per call over at least min_time seconds, and the peak KB allocated by one call.
+
+    A warm-up call that alone takes min_time is used as the only sample.
+    """
+    start = time.perf_counter()
+    call()
+    calls, elapsed = 1, time.perf_counter() - start
+    if elapsed < min_time:
+        calls, start = 0, time.perf_counter()
+        while True:
+            call()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if calls >= min_calls and elapsed >= min_time:
+                break
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds_per_op": float(f"{elapsed / calls:.4g}"),
+        "ops_per_sec": float(f"{calls / elapsed:.4g}"),
+        "peak_alloc_kb": round(peak / 1024, 1),
+    }
+
+def scaling_exponent(sizes, seconds):
+    """Largest log-log slope of seconds per call between consecutive sizes (1.0 linear, 2.0 quadratic).
+
+    Steps where both timings are below MIN_CALL_SECONDS are skipped as noise; None if none remain.
+    """
+    slopes = [
+        math.log(t2 / t1) / math.log(n2 / n1)
+        for (n1, t1), (n2, t2) in zip(zip(sizes, seconds), zip(sizes[1:], seconds[1:]))
+        if t2 >= MIN_CALL_SECONDS and t1 > 0
+    ]
+    return round(max(slopes), 2) if slopes else None
+
+def run_benchmark(agents, name, quick=False, min_time=0.2):
+    sizes, unit, setup = benchmarks()[name]
+    if quick:
+        sizes = sizes[:-1]
+    runs = {}
+    for size in sizes:
+        runs[str(size)] = measure(setup(agents, size), min_time=min_time)
+    seconds = [runs[str(size)]["seconds_per_op"] for size in sizes]
+    return {"unit": unit, "sizes": runs, "scaling_exponent": scaling_exponent(sizes, seconds)}
+
+def find_regressions(results, baseline, time_tolerance=0.5, alloc_tolerance=0.25):
+    """Human-readable regressions of results against the baseline; benchmarks and sizes missing from it are skipped."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for size, run in result["sizes"].items():
+            base_run = base["sizes"].get(size)
+            if not base_run:
+                continue
+            seconds, base_seconds = run["seconds_per_op"], base_run["seconds_per_op"]
+            if seconds > base_seconds * (1 + time_tolerance) and seconds >= MIN_CALL_SECONDS:
+                regressions.append(f"{name}@{size}: {run['ops_per_sec']:.1f} ops/s vs {base_run['ops_per_sec']:.1f}")
+            if run["peak_alloc_kb"] > base_run["peak_alloc_kb"] * (1 + alloc_tolerance) + 64:
+                regressions.append(f"{name}@{size}: peak alloc {run['peak_alloc_kb']:.0f} KB vs {base_run['peak_alloc_kb']:.0f} KB")
+        exponent, base_exponent = result["scaling_exponent"], base.get("scaling_exponent")
+        if exponent is not None and exponent > MAX_EXPONENT and (base_exponent is None or exponent > base_exponent + EXPONENT_TOLERANCE):
+            regressions.append(f"{name}: scales as n^{exponent} vs n^{base_exponent}")
+    return regressions
+
+def print_results(results):
+    print(f"{'benchmark':<28} {'size':>10} {'ops/s':>12} {'ms/op':>10} {'peak KB':>10}")
+    for name, result in results.items():
+        for size, run in result["sizes"].items():
+            print(f"{name:<28} {size + ' ' + result['unit']:>10} {run['ops_per_sec']:>12.1f} "
+                  f"{run['seconds_per_op'] * 1000:>10.3f} {run['peak_alloc_kb']:>10.1f}")
+        exponent = result["scaling_exponent"]
+        if exponent is not None:
+            flag = "  ⚠ superlinear" if exponent > MAX_EXPONENT else ""
+            print(f"{'':<28} scales as n^{exponent}{flag}")
+
+def main():
+    available = benchmarks()
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the pure-Python hot paths.")
+    parser.add_argument("--only", nargs="+", metavar="BENCHMARK", help="Run only these benchmarks.")
+    parser.add_argument("--quick", action="store_true", help="Skip the largest input size.")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds to time each size for (default 0.2).")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON to compare with or update.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    parser.add_argument("--time-tolerance", type=float, default=0.5, help="Allowed relative slowdown (default 0.5).")
+    parser.add_argument("--alloc-tolerance", type=float, default=0.25, help="Allowed relative allocation growth (default 0.25).")
+    args = parser.parse_args()
+
+    names = args.only or list(available)
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}; available: {', '.join(available)}")
+    agents = _agents()
+    results = {}
+    for name in names:
+        print(f"---BENCHMARKING {name}---", flush=True)
+        results[name] = run_benchmark(agents, name, args.quick, args.min_time)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"---BASELINE UPDATED: {args.baseline}---")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one.")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = find_regressions(results, json.load(f), args.time_tolerance, args.alloc_tolerance)
+    for regression in regressions:
+        print(f"❌ REGRESSION {regression}")
+    if not regressions:
+        print("✓ No regressions against the baseline")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
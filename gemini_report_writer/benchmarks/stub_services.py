@@ -0,0 +1,170 @@
+"""
+In-process stand-ins for the retriever's external services, used by the benchmarks.
+
+StubRedis replaces the Redis cache (and counts its hits), StubTavily the web search, and
+StubHTTPSession / StubAsyncHTTPClient the pooled HTTP clients behind http_client, which
+serve synthetic OpenAlex works, author pages and LanguageTool results. The http_client
+helpers themselves still run, so request slots and trace spans are measured as usual.
+Combine with LLM_BACKEND=stub for a run that needs no network at all.
+"""
+import asyncio
+import hashlib
+import random
+import threading
+import time
+from contextlib import ExitStack
+from unittest.mock import patch
+import httpx
+
+_store = {}
+_stats = {"hits": 0, "misses": 0}
+_lock = threading.Lock()
+_settings = {"latency": 0.0, "results_per_query": 8}
+
+WORDS = (
+    "household income shocks monetary policy labor market inflation expectations credit constraints "
+    "consumption smoothing fiscal transfers wage growth productivity employment savings investment risk"
+).split()
+
+def reset():
+    with _lock:
+        _store.clear()
+        _stats.update(hits=0, misses=0)
+
+def cache_stats():
+    """Hit counts of the stubbed retriever cache."""
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {"retriever_cache": dict(_stats, hit_rate=round(_stats["hits"] / lookups, 4) if lookups else None)}
+
+def _rng(*parts):
+    return random.Random(hashlib.sha256(":".join(map(str, parts)).encode()).hexdigest())
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def _get(key):
+    with _lock:
+        value = _store.get(key)
+        _stats["hits" if value is not None else "misses"] += 1
+        return value
+
+def _setex(key, ttl, value):
+    with _lock:
+        _store[key] = value.encode() if isinstance(value, str) else value
+    return True
+
+class StubRedis:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def get(self, key):
+        return _get(key)
+
+    def setex(self, key, ttl, value):
+        return _setex(key, ttl, value)
+
+    def time(self):
+        return (int(time.time()), 0)
+
+class StubAsyncRedis(StubRedis):
+    async def get(self, key):
+        return _get(key)
+
+    async def setex(self, key, ttl, value):
+        return _setex(key, ttl, value)
+
+    async def time(self):
+        return (int(time.time()), 0)
+
+def _web_results(query, max_results):
+    rng = _rng("tavily", query)
+    results = []
+    for i in range(min(max_results, _settings["results_per_query"])):
+        results.append({
+            "title": f"{query.title()} brief {i + 1}",
+            "content": _text(rng, 60),
+            "url": f"https://example.org/{hashlib.sha1(query.encode()).hexdigest()[:8]}/{i}",
+            # Some results lack an author, which exercises the author-page lookup
+            "author": None if i % 3 == 0 else f"Analyst {rng.randint(1, 50)}",
+            "published_date": f"{rng.randint(2015, 2024)}-01-01",
+        })
+    return {"results": results}
+
+class StubTavily:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def search(self, query, search_depth=None, max_results=10, **kwargs):
+        time.sleep(_settings["latency"])
+        return _web_results(query, max_results)
+
+class StubAsyncTavily(StubTavily):
+    async def search(self, query, search_depth=None, max_results=10, **kwargs):
+        await asyncio.sleep(_settings["latency"])
+        return _web_results(query, max_results)
+
+def _openalex_works(params):
+    query = params.get("search", "")
+    rng = _rng("openalex", query)
+    works = []
+    for i in range(min(params.get("per_page", 10), _settings["results_per_query"])):
+        abstract = _text(rng, 120).split()
+        inverted = {}
+        for position, word in enumerate(abstract):
+            inverted.setdefault(word, []).append(position)
+        works.append({
+            "id": f"https://openalex.org/W{rng.randint(10**6, 10**7)}",
+            "title": f"{query.title()}: evidence {i + 1}",
+            "doi": f"https://doi.org/10.5555/{hashlib.sha1(f'{query}{i}'.encode()).hexdigest()[:10]}",
+            "abstract_inverted_index": inverted,
+            "authorships": [{"author": {}, "display_name": f"Author {rng.randint(1, 200)}"} for _ in range(rng.randint(1, 4))],
+            "publication_year": rng.randint(2010, 2024),
+            "cited_by_count": rng.randint(0, 500),
+            "primary_location": {"source": {"display_name": "Journal of Synthetic Economics"}},
+            "biblio": {"first_page": "1", "last_page": str(rng.randint(10, 40))},
+        })
+    return {"results": works}
+
+def _response(method, url, params=None):
+    request = httpx.Request(method, url)
+    if "openalex" in url:
+        return httpx.Response(200, json=_openalex_works(params or {}), request=request)
+    if "languagetool" in url:
+        return httpx.Response(200, json={"matches": []}, request=request)
+    return httpx.Response(200, text=f"<html><body><p>By Staff Writer</p><p>{_text(_rng('page', url), 200)}</p></body></html>", request=request)
+
+class StubHTTPSession:
+    def get(self, url, params=None, headers=None, timeout=None):
+        time.sleep(_settings["latency"])
+        return _response("GET", url, params)
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        time.sleep(_settings["latency"])
+        return _response("POST", url)
+
+class StubAsyncHTTPClient:
+    async def get(self, url, params=None, headers=None):
+        await asyncio.sleep(_settings["latency"])
+        return _response("GET", url, params)
+
+    async def post(self, url, data=None, headers=None):
+        await asyncio.sleep(_settings["latency"])
+        return _response("POST", url)
+
+def install(latency=0.0, results_per_query=8):
+    """Patch the stand-ins in for the duration of the returned context."""
+    reset()
+    _settings.update(latency=latency, results_per_query=results_per_query)
+    session, async_client = StubHTTPSession(), StubAsyncHTTPClient()
+    stack = ExitStack()
+    for target, replacement in [
+        ("redis.Redis", StubRedis),
+        ("redis.asyncio.Redis", StubAsyncRedis),
+        ("agents.retriever.TavilyClient", StubTavily),
+        ("agents.retriever.AsyncTavilyClient", StubAsyncTavily),
+        ("http_client.get_session", lambda: session),
+        ("http_client.get_async_client", lambda: async_client),
+    ]:
+        stack.enter_context(patch(target, replacement))
+    return stack
@@ -0,0 +1,134 @@
+"""
+Per-run LLM usage accounting and budgets.
+
+Every model call made through utils.ManagedModel is recorded into the RunUsage bound
+to the current context (one per workflow run), broken down by agent role and model.
+The workflow checks exhausted() at its decision points and degrades gracefully once
+a budget is spent: optional gates are skipped, revision loops stop and the best draft
+so far is finished.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+_current_usage = contextvars.ContextVar("current_usage", default=None)
+
+# Rough characters-per-token ratio used when a provider reports no token usage
+CHARS_PER_TOKEN = 4
+
+@dataclass
+class BudgetLimits:
+    """Hard per-run limits; None disables a limit."""
+    max_llm_calls: Optional[int] = None
+    max_tokens: Optional[int] = None
+    max_cost_usd: Optional[float] = None
+    max_wall_seconds: Optional[float] = None
+
+    @classmethod
+    def from_settings(cls, get_setting):
+        return cls(
+            max_llm_calls=get_setting('budgets.max_llm_calls', None),
+            max_tokens=get_setting('budgets.max_tokens', None),
+            max_cost_usd=get_setting('budgets.max_cost_usd', None),
+            max_wall_seconds=get_setting('budgets.max_wall_seconds', None),
+        )
+
+class RunUsage:
+    """LLM calls, tokens and estimated cost of one workflow run."""
+
+    def __init__(self, workflow_id, limits=None, pricing=None):
+        self.workflow_id = workflow_id
+        self.limits = limits or BudgetLimits()
+        self.pricing = pricing or {}
+        self.started_at = time.time()
+        self.by_role: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        # First budget that ran out, once the workflow has started degrading
+        self.exhausted_by = None
+
+    def record(self, role, model, input_tokens, output_tokens, estimated=False):
+        with self._lock:
+            entry = self.by_role.setdefault(role, {
+                "model": model, "calls": 0, "input_tokens": 0, "output_tokens": 0, "estimated_calls": 0
+            })
+            entry["calls"] += 1
+            entry["input_tokens"] += input_tokens
+            entry["output_tokens"] += output_tokens
+            entry["estimated_calls"] += int(estimated)
+
+    def _cost(self, entry):
+        price = self.pricing.get(entry["model"], {})
+        return (entry["input_tokens"] * price.get("input", 0) + entry["output_tokens"] * price.get("output", 0)) / 1e6
+
+    def totals(self):
+        with self._lock:
+            entries = [dict(entry) for entry in self.by_role.values()]
+        return {
+            "calls": sum(e["calls"] for e in entries),
+            "input_tokens": sum(e["input_tokens"] for e in entries),
+            "output_tokens": sum(e["output_tokens"] for e in entries),
+            "cost_usd": sum(self._cost(e) for e in entries),
+            "wall_seconds": time.time() - self.started_at,
+        }
+
+    def exhausted(self):
+        """Name of the first budget that has been spent, or None."""
+        totals = self.totals()
+        limits = self.limits
+        checks = [
+            ("max_llm_calls", limits.max_llm_calls, totals["calls"]),
+            ("max_tokens", limits.max_tokens, totals["input_tokens"] + totals["output_tokens"]),
+            ("max_cost_usd", limits.max_cost_usd, totals["cost_usd"]),
+            ("max_wall_seconds", limits.max_wall_seconds, totals["wall_seconds"]),
+        ]
+        for name, limit, used in checks:
+            if limit is not None and used >= limit:
+                if self.exhausted_by is None:
+                    self.exhausted_by = name
+                    print(f"⚠️  Run budget exhausted: {name} ({used:.0f} >= {limit}); degrading to finish the current draft")
+                return name
+        return None
+
+    def summary(self):
+        with self._lock:
+            by_role = {role: dict(entry, cost_usd=round(self._cost(entry), 6)) for role, entry in self.by_role.items()}
+        totals = self.totals()
+        totals["cost_usd"] = round(totals["cost_usd"], 6)
+        totals["wall_seconds"] = round(totals["wall_seconds"], 3)
+        return {"totals": totals, "by_role": by_role}
+
+def current_usage() -> Optional[RunUsage]:
+    return _current_usage.get()
+
+def exhausted():
+    """Name of the spent budget of the current run, or None (also outside a run)."""
+    usage = _current_usage.get()
+    return usage.exhausted() if usage else None
+
+def estimate_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
+
+def record_llm_call(role, model, prompt, response):
+    """Record a model call against the current run, estimating tokens when the provider reports none."""
+    usage = _current_usage.get()
+    if usage is None:
+        return
+    metadata = getattr(response, "usage_metadata", None) or {}
+    if metadata.get("input_tokens") is not None:
+        usage.record(role, model, metadata.get("input_tokens", 0), metadata.get("output_tokens", 0) or 0)
+    else:
+        content = str(getattr(response, "content", ""))
+        usage.record(role, model, estimate_tokens(str(prompt)), estimate_tokens(content), estimated=True)
+
+@contextmanager
+def track(workflow_id, limits=None, pricing=None):
+    """Bind a new RunUsage to the current context for the duration of a run."""
+    usage = RunUsage(workflow_id, limits, pricing)
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
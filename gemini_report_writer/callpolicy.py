@@ -0,0 +1,325 @@
+"""
+Deadlines, retries and hedged requests for model calls.
+
+Every call utils.ManagedModel sends to a model goes through the CallPolicy of its agent
+role. An attempt that outlives the role's deadline is abandoned with CallTimeout, and a
+transient failure (timeout, dropped connection, 5xx, throttling) is retried after a
+jittered exponential backoff, so one stalled or flaky call no longer holds up the graph
+or turns into a default score. Roles marked latency-critical also send a duplicate
+request once an attempt has run past the role's recent p95 latency (and at least
+hedge_min_seconds) and take whichever answer arrives first.
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Dict, Optional
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+import ratelimit
+
+# Substrings of errors worth retrying besides throttling: server faults and network trouble
+TRANSIENT_MARKERS = ("500", "502", "503", "504", "unavailable", "deadline", "timed out", "timeout",
+                     "connection", "internal error", "temporarily")
+
+class CallTimeout(TimeoutError):
+    """A model call attempt exceeded its role's deadline."""
+
+def is_transient(error) -> bool:
+    """Whether a failed call may succeed when sent again."""
+    if isinstance(error, (TimeoutError, ConnectionError)) or getattr(error, "transient", False):
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return ratelimit.is_throttle(error) or any(marker in text for marker in TRANSIENT_MARKERS)
+
+@dataclass
+class CallPolicy:
+    """How calls of one role are bounded and retried; the defaults send each call once and wait forever."""
+    timeout_seconds: Optional[float] = None
+    max_retries: int = 0
+    backoff_base_seconds: float = 1.0
+    backoff_max_seconds: float = 30.0
+    hedge: bool = False
+    hedge_quantile: float = 0.95
+    hedge_min_samples: int = 20
+    hedge_min_seconds: float = 1.0
+    max_abandoned: int = 4
+
+    def backoff(self, retry) -> float:
+        """Full-jitter delay before the given retry (0 for the first)."""
+        return random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** retry))
+
+class LatencyTracker:
+    """Recent successful call latencies per role."""
+
+    def __init__(self, window=200):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, role, seconds):
+        with self._lock:
+            self._samples.setdefault(role, deque(maxlen=self.window)).append(seconds)
+
+    def quantile(self, role, q, min_samples=1) -> Optional[float]:
+        """The q-quantile of a role's recent latencies, or None with fewer than min_samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(role, ()))
+        if not samples or len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+# Sync attempts run here so their deadline can be enforced. An abandoned attempt, sync or async,
+# finishes in the background, still holding its governor slot, since the provider is still working
+# on it. At most max_abandoned of them are left running: past that, timed-out calls are not retried
+# or hedged.
+_executor = ContextThreadPoolExecutor(max_workers=64, thread_name_prefix="model-call")
+
+_default_policy = CallPolicy()
+_role_policies: Dict[str, CallPolicy] = {}
+_stats = {"calls": 0, "retries": 0, "timeouts": 0, "hedged": 0, "hedge_wins": 0, "abandoned": 0}
+_stats_lock = threading.Lock()
+latencies = LatencyTracker()
+
+def configure(default=None, roles=None):
+    """Set the policy every role uses unless roles maps it to its own."""
+    global _default_policy, _role_policies
+    _default_policy = default or CallPolicy()
+    _role_policies = dict(roles or {})
+
+def configure_from_settings(get_setting):
+    """Configure policies from the call_policy and error_handling settings of quality_config.yaml."""
+    base = dict(
+        max_retries=get_setting('error_handling.max_retries', 0),
+        backoff_base_seconds=get_setting('error_handling.retry_delay_seconds', 1.0),
+        backoff_max_seconds=get_setting('call_policy.backoff_max_seconds', 30.0),
+        hedge_quantile=get_setting('call_policy.hedge_quantile', 0.95),
+        hedge_min_samples=get_setting('call_policy.hedge_min_samples', 20),
+        hedge_min_seconds=get_setting('call_policy.hedge_min_seconds', 1.0),
+        max_abandoned=get_setting('call_policy.max_abandoned_calls', 4),
+    )
+    timeouts = {role: get_setting('performance.assessment_timeout_seconds', None)
+                for role in get_setting('call_policy.assessment_roles', []) or []}
+    timeouts.update(get_setting('call_policy.role_timeouts', {}) or {})
+    hedged = set(get_setting('call_policy.hedged_roles', []) or [])
+    default_timeout = get_setting('call_policy.timeout_seconds', None)
+    configure(
+        CallPolicy(timeout_seconds=default_timeout, **base),
+        {role: CallPolicy(timeout_seconds=timeouts.get(role, default_timeout), hedge=role in hedged, **base)
+         for role in set(timeouts) | hedged},
+    )
+
+def policy(role) -> CallPolicy:
+    return _role_policies.get(role, _default_policy)
+
+def stats():
+    """Retry, timeout and hedging counts across the process, and abandoned attempts still running."""
+    with _stats_lock:
+        return dict(_stats)
+
+def _count(name, n=1):
+    with _stats_lock:
+        _stats[name] += n
+
+def _hedge_after(role, rule):
+    if not rule.hedge:
+        return None
+    threshold = latencies.quantile(role, rule.hedge_quantile, rule.hedge_min_samples)
+    # Quick calls are not worth duplicating even when they run past their p95
+    return None if threshold is None else max(threshold, rule.hedge_min_seconds)
+
+def _retrying(role, rule, error, retry):
+    if retry >= rule.max_retries or not is_transient(error):
+        return None
+    if isinstance(error, CallTimeout) and _saturated(rule):
+        print(f"⚠️  {role} model call timed out with {rule.max_abandoned} stalled calls still running; not retrying")
+        return None
+    delay = rule.backoff(retry)
+    _count("retries")
+    print(f"⚠️  {role} model call failed ({type(error).__name__}: {error}); retry {retry + 1}/{rule.max_retries} in {delay:.1f}s")
+    return delay
+
+def call(role, attempt, info=None, on_discarded=None):
+    """Run attempt() under role's policy and return the first successful result.
+
+    info, if given, receives the number of attempts made and whether a hedge was sent.
+    on_discarded is called with the result of every other attempt that succeeds (a slower
+    hedge, an attempt that finishes after its deadline), in that attempt's context, since
+    the provider charged for it too.
+    """
+    rule = policy(role)
+    _count("calls")
+    for retry in range(rule.max_retries + 1):
+        if info is not None:
+            info["attempts"] = retry + 1
+        try:
+            return _once(role, rule, attempt, info, on_discarded)
+        except Exception as e:
+            delay = _retrying(role, rule, e, retry)
+            if delay is None:
+                raise
+            time.sleep(delay)
+
+async def acall(role, attempt, info=None, on_discarded=None):
+    """Async variant of call; attempt is a coroutine function.
+
+    Losing and timed-out attempts are charged through on_discarded like sync ones; only a
+    caller that is itself cancelled cancels its attempts, and those are not charged.
+    """
+    rule = policy(role)
+    _count("calls")
+    for retry in range(rule.max_retries + 1):
+        if info is not None:
+            info["attempts"] = retry + 1
+        try:
+            return await _aonce(role, rule, attempt, info, on_discarded)
+        except Exception as e:
+            delay = _retrying(role, rule, e, retry)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+
+def _timed_out(role, rule):
+    _count("timeouts")
+    return CallTimeout(f"{role} model call exceeded its {rule.timeout_seconds:g}s deadline")
+
+def _hedged(info):
+    _count("hedged")
+    if info is not None:
+        info["hedged"] = True
+
+class _Race:
+    """Sync attempts of one call: the first to succeed before the call gives up wins, later successes are discarded."""
+
+    def __init__(self, attempt, on_discarded):
+        self.attempt = attempt
+        self.on_discarded = on_discarded
+        self.settled = False
+        self._lock = threading.Lock()
+
+    def run(self):
+        """One attempt, run on a worker in the caller's context; returns (won, result)."""
+        result = self.attempt()
+        with self._lock:
+            won = not self.settled
+            self.settled = True
+        if not won and self.on_discarded:
+            self.on_discarded(result)
+        return won, result
+
+    def settle(self):
+        with self._lock:
+            self.settled = True
+
+def _abandoned_done(_):
+    _count("abandoned", -1)
+
+def _abandon(futures):
+    # A running attempt cannot be interrupted; it is counted until it finishes
+    for future in futures:
+        if not future.cancel():
+            _count("abandoned")
+            future.add_done_callback(_abandoned_done)
+
+def _saturated(rule):
+    return stats()["abandoned"] >= rule.max_abandoned
+
+def _once(role, rule, attempt, info, on_discarded):
+    started = time.monotonic()
+    hedge_after = _hedge_after(role, rule)
+    if hedge_after is not None and _saturated(rule):
+        hedge_after = None
+    if rule.timeout_seconds is None and hedge_after is None:
+        result = attempt()
+        latencies.record(role, time.monotonic() - started)
+        return result
+    deadline = started + rule.timeout_seconds if rule.timeout_seconds is not None else None
+    remaining = lambda: None if deadline is None else max(0.0, deadline - time.monotonic())
+    race = _Race(attempt, on_discarded)
+    first = _executor.submit(race.run)
+    pending = {first}
+    if hedge_after is not None:
+        wait(pending, timeout=hedge_after if deadline is None else min(hedge_after, remaining()))
+        if not first.done() and remaining() != 0.0:
+            pending.add(_executor.submit(race.run))
+            _hedged(info)
+    error = None
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                race.settle()
+                raise _timed_out(role, rule)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                won, result = future.result()
+                if won:
+                    if future is not first:
+                        _count("hedge_wins")
+                    latencies.record(role, time.monotonic() - started)
+                    return result
+        raise error
+    finally:
+        _abandon(pending)
+
+def _aabandoned_done(task, on_discarded):
+    _count("abandoned", -1)
+    if not task.cancelled() and task.exception() is None and on_discarded:
+        on_discarded(task.result())
+
+def _aabandon(tasks, on_discarded):
+    # As on the sync path, losing and timed-out attempts run to completion and are charged if they succeed
+    for task in tasks:
+        _count("abandoned")
+        task.add_done_callback(lambda done: _aabandoned_done(done, on_discarded))
+
+async def _aonce(role, rule, attempt, info, on_discarded):
+    started = time.monotonic()
+    hedge_after = _hedge_after(role, rule)
+    if hedge_after is not None and _saturated(rule):
+        hedge_after = None
+    if rule.timeout_seconds is None and hedge_after is None:
+        result = await attempt()
+        latencies.record(role, time.monotonic() - started)
+        return result
+    deadline = started + rule.timeout_seconds if rule.timeout_seconds is not None else None
+    remaining = lambda: None if deadline is None else max(0.0, deadline - time.monotonic())
+    first = asyncio.ensure_future(attempt())
+    pending = {first}
+    try:
+        if hedge_after is not None:
+            await asyncio.wait(pending, timeout=hedge_after if deadline is None else min(hedge_after, remaining()))
+            if not first.done() and remaining() != 0.0:
+                pending.add(asyncio.ensure_future(attempt()))
+                _hedged(info)
+        error, winner = None, None
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, timeout=remaining(), return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                raise _timed_out(role, rule)
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                elif winner is None:
+                    winner = task
+                elif on_discarded:
+                    # Both attempts finished at once; the provider served both
+                    on_discarded(task.result())
+        if winner is None:
+            raise error
+        if winner is not first:
+            _count("hedge_wins")
+        latencies.record(role, time.monotonic() - started)
+        return winner.result()
+    except asyncio.CancelledError:
+        # The caller gave up on the call (its run was cancelled): attempts are cancelled, not charged
+        for task in pending:
+            task.cancel()
+        pending = set()
+        raise
+    finally:
+        _aabandon(pending, on_discarded)
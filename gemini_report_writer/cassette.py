@@ -0,0 +1,199 @@
+"""
+Record/replay of external traffic for ReportWorkflow runs.
+
+In record mode every model call, HTTP request, Tavily search and Redis command made
+during a run is captured into the cassette bound to the current context, and saved as
+one JSON file per workflow. In replay mode the same calls are answered from the file
+without touching the network, optionally sleeping for the recorded latencies, so a
+full run can be repeated deterministically offline. Without an active cassette,
+intercept() simply makes the call.
+"""
+import asyncio
+import base64
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+MODES = ("off", "record", "replay")
+
+_current_cassette = contextvars.ContextVar("current_cassette", default=None)
+
+class CassetteMiss(LookupError):
+    """Replay found no recorded interaction for a request."""
+
+class ReplayedError(Exception):
+    """A recorded failure raised again during replay."""
+
+def _encode(value):
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _encode(v) for k, v in value.items()}
+    return value
+
+def _decode(value):
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if isinstance(value, dict):
+        if set(value) == {"__bytes__"}:
+            return base64.b64decode(value["__bytes__"])
+        return {k: _decode(v) for k, v in value.items()}
+    return value
+
+class Cassette:
+    """Recorded interactions of one workflow, keyed by a hash of each request."""
+
+    def __init__(self, path, mode, simulate_latency=False, latency_scale=1.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.simulate_latency = simulate_latency
+        self.latency_scale = latency_scale
+        self.interactions = {}
+        self._replay_positions = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(kind, request):
+        payload = json.dumps([kind, _encode(request)], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def load(self):
+        with open(self.path, encoding="utf-8") as f:
+            self.interactions = json.load(f)["interactions"]
+        return self
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock:
+            payload = {"version": 1, "interactions": self.interactions}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self.path)
+        return self.path
+
+    def add(self, kind, request, entry):
+        entry = dict(entry, kind=kind)
+        with self._lock:
+            self.interactions.setdefault(self.key(kind, request), []).append(entry)
+
+    def next_entry(self, kind, label, request):
+        """The next recording of a request; repeated requests replay in recorded order, then reuse the last."""
+        key = self.key(kind, request)
+        with self._lock:
+            entries = self.interactions.get(key)
+            if not entries:
+                raise CassetteMiss(f"No recorded {kind} interaction for {label} in {self.path}")
+            position = self._replay_positions.get(key, 0)
+            self._replay_positions[key] = position + 1
+            return entries[min(position, len(entries) - 1)]
+
+    def replay_delay(self, entry):
+        return entry.get("elapsed", 0) * self.latency_scale if self.simulate_latency else 0
+
+def current_cassette():
+    return _current_cassette.get()
+
+@contextmanager
+def use(path, mode, simulate_latency=False, latency_scale=1.0, append=False):
+    """Bind a cassette to the current context; a recording is saved on exit (even after a failure).
+
+    Replay loads path; record starts empty unless append is set (resumed runs add to their recording).
+    """
+    cassette = Cassette(path, mode, simulate_latency, latency_scale)
+    if mode == "replay" or (append and os.path.exists(path)):
+        cassette.load()
+    token = _current_cassette.set(cassette)
+    try:
+        yield cassette
+    finally:
+        _current_cassette.reset(token)
+        if mode == "record":
+            print(f"---CASSETTE SAVED TO {cassette.save()}---")
+
+def record(kind, label, request, result, encode=None, elapsed=0.0):
+    """Add a result this run received without making the call (one shared by another run) to its recording."""
+    cassette = _current_cassette.get()
+    if cassette is None or cassette.mode != "record":
+        return
+    encode = encode or (lambda result: result)
+    cassette.add(kind, request, {"label": label, "response": _encode(encode(result)), "elapsed": elapsed})
+
+def _replayed(entry, decode, error_type):
+    if "error" in entry:
+        raise error_type(entry["error"])
+    return decode(_decode(entry["response"]))
+
+def intercept(kind, label, request, call, encode=None, decode=None, error_type=ReplayedError):
+    """Make a call through the current cassette: recorded in record mode, answered from the file in replay mode.
+
+    encode/decode convert the call's result to and from JSON-compatible data; error_type is raised for
+    recorded failures so replayed errors reach the same except clauses as live ones.
+    """
+    cassette = _current_cassette.get()
+    if cassette is None:
+        return call()
+    encode = encode or (lambda result: result)
+    decode = decode or (lambda data: data)
+    if cassette.mode == "replay":
+        entry = cassette.next_entry(kind, label, request)
+        time.sleep(cassette.replay_delay(entry))
+        return _replayed(entry, decode, error_type)
+    start = time.perf_counter()
+    try:
+        result = call()
+    except Exception as e:
+        cassette.add(kind, request, {"label": label, "error": f"{type(e).__name__}: {e}", "elapsed": time.perf_counter() - start})
+        raise
+    cassette.add(kind, request, {"label": label, "response": _encode(encode(result)), "elapsed": time.perf_counter() - start})
+    return result
+
+async def aintercept(kind, label, request, acall, encode=None, decode=None, error_type=ReplayedError):
+    """Async variant of intercept; acall returns the awaitable to record."""
+    cassette = _current_cassette.get()
+    if cassette is None:
+        return await acall()
+    encode = encode or (lambda result: result)
+    decode = decode or (lambda data: data)
+    if cassette.mode == "replay":
+        entry = cassette.next_entry(kind, label, request)
+        await asyncio.sleep(cassette.replay_delay(entry))
+        return _replayed(entry, decode, error_type)
+    start = time.perf_counter()
+    try:
+        result = await acall()
+    except Exception as e:
+        cassette.add(kind, request, {"label": label, "error": f"{type(e).__name__}: {e}", "elapsed": time.perf_counter() - start})
+        raise
+    cassette.add(kind, request, {"label": label, "response": _encode(encode(result)), "elapsed": time.perf_counter() - start})
+    return result
+
+class RecordedClient:
+    """Proxy that passes every method call on a sync or async client through the current cassette."""
+
+    def __init__(self, client, service, is_async=False):
+        self._client = client
+        self._service = service
+        self._is_async = is_async
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+        label = f"{self._service}.{name}"
+
+        def call(*args, **kwargs):
+            request = {"method": name, "args": args, "kwargs": kwargs}
+            if self._is_async:
+                return aintercept(self._service, label, request, lambda: attr(*args, **kwargs))
+            return intercept(self._service, label, request, lambda: attr(*args, **kwargs))
+
+        return call
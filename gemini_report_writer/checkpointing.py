@@ -0,0 +1,145 @@
+"""
+Durable checkpoint storage for ReportWorkflow runs.
+
+AgentState is snapshotted to a local SQLite database after every graph step, so a run
+interrupted by a crash or Ctrl-C can continue from its last completed node instead of
+repeating the LLM calls it already paid for. Concurrent runs on one event loop share a
+single async connection; writers on other connections wait for the lock instead of failing.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import zlib
+from contextlib import asynccontextmanager
+import aiosqlite
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from artifacts import REF_PATTERN
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(".checkpoints", "report_workflow.sqlite")
+# How long a write waits for another connection's transaction before failing
+BUSY_TIMEOUT_SECONDS = 60
+
+# Custom types stored in AgentState that may be revived from a checkpoint
+STATE_TYPES = [
+    ("agents.quality_pipeline", "SystemQualityReport"),
+    ("agents.quality_pipeline", "StageQualityReport"),
+    ("agents.quality_pipeline", "QualityMetric"),
+    ("agents.apa_formatter", "FormattedReport"),
+    ("agents.apa_formatter", "APAReference"),
+]
+
+class CompressedSerializer:
+    """JsonPlus serializer whose larger payloads are zlib-compressed before storage."""
+
+    SUFFIX = "+zlib"
+
+    def __init__(self, compression_level=6, min_size=512):
+        self.serde = JsonPlusSerializer(allowed_msgpack_modules=STATE_TYPES)
+        self.compression_level = compression_level
+        self.min_size = min_size
+
+    def dumps_typed(self, obj):
+        type_, data = self.serde.dumps_typed(obj)
+        if len(data) < self.min_size:
+            return type_, data
+        return type_ + self.SUFFIX, zlib.compress(data, self.compression_level)
+
+    def loads_typed(self, data):
+        type_, payload = data
+        if type_.endswith(self.SUFFIX):
+            return self.serde.loads_typed((type_[:-len(self.SUFFIX)], zlib.decompress(payload)))
+        return self.serde.loads_typed(data)
+
+class _LoopSaver:
+    __slots__ = ("opened", "users")
+
+    def __init__(self, opened):
+        self.opened = opened
+        self.users = 0
+
+class CheckpointStore:
+    """SQLite checkpointers for the sync and async workflow paths, sharing one database file."""
+
+    def __init__(self, path=DEFAULT_CHECKPOINT_PATH, compression_level=6, busy_timeout=BUSY_TIMEOUT_SECONDS):
+        self.path = path
+        self.serde = CompressedSerializer(compression_level)
+        self.busy_timeout = busy_timeout
+        self._saver = None
+        self._lock = threading.Lock()
+        self._async_savers = {}
+
+    def _ensure_directory(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+    def saver(self):
+        """Return the shared sync checkpointer, opening the database on first use."""
+        with self._lock:
+            if self._saver is None:
+                self._ensure_directory()
+                # Parallel graph branches run on worker threads; SqliteSaver serializes access itself
+                conn = sqlite3.connect(self.path, check_same_thread=False, timeout=self.busy_timeout)
+                self._saver = SqliteSaver(conn, serde=self.serde)
+            return self._saver
+
+    async def _open_async(self):
+        self._ensure_directory()
+        conn = await aiosqlite.connect(self.path, timeout=self.busy_timeout)
+        return AsyncSqliteSaver(conn, serde=self.serde)
+
+    @asynccontextmanager
+    async def async_saver(self):
+        """The running event loop's async checkpointer, shared by its runs and closed when the last one leaves."""
+        loop = asyncio.get_running_loop()
+        shared = self._async_savers.get(loop)
+        if shared is None:
+            shared = self._async_savers[loop] = _LoopSaver(asyncio.ensure_future(self._open_async()))
+        shared.users += 1
+        try:
+            yield await asyncio.shield(shared.opened)
+        finally:
+            shared.users -= 1
+            if shared.users == 0:
+                del self._async_savers[loop]
+                await self._close(shared.opened)
+
+    @staticmethod
+    async def _close(opened):
+        try:
+            saver = await opened
+        except Exception:
+            return
+        await saver.conn.close()
+
+    def artifact_refs(self):
+        """Digests of the artifacts referenced by any stored checkpoint or pending write."""
+        if not os.path.exists(self.path):
+            return set()
+        digests = set()
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout)
+        try:
+            for table, column in (("checkpoints", "checkpoint"), ("writes", "value")):
+                try:
+                    rows = conn.execute(f"SELECT type, {column} FROM {table}")
+                except sqlite3.OperationalError:
+                    # Not set up yet: no run has been checkpointed
+                    continue
+                for type_, payload in rows:
+                    if type_ and type_.endswith(CompressedSerializer.SUFFIX):
+                        payload = zlib.decompress(payload)
+                    digests.update(digest.decode() for digest in REF_PATTERN.findall(payload or b""))
+        finally:
+            conn.close()
+        return digests
+
+    def delete(self, workflow_id):
+        """Drop every checkpoint stored for a workflow."""
+        self.saver().delete_thread(workflow_id)
+
+    async def adelete(self, workflow_id):
+        """Async variant of delete, through the running event loop's checkpointer."""
+        async with self.async_saver() as saver:
+            await saver.adelete_thread(workflow_id)
@@ -0,0 +1,47 @@
+"""
+Convergence checks for the report revision loops.
+
+Every post-writing gate can send the draft back to the writer. Revision counters cap
+those loops, but a loop that has stopped making progress still spends the full count
+on rewrites. Two signals end a loop earlier: the writer's last revision barely changed
+the draft, or every gate asking for another revision scored the revised draft no
+better than the draft it asked to revise. Gate scores are higher-is-better; each gate
+appends one entry per review to AgentState.gate_scores.
+"""
+import difflib
+from dataclasses import dataclass
+
+def draft_change(previous: str, current: str) -> float:
+    """Share of a draft a revision changed, compared word by word: 0.0 (identical) to 1.0."""
+    if previous == current:
+        return 0.0
+    a, b = previous.split(), current.split()
+    if not a or not b:
+        return 1.0
+    return 1.0 - difflib.SequenceMatcher(None, a, b).ratio()
+
+@dataclass
+class ConvergencePolicy:
+    """When a revision loop counts as converged; a disabled policy leaves only the revision limits."""
+    enabled: bool = True
+    min_draft_change: float = 0.005
+    min_score_gain: float = 0.02
+
+    @classmethod
+    def from_settings(cls, get_setting):
+        return cls(
+            enabled=get_setting('convergence.enabled', True),
+            min_draft_change=get_setting('convergence.min_draft_change', 0.005),
+            min_score_gain=get_setting('convergence.min_score_gain', 0.02),
+        )
+
+    def draft_converged(self, change: float) -> bool:
+        """True when the last revision changed less of the draft than min_draft_change."""
+        return self.enabled and change < self.min_draft_change
+
+    def score_stalled(self, history) -> bool:
+        """True when a gate asked for the last revision and it did not raise the gate's score by min_score_gain."""
+        if not self.enabled or len(history) < 2:
+            return False
+        previous, latest = history[-2], history[-1]
+        return previous["revise"] and latest["score"] - previous["score"] < self.min_score_gain
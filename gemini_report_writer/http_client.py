@@ -0,0 +1,145 @@
+"""Shared HTTP sessions for the agents' outbound requests.
+
+Sync callers share one pooled ``requests.Session``; async callers share one
+``httpx.AsyncClient`` per event loop. Helpers return parsed payloads so callers
+never hold on to response objects, and each request holds a ``SEARCH_REQUESTS``
+slot and is traced while it is in flight. Requests go through the run's cassette,
+so they can be recorded and replayed offline. Concurrent identical GETs share one
+request (see singleflight).
+"""
+import copy
+import json
+import threading
+from urllib.parse import urlparse
+import httpx
+import requests
+import cassette
+import tracing
+from singleflight import SingleFlight, recording_scope
+from utils import LoopLocal, SEARCH_REQUESTS
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'gemini-report-writer/1.0 (mailto:gemini-report-writer-support@example.com)'
+}
+DEFAULT_TIMEOUT = 30
+
+# Exceptions raised by the sync and async helpers respectively
+HTTP_ERRORS = (requests.exceptions.RequestException, httpx.HTTPError)
+
+# Trace span names for the services the agents call
+SERVICE_NAMES = {
+    'api.openalex.org': 'openalex',
+    'languagetool.org': 'languagetool',
+    'api.languagetool.org': 'languagetool',
+}
+
+# Callers get their own copy of a shared JSON payload, since parsers may modify it
+GET_FLIGHTS = SingleFlight(copy=copy.deepcopy)
+
+_session = None
+_session_lock = threading.Lock()
+_async_clients = LoopLocal(lambda: httpx.AsyncClient(headers=DEFAULT_HEADERS, timeout=DEFAULT_TIMEOUT, follow_redirects=True))
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled requests session."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.headers.update(DEFAULT_HEADERS)
+                _session = session
+    return _session
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the httpx client bound to the running event loop."""
+    return _async_clients.get()
+
+def _span(method, url):
+    host = urlparse(url).netloc
+    service = SERVICE_NAMES.get(host, 'http')
+    return tracing.span(f"{service}.{method.lower()}", "http", method=method, host=host)
+
+def _record_response(info, response):
+    info["status"] = response.status_code
+    info["response_bytes"] = len(response.content)
+
+def _response_data(response):
+    return {"status": response.status_code, "body": response.text}
+
+def _replayed_response(method, url):
+    # Replayed responses are rebuilt as httpx responses, which both helper families can consume
+    return lambda data: httpx.Response(data["status"], text=data["body"], request=httpx.Request(method, url))
+
+def _recorded(method, url, send, **request):
+    return cassette.intercept(
+        "http", f"{method} {url}", dict(request, method=method, url=url), send,
+        _response_data, _replayed_response(method, url), requests.exceptions.RequestException,
+    )
+
+async def _arecorded(method, url, send, **request):
+    return await cassette.aintercept(
+        "http", f"{method} {url}", dict(request, method=method, url=url), send,
+        _response_data, _replayed_response(method, url), requests.exceptions.RequestException,
+    )
+
+def _flight_key(kind, url, params=None, headers=None):
+    # The flight records one response; a run recording its own cassette does not share another run's
+    return (recording_scope(), json.dumps([kind, url, params, headers], sort_keys=True, default=str))
+
+def get_json(url, params=None, headers=None):
+    return GET_FLIGHTS.do(_flight_key('json', url, params, headers), lambda: _get_json(url, params, headers))[0]
+
+def get_text(url, headers=None):
+    return GET_FLIGHTS.do(_flight_key('text', url, headers=headers), lambda: _get_text(url, headers))[0]
+
+async def aget_json(url, params=None, headers=None):
+    return (await GET_FLIGHTS.ado(_flight_key('json', url, params, headers), lambda: _aget_json(url, params, headers)))[0]
+
+async def aget_text(url, headers=None):
+    return (await GET_FLIGHTS.ado(_flight_key('text', url, headers=headers), lambda: _aget_text(url, headers)))[0]
+
+def _get_json(url, params=None, headers=None):
+    with SEARCH_REQUESTS.slot(), _span('GET', url) as info:
+        response = _recorded('GET', url, lambda: get_session().get(url, params=params, headers=headers, timeout=DEFAULT_TIMEOUT), params=params)
+        _record_response(info, response)
+    response.raise_for_status()
+    return response.json()
+
+def _get_text(url, headers=None):
+    with SEARCH_REQUESTS.slot(), _span('GET', url) as info:
+        response = _recorded('GET', url, lambda: get_session().get(url, headers=headers, timeout=DEFAULT_TIMEOUT))
+        _record_response(info, response)
+    response.raise_for_status()
+    return response.text
+
+def post_form(url, data, headers=None):
+    with SEARCH_REQUESTS.slot(), _span('POST', url) as info:
+        response = _recorded('POST', url, lambda: get_session().post(url, data=data, headers=headers, timeout=DEFAULT_TIMEOUT), data=data)
+        _record_response(info, response)
+    response.raise_for_status()
+    return response.json()
+
+async def _aget_json(url, params=None, headers=None):
+    async with SEARCH_REQUESTS.aslot():
+        with _span('GET', url) as info:
+            response = await _arecorded('GET', url, lambda: get_async_client().get(url, params=params, headers=headers), params=params)
+            _record_response(info, response)
+    response.raise_for_status()
+    return response.json()
+
+async def _aget_text(url, headers=None):
+    async with SEARCH_REQUESTS.aslot():
+        with _span('GET', url) as info:
+            response = await _arecorded('GET', url, lambda: get_async_client().get(url, headers=headers))
+            _record_response(info, response)
+    response.raise_for_status()
+    return response.text
+
+async def apost_form(url, data, headers=None):
+    async with SEARCH_REQUESTS.aslot():
+        with _span('POST', url) as info:
+            response = await _arecorded('POST', url, lambda: get_async_client().post(url, data=data, headers=headers), data=data)
+            _record_response(info, response)
+    response.raise_for_status()
+    return response.json()
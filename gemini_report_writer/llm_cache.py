@@ -0,0 +1,78 @@
+"""
+Persistent cache of deterministic model responses.
+
+Calls made at temperature 0 with a prompt the same model has already answered are
+served from a local SQLite file instead of the provider: revision loops that resend an
+unchanged prompt, later runs of the same topic and reruns after a failure only pay for
+the calls whose prompts changed. Keys cover the model, its temperature and the prompt
+with whitespace normalized. Storage, least-recently-used eviction and expiry are those
+of memo.NodeMemo. A ResponseCache is bound to the current context per run, like the
+run's budget and cassette, and utils.ManagedModel consults it around every call.
+"""
+import contextvars
+import os
+import threading
+from contextlib import contextmanager
+from typing import Optional
+from memo import NodeMemo
+
+DEFAULT_LLM_CACHE_PATH = os.path.join(".checkpoints", "llm_cache.sqlite")
+
+_current_cache = contextvars.ContextVar("current_llm_cache", default=None)
+
+def normalize_prompt(prompt) -> str:
+    """Prompt text with runs of whitespace collapsed, so indentation changes do not miss the cache."""
+    return " ".join(str(prompt).split())
+
+class ResponseCache:
+    """Responses keyed by client (backend, model, temperature) and normalized prompt, with hit counts per role."""
+
+    def __init__(self, path=DEFAULT_LLM_CACHE_PATH, max_bytes=256 * 1024 * 1024, max_age_seconds=None,
+                 disabled_roles=(), salt=""):
+        self.store = NodeMemo(path, max_bytes=max_bytes, max_age_seconds=max_age_seconds, salt=salt)
+        self.disabled_roles = set(disabled_roles)
+        self.stats = {}  # role -> {"hits": n, "misses": n}
+        self._lock = threading.Lock()
+
+    def key(self, role, client_key, temperature, prompt) -> Optional[str]:
+        """Cache key of a call, or None if the call is not cached (sampled output or opted-out role)."""
+        if temperature != 0 or role in self.disabled_roles:
+            return None
+        return self.store.key("llm", [list(client_key), normalize_prompt(prompt)])
+
+    def _count(self, role, outcome):
+        with self._lock:
+            counts = self.stats.setdefault(role, {"hits": 0, "misses": 0})
+            counts[outcome] += 1
+
+    def get(self, role, key):
+        """Stored response data for key, or None."""
+        hit, data = self.store.get(key)
+        self._count(role, "hits" if hit else "misses")
+        return data if hit else None
+
+    def put(self, role, key, data):
+        self.store.put(key, role, data)
+
+    def hit_rates(self):
+        """Hits, misses and hit rate per role, plus an "all" total."""
+        with self._lock:
+            rates = {role: dict(counts) for role, counts in sorted(self.stats.items())}
+        total = {"hits": sum(c["hits"] for c in rates.values()), "misses": sum(c["misses"] for c in rates.values())}
+        rates["all"] = total
+        for counts in rates.values():
+            calls = counts["hits"] + counts["misses"]
+            counts["hit_rate"] = round(counts["hits"] / calls, 4) if calls else 0.0
+        return rates
+
+def current() -> Optional[ResponseCache]:
+    return _current_cache.get()
+
+@contextmanager
+def use(cache):
+    """Bind a ResponseCache to the current context for the duration of a run."""
+    token = _current_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _current_cache.reset(token)
@@ -1,8 +1,13 @@
 import os
+import asyncio
 import argparse
 import hashlib
-from typing import TypedDict, List, Dict
+import json
+from contextlib import ExitStack, contextmanager
+from typing import Annotated, TypedDict, List, Dict
 from langgraph.graph import StateGraph, END
+from langgraph.types import Send
+from langchain_core.runnables import RunnableLambda
 from agents.planner import PlannerAgent
 from agents.critic import CriticAgent
 from agents.researcher import ResearcherAgent
@@ -13,40 +18,410 @@ from agents.citation_verifier import CitationVerifierAgent
 from agents.grammar_gate import GrammarGateAgent
 from agents.quality_controller import QualityControllerAgent
 from agents.quality_pipeline import QualityValidationPipeline, SystemQualityReport
+from checkpointing import CheckpointStore, DEFAULT_CHECKPOINT_PATH
+from artifacts import ArtifactStore, DEFAULT_ARTIFACT_DIR, is_ref
+from memo import NodeMemo, DEFAULT_MEMO_PATH
+from source_registry import source_key
+import budget
+import callpolicy
+import cassette
+import convergence
+import llm_cache
+import prefetch
+import ratelimit
+import source_registry
+import tracing
+
+def merge_research_results(left: Dict, right: Dict) -> Dict:
+    """Reducer: merge per-section research results, newer results win."""
+    merged = dict(left or {})
+    merged.update(right or {})
+    return merged
+
+def merge_sources(left: List[Dict], right: List[Dict]) -> List[Dict]:
+    """Reducer: register newly gathered sources; a source found again keeps its first global ID."""
+    return source_registry.merge(left, right)
+
+def merge_skipped_sections(left: List[Dict], right: List[Dict]) -> List[Dict]:
+    """Reducer: keep one skip record per section, the latest one wins; a resolved record drops the section."""
+    merged = {entry['section']: entry for entry in left or []}
+    for entry in right or []:
+        if entry.get('resolved'):
+            merged.pop(entry['section'], None)
+        else:
+            merged[entry['section']] = entry
+    return list(merged.values())
+
+def merge_gate_feedback(left: Dict, right: Dict) -> Dict:
+    """Reducer: collect verdicts from gates that run in the same step, keyed by gate."""
+    merged = dict(left or {})
+    merged.update(right or {})
+    return merged
+
+def merge_gate_scores(left: Dict, right: Dict) -> Dict:
+    """Reducer: append each gate's latest score to its history."""
+    merged = dict(left or {})
+    for gate, scores in (right or {}).items():
+        merged[gate] = merged.get(gate, []) + scores
+    return merged
+
+# State keys the result of each memoizable node depends on
+MEMOIZABLE_NODES = {
+    "validate_outline": ("outline", "topic"),
+    "validate_coherence": ("report", "outline"),
+    "apa_formatter": ("report", "sources"),
+    "citation_verifier": ("formatted_report", "sources"),
+    "critic_report": ("formatted_report",),
+    "quality_control": ("formatted_report", "sources", "research_results"),
+    "grammar_gate": ("formatted_report",),
+}
+
+# Post-writing gates and the names their verdicts are reported under
+POST_WRITING_GATES = {
+    "citation_verifier": "Citations",
+    "critic_report": "Critic",
+    "quality_control": "Quality control",
+    "grammar_gate": "Grammar",
+}
 
 class AgentState(TypedDict):
     topic: str
     outline: List[str]
     critique: str
     research_plan: str
-    research_results: Dict[str, str] # Store research results per section
+    research_results: Annotated[Dict[str, Dict], merge_research_results] # Store research results per section
     report: str
     formatted_report: FormattedReport
     feedback: str
     outline_revisions: int
     report_revisions: int
-    sources: List[str]
+    sources: Annotated[List[Dict], merge_sources]
     citation_revisions: int
-    current_section: str # Track the current section being researched
-    section_index: int # Track the index of the current section
-    skipped_sections: List[Dict] # Track sections that were skipped due to quality issues
+    research_revisions: int
+    skipped_sections: Annotated[List[Dict], merge_skipped_sections] # Track sections that were skipped due to quality issues
     quality_report: SystemQualityReport # System-wide quality tracking
+    revision_targets: List[str] # Sections a REVISE verdict applies to; empty lets the writer attribute the feedback
+    gate_feedback: Annotated[Dict[str, Dict], merge_gate_feedback] # Per-gate verdicts when the gates run concurrently
+    gate_scores: Annotated[Dict[str, List[Dict]], merge_gate_scores] # Per-gate score history across revisions
+    revision_change: float # Share of the draft the writer's last pass changed
+
+class SectionResearchState(TypedDict):
+    """Payload sent to each parallel research branch."""
+    topic: str
+    section: str
 
 class ReportWorkflow:
-    def __init__(self):
+    def __init__(self, max_research_concurrency=None, output_dir=None, concurrent_gates=None, trace_dir=None,
+                 cassette_mode=None, cassette_dir=None, simulate_latency=None):
+        self.quality_pipeline = QualityValidationPipeline()
+        self.output_dir = output_dir or os.getcwd()
         self.planner = PlannerAgent()
         self.critic = CriticAgent()
         self.researcher = ResearcherAgent()
-        self.writer = WriterAgent()
+        self.writer = WriterAgent(
+            max_concurrent_sections=self.quality_pipeline.get_setting('performance.max_concurrent_section_writes', 4)
+        )
         self.retriever = RetrieverAgent()
         self.apa_formatter = APAFormatterAgent()
         self.citation_verifier = CitationVerifierAgent()
         self.grammar_gate = GrammarGateAgent()
-        self.quality_controller = QualityControllerAgent()
-        self.quality_pipeline = QualityValidationPipeline()
+        self.quality_controller = QualityControllerAgent(
+            max_concurrent_assessments=self.quality_pipeline.get_setting('performance.max_concurrent_assessments', 3)
+        )
+
+        # Provider model calls share per-model rate limits and an adaptive in-flight limit across the process
+        ratelimit.configure(
+            rate_per_minute=self.quality_pipeline.get_setting('performance.api_rate_limit_per_minute', None),
+            max_concurrency=self.quality_pipeline.get_setting('performance.max_concurrent_calls_per_model', 16),
+        )
+        # Per-role deadlines, retries of transient failures and hedged requests for every model call
+        callpolicy.configure_from_settings(self.quality_pipeline.get_setting)
+
+        # Upper bound on research branches (and other parallel nodes) running at once
+        self.max_research_concurrency = max_research_concurrency or self.quality_pipeline.get_setting(
+            'performance.max_concurrent_research_sections', 4
+        )
+
+        # Run citation, critic, quality and grammar gates at once and merge their verdicts
+        self.concurrent_gates = concurrent_gates if concurrent_gates is not None else self.quality_pipeline.get_setting(
+            'pipeline_settings.concurrent_gates', True
+        )
+
+        # Chrome-trace timelines of each run are written here when tracing is enabled
+        self.trace_dir = trace_dir
+        if not self.trace_dir and self.quality_pipeline.get_setting('tracing.enabled', False):
+            self.trace_dir = self.quality_pipeline.get_setting('tracing.output_dir', 'traces')
+
+        # Record every external call of a run to a cassette, or replay a recorded run offline
+        self.cassette_mode = cassette_mode or self.quality_pipeline.get_setting('cassettes.mode', 'off')
+        if self.cassette_mode not in cassette.MODES:
+            raise ValueError(f"Unknown cassette mode {self.cassette_mode!r}; expected one of {', '.join(cassette.MODES)}")
+        self.cassette_dir = cassette_dir or self.quality_pipeline.get_setting('cassettes.dir', 'cassettes')
+        self.simulate_latency = simulate_latency if simulate_latency is not None else self.quality_pipeline.get_setting(
+            'cassettes.simulate_latency', False
+        )
+
+        # Per-run LLM budgets; once spent, optional gates are skipped and revision loops stop
+        self.budget_limits = budget.BudgetLimits.from_settings(self.quality_pipeline.get_setting)
+        self.model_pricing = self.quality_pipeline.get_setting('budgets.pricing_per_million_tokens', {})
+
+        # Durable per-node snapshots of AgentState so interrupted runs can be resumed
+        self.checkpoints = None
+        if self.quality_pipeline.get_setting('checkpointing.enabled', True):
+            self.checkpoints = CheckpointStore(
+                self.quality_pipeline.get_setting('checkpointing.db_path', DEFAULT_CHECKPOINT_PATH),
+                compression_level=self.quality_pipeline.get_setting('checkpointing.compression_level', 6),
+            )
+
+        # Retrieval for draft outline sections starts while the outline is still being reviewed
+        self.speculative_prefetch = self.quality_pipeline.get_setting('performance.speculative_prefetch', True)
+        self.prefetch_similarity = self.quality_pipeline.get_setting('performance.prefetch_min_similarity', 0.8)
+
+        # Abstracts, research notes and drafts are stored by content hash; AgentState keeps references
+        self.artifacts = ArtifactStore(
+            self.quality_pipeline.get_setting('artifacts.dir', DEFAULT_ARTIFACT_DIR),
+            enabled=self.quality_pipeline.get_setting('artifacts.enabled', True),
+            min_size=self.quality_pipeline.get_setting('artifacts.min_size', 512),
+            cache_bytes=self.quality_pipeline.get_setting('artifacts.cache_mb', 32) * 1024 * 1024,
+        )
+
+        # Revision loops also end once a rewrite stops changing the draft or the gates' scores
+        self.convergence = convergence.ConvergencePolicy.from_settings(self.quality_pipeline.get_setting)
+
+        # Results of pure nodes are reused while their inputs are unchanged, within and across runs.
+        # Recording and replaying cassettes needs every call to happen, so both turn it off.
+        self.memo = None
+        self.memo_nodes = set()
+        if self.quality_pipeline.get_setting('memoization.enabled', True) and self.cassette_mode == "off":
+            max_age_days = self.quality_pipeline.get_setting('memoization.max_age_days', 7)
+            self.memo = NodeMemo(
+                self.quality_pipeline.get_setting('memoization.path', DEFAULT_MEMO_PATH),
+                max_bytes=self.quality_pipeline.get_setting('memoization.max_mb', 64) * 1024 * 1024,
+                max_age_seconds=max_age_days * 24 * 3600 if max_age_days is not None else None,
+                salt=self._memo_salt(),
+            )
+            self.memo_nodes = set(self.quality_pipeline.get_setting('memoization.nodes', list(MEMOIZABLE_NODES)))
+            self.memo_nodes &= set(MEMOIZABLE_NODES)
+
+        # Deterministic (temperature 0) model calls are answered from disk when their prompt repeats
+        self.llm_cache = None
+        if self.quality_pipeline.get_setting('llm_cache.enabled', True) and self.cassette_mode == "off":
+            max_age_days = self.quality_pipeline.get_setting('llm_cache.max_age_days', 7)
+            self.llm_cache = llm_cache.ResponseCache(
+                self.quality_pipeline.get_setting('llm_cache.path', llm_cache.DEFAULT_LLM_CACHE_PATH),
+                max_bytes=self.quality_pipeline.get_setting('llm_cache.max_mb', 256) * 1024 * 1024,
+                max_age_seconds=max_age_days * 24 * 3600 if max_age_days is not None else None,
+                disabled_roles=self.quality_pipeline.get_setting('llm_cache.disabled_roles', []) or [],
+                salt=json.dumps(self._backend_settings()),
+            )
+
+        # Compiled once and shared by every run; all per-run data lives in AgentState
+        self.app = self._build_graph(self.checkpoints.saver() if self.checkpoints else None)
+
+    def run(self, topic, workflow_id=None):
+        initial_state = self._initial_state(topic, workflow_id)
+        workflow_id = initial_state["quality_report"].workflow_id
+        self._announce_run(workflow_id)
+        with self._run_scope(workflow_id, topic) as usage:
+            final_state = self.app.invoke(initial_state, config=self._run_config(workflow_id), durability="sync")
+        return self._complete_run(workflow_id, final_state, usage)
+
+    async def arun(self, topic, workflow_id=None):
+        """Async variant of run: LLM, HTTP and Redis calls share the running event loop."""
+        initial_state = self._initial_state(topic, workflow_id)
+        workflow_id = initial_state["quality_report"].workflow_id
+        self._announce_run(workflow_id)
+        with self._run_scope(workflow_id, topic) as usage:
+            if not self.checkpoints:
+                final_state = await self.app.ainvoke(initial_state, config=self._run_config(workflow_id))
+            else:
+                async with self.checkpoints.async_saver() as saver:
+                    app = self._async_app(saver)
+                    final_state = await app.ainvoke(initial_state, config=self._run_config(workflow_id), durability="sync")
+        return await self._acomplete_run(workflow_id, final_state, usage)
+
+    def resume(self, workflow_id):
+        """Continue an interrupted run from the last node it completed."""
+        self._require_checkpoints()
+        config = self._run_config(workflow_id)
+        snapshot = self._restore_run(workflow_id, self.app.get_state(config))
+        with self._run_scope(workflow_id, snapshot.values["topic"], resuming=True) as usage:
+            final_state = self.app.invoke(None, config=config, durability="sync") if snapshot.next else snapshot.values
+        return self._complete_run(workflow_id, final_state, usage)
+
+    async def aresume(self, workflow_id):
+        """Async variant of resume."""
+        async with self._require_checkpoints().async_saver() as saver:
+            app = self._async_app(saver)
+            config = self._run_config(workflow_id)
+            snapshot = self._restore_run(workflow_id, await app.aget_state(config))
+            with self._run_scope(workflow_id, snapshot.values["topic"], resuming=True) as usage:
+                final_state = await app.ainvoke(None, config=config, durability="sync") if snapshot.next else snapshot.values
+        return await self._acomplete_run(workflow_id, final_state, usage)
+
+    @contextmanager
+    def _run_scope(self, workflow_id, topic, resuming=False):
+        """Account the run's LLM usage against its budgets; trace it, record or replay it and prefetch retrieval when enabled.
+
+        Budgets apply per process session: a resumed run starts with fresh counters.
+        A resumed recording is appended to the run's cassette. Prefetches live in memory
+        only, so a resumed run retrieves every section itself.
+        """
+        with ExitStack() as stack:
+            if self.trace_dir:
+                stack.enter_context(tracing.trace(workflow_id, self.trace_dir))
+            if self.cassette_mode != "off":
+                stack.enter_context(cassette.use(
+                    self.cassette_path(topic), self.cassette_mode, simulate_latency=self.simulate_latency,
+                    latency_scale=self.quality_pipeline.get_setting('cassettes.latency_scale', 1.0), append=resuming,
+                ))
+            usage = stack.enter_context(budget.track(workflow_id, self.budget_limits, self.model_pricing))
+            stack.enter_context(source_registry.use())
+            if self.speculative_prefetch:
+                stack.enter_context(prefetch.use(self.max_research_concurrency, self.prefetch_similarity))
+            if self.llm_cache:
+                stack.enter_context(llm_cache.use(self.llm_cache))
+            yield usage
+
+    def _over_budget(self):
+        return budget.exhausted() is not None
+
+    def _async_app(self, saver):
+        # The shared graph with an event-loop-bound checkpointer swapped in; no recompilation
+        return self.app.copy(update={"checkpointer": saver})
+
+    def _require_checkpoints(self):
+        if not self.checkpoints:
+            raise ValueError("Checkpointing is disabled; enable checkpointing in the quality config to resume runs")
+        return self.checkpoints
+
+    @staticmethod
+    def _backend_settings():
+        """Environment settings that select and configure the model backends."""
+        return sorted([k, v] for k, v in os.environ.items() if k.startswith("LLM_BACKEND") or k.startswith("STUB_LLM"))
+
+    def _memo_salt(self):
+        """What memoized results depend on besides node inputs: the quality config and the model backends."""
+        return json.dumps([self.quality_pipeline.config, self._backend_settings()], sort_keys=True, default=str)
+
+    def _memo_lookup(self, name, state):
+        """(key, hit, result) for a memoized node; key is None when the node is not memoized."""
+        if self.memo is None or name not in self.memo_nodes:
+            return None, False, None
+        key = self.memo.key(name, {input_key: state.get(input_key) for input_key in MEMOIZABLE_NODES[name]})
+        hit, result = self.memo.get(key)
+        if hit:
+            print(f"♻️  Reusing {name} result, inputs unchanged")
+        return key, hit, result
+
+    def _memoized(self, name, state, compute, reusable=None):
+        """compute(), or the stored result of an earlier call of node name with the same inputs.
+
+        Results reusable(result) rejects, such as error fallbacks, are not stored.
+        """
+        key, hit, result = self._memo_lookup(name, state)
+        if hit:
+            return result
+        result = compute()
+        if key is not None and (reusable is None or reusable(result)):
+            self.memo.put(key, name, result)
+        return result
+
+    async def _amemoized(self, name, state, acompute, reusable=None):
+        """Async variant of _memoized."""
+        key, hit, result = self._memo_lookup(name, state)
+        if hit:
+            return result
+        result = await acompute()
+        if key is not None and (reusable is None or reusable(result)):
+            self.memo.put(key, name, result)
+        return result
+
+    def _announce_run(self, workflow_id):
+        if self.checkpoints:
+            print(f"---WORKFLOW ID: {workflow_id} (resume with --resume {workflow_id})---")
+
+    def _restore_run(self, workflow_id, snapshot):
+        if not snapshot.values:
+            raise ValueError(f"No checkpoint found for workflow {workflow_id}")
+        print(f"---RESUMING {workflow_id} AT {', '.join(snapshot.next) or 'END'}---")
+        return snapshot
+
+    def _complete_run(self, workflow_id, final_state, usage=None):
+        report = self._summarize_run(final_state, usage)
+        if self._drops_checkpoints():
+            self.checkpoints.delete(workflow_id)
+        self._prune_artifacts()
+        return report
+
+    async def _acomplete_run(self, workflow_id, final_state, usage=None):
+        """Async variant of _complete_run; the event loop must not block on the checkpoint database."""
+        report = self._summarize_run(final_state, usage)
+        if self._drops_checkpoints():
+            await self.checkpoints.adelete(workflow_id)
+        await asyncio.to_thread(self._prune_artifacts)
+        return report
+
+    def _drops_checkpoints(self):
+        return self.checkpoints and not self.quality_pipeline.get_setting('checkpointing.keep_completed_runs', False)
+
+    def _prune_artifacts(self):
+        # Payloads that checkpoints of interrupted or kept runs point to stay, however old
+        max_age_days = self.quality_pipeline.get_setting('artifacts.max_age_days', 7)
+        if max_age_days is not None:
+            self.artifacts.prune(max_age_days * 24 * 3600, self.checkpoints.artifact_refs if self.checkpoints else None)
+
+    def _summarize_run(self, final_state, usage=None):
+        if usage:
+            totals = usage.totals()
+            print(f"---LLM USAGE: {totals['calls']} calls, {totals['input_tokens'] + totals['output_tokens']} tokens, "
+                  f"~${totals['cost_usd']:.4f} in {totals['wall_seconds']:.1f}s---")
+        for model_name, queue in ratelimit.stats().items():
+            if queue["calls"]:
+                print(f"---MODEL QUEUE {model_name}: {queue['calls']} calls, avg wait {queue['avg_queue_seconds']:.2f}s, "
+                      f"max {queue['max_queue_seconds']:.2f}s, {queue['throttled']} throttled, "
+                      f"concurrency limit {queue['concurrency_limit']} in this process---")
+        calls = callpolicy.stats()
+        if calls["retries"] or calls["timeouts"] or calls["hedged"]:
+            print(f"---MODEL CALL POLICY: {calls['retries']} retries, {calls['timeouts']} timeouts, "
+                  f"{calls['hedged']} hedged ({calls['hedge_wins']} won by the hedge) in this process---")
+        if self.llm_cache:
+            cached = self.llm_cache.hit_rates()["all"]
+            print(f"---LLM CACHE: {cached['hits']}/{cached['hits'] + cached['misses']} cacheable calls answered "
+                  f"from cache ({cached['hit_rate']:.0%}) in this process---")
+        return self._finalize_report(final_state["topic"], final_state, usage)
+
+    def _stash(self, text):
+        return self.artifacts.put(text)
+
+    def _text(self, value):
+        return self.artifacts.get(value)
+
+    def _stash_sources(self, sources):
+        return [dict(source, abstract=self._stash(source["abstract"])) if source.get("abstract") else source for source in sources]
 
-    def run(self, topic):
-        initial_state = {
+    def _sources(self, state: AgentState):
+        """The run's sources with their abstracts resolved."""
+        return [
+            dict(source, abstract=self._text(source["abstract"])) if is_ref(source.get("abstract")) else source
+            for source in state.get("sources", [])
+        ]
+
+    def _research_results(self, state: AgentState):
+        """Per-section research results with their notes resolved."""
+        return {
+            section: dict(result, content=self._text(result["content"])) if isinstance(result, dict) and 'content' in result else result
+            for section, result in state.get("research_results", {}).items()
+        }
+
+    def _report(self, state: AgentState):
+        return self._text(state["report"])
+
+    def _formatted_text(self, state: AgentState):
+        return self._text(state["formatted_report"].report_text)
+
+    def _initial_state(self, topic, workflow_id=None):
+        return {
             "topic": topic,
             "outline": [],
             "critique": "",
@@ -59,27 +434,40 @@ class ReportWorkflow:
             "report_revisions": 0,
             "sources": [],
             "citation_revisions": 0,
-            "current_section": "",
-            "section_index": 0,
+            "research_revisions": 0,
             "skipped_sections": [],
-            "quality_report": self.quality_pipeline.start_quality_tracking(topic),
+            "revision_targets": [],
+            "gate_feedback": {},
+            "gate_scores": {},
+            "revision_change": 1.0,
+            "quality_report": self.quality_pipeline.new_quality_report(topic, workflow_id),
         }
 
+    def _run_config(self, workflow_id):
+        return {
+            "recursion_limit": 200,
+            "max_concurrency": self.max_research_concurrency,
+            "configurable": {"thread_id": workflow_id},
+        }
+
+    def _build_graph(self, checkpointer=None):
         workflow = StateGraph(AgentState)
 
-        workflow.add_node("planner", self.plan)
-        workflow.add_node("critic_outline", self.critique_outline)
-        workflow.add_node("research_section", self.research_section)
-        workflow.add_node("writer", self.write)
-        workflow.add_node("apa_formatter", self.format_report)
-        workflow.add_node("citation_verifier", self.verify_citations)
-        workflow.add_node("critic_report", self.critique_report)
-        workflow.add_node("quality_control", self.quality_control)
-        workflow.add_node("validate_outline", self.validate_outline_quality)
-        workflow.add_node("validate_research", self.validate_research_quality)
-        workflow.add_node("validate_coherence", self.validate_content_coherence)
-        workflow.add_node("grammar_gate", self.check_grammar)
-        workflow.add_node("human_feedback", self.get_human_feedback)
+        # Nodes that call models or external services get an async implementation
+        # used by arun(); plain nodes run as-is on both paths. Every node is traced.
+        workflow.add_node("planner", self._node("planner", self.plan, self.aplan))
+        workflow.add_node("critic_outline", self._node(
+            "critic_outline", self.critique_outline, self.acritique_outline,
+            budget_skip={"critique": "APPROVED: Skipped, run budget exhausted"},
+        ))
+        workflow.add_node("dispatch_research", self._node("dispatch_research", self.dispatch_research))
+        workflow.add_node("research_section", self._node("research_section", self.research_section, self.aresearch_section))
+        workflow.add_node("writer", self._node("writer", self.write, self.awrite))
+        workflow.add_node("apa_formatter", self._node("apa_formatter", self.format_report, self.aformat_report))
+        workflow.add_node("validate_outline", self._node("validate_outline", self.validate_outline_quality, self.avalidate_outline_quality))
+        workflow.add_node("validate_research", self._node("validate_research", self.validate_research_quality))
+        workflow.add_node("validate_coherence", self._node("validate_coherence", self.validate_content_coherence))
+        workflow.add_node("human_feedback", self._node("human_feedback", self.get_human_feedback))
 
         workflow.set_entry_point("planner")
 
@@ -88,20 +476,80 @@ class ReportWorkflow:
             "critic_outline", self.decide_outline, {"continue": "validate_outline", "revise": "planner"}
         )
         workflow.add_conditional_edges(
-            "validate_outline", self.decide_outline_validation, {"continue": "research_section", "revise": "planner"}
+            "validate_outline", self.decide_outline_validation, {"continue": "dispatch_research", "revise": "planner"}
         )
         workflow.add_conditional_edges(
-            "research_section",
-            self.decide_next_section,
-            {"continue": "research_section", "end_research": "validate_research"},
+            "dispatch_research", self.fan_out_research, ["research_section", "validate_research"]
         )
+        workflow.add_edge("research_section", "validate_research")
         workflow.add_conditional_edges(
-            "validate_research", self.decide_research_validation, {"continue": "writer", "revise": "research_section"}
+            "validate_research", self.decide_research_validation, {"continue": "writer", "revise": "dispatch_research"}
         )
         workflow.add_edge("writer", "validate_coherence")
         workflow.add_conditional_edges(
             "validate_coherence", self.decide_coherence_validation, {"continue": "apa_formatter", "revise": "writer"}
         )
+        if self.concurrent_gates:
+            self._add_concurrent_gates(workflow)
+        else:
+            self._add_sequential_gates(workflow)
+        workflow.add_conditional_edges(
+            "human_feedback", self.decide_human_feedback, {"continue": END, "revise": "writer"}
+        )
+
+        return workflow.compile(checkpointer=checkpointer)
+
+    def report_path(self, topic, workflow_id):
+        """Path the finished report of a run is saved to; runs of the same topic do not overwrite each other."""
+        run = str(workflow_id).replace(' ', '_').replace('/', '_')
+        return os.path.join(self.output_dir, self._topic_filename(topic, f"_{run}_report.txt"))
+
+    def cassette_path(self, topic):
+        """Path the cassette of a topic's run is recorded to and replayed from."""
+        return os.path.join(self.cassette_dir, self._topic_filename(topic, ".cassette.json"))
+
+    def _topic_filename(self, topic, suffix):
+        topic_hash = hashlib.sha256(topic.encode()).hexdigest()[:10]
+        return f"{topic.replace(' ', '_').replace('/', '_')[:50]}_{topic_hash}{suffix}"
+
+    def _node(self, name, func, afunc=None, budget_skip=None):
+        """Graph node that records a trace span around each execution.
+
+        Optional nodes pass budget_skip, the update returned instead of running them once the run budget is spent.
+        """
+        def skipped():
+            if budget_skip is None or not self._over_budget():
+                return None
+            print(f"---RUN BUDGET EXHAUSTED, SKIPPING {name.upper()}---")
+            return dict(budget_skip)
+
+        def run(state):
+            with tracing.span(name, "node"):
+                return skipped() or func(state)
+
+        if afunc is None:
+            return RunnableLambda(run)
+
+        async def arun(state):
+            with tracing.span(name, "node"):
+                return skipped() or await afunc(state)
+
+        return RunnableLambda(run, afunc=arun)
+
+    def _gate_runnables(self):
+        skip = {"feedback": "APPROVED: Skipped, run budget exhausted"}
+        return {
+            "citation_verifier": self._node("citation_verifier", self.verify_citations, self.averify_citations, skip),
+            "critic_report": self._node("critic_report", self.critique_report, self.acritique_report, skip),
+            "quality_control": self._node("quality_control", self.quality_control, self.aquality_control, skip),
+            "grammar_gate": self._node("grammar_gate", self.check_grammar, self.acheck_grammar, skip),
+        }
+
+    def _add_sequential_gates(self, workflow):
+        """Gates run one after another; each can send the report back to the writer."""
+        for name, runnable in self._gate_runnables().items():
+            workflow.add_node(name, runnable)
+
         workflow.add_edge("apa_formatter", "citation_verifier")
         workflow.add_conditional_edges(
             "citation_verifier",
@@ -117,19 +565,25 @@ class ReportWorkflow:
         workflow.add_conditional_edges(
             "grammar_gate", self.decide_grammar, {"continue": "human_feedback", "revise": "writer"}
         )
+
+    def _add_concurrent_gates(self, workflow):
+        """All gates review the same formatted report at once; their verdicts are merged into one revision."""
+        for name, runnable in self._gate_runnables().items():
+            workflow.add_node(name, runnable | RunnableLambda(lambda update, name=name: self._gate_verdict(name, update)))
+            workflow.add_edge("apa_formatter", name)
+        workflow.add_node("merge_gates", self._node("merge_gates", self.merge_gate_verdicts))
+        workflow.add_edge(list(POST_WRITING_GATES), "merge_gates")
         workflow.add_conditional_edges(
-            "human_feedback", self.decide_human_feedback, {"continue": END, "revise": "writer"}
+            "merge_gates", self.decide_gates, {"continue": "human_feedback", "revise": "writer"}
         )
 
-        app = workflow.compile()
-        final_state = app.invoke(initial_state, config={"recursion_limit": 200})
-
+    def _finalize_report(self, topic, final_state, usage=None):
         # Finalize quality report
-        quality_report = self.quality_pipeline.finalize_quality_report()
+        quality_report = self.quality_pipeline.finalize_quality_report(final_state["quality_report"])
         
         formatted_report_obj = final_state.get("formatted_report")
         if formatted_report_obj:
-            report_text = formatted_report_obj.report_text
+            report_text = self._text(formatted_report_obj.report_text)
             references_list = "\n\nReferences:\n"
             if formatted_report_obj.references:
                 for ref in formatted_report_obj.references:
@@ -151,6 +605,15 @@ class ReportWorkflow:
             for stage_report in quality_report.stage_reports:
                 quality_section += f"- **{stage_report.stage_name.replace('_', ' ').title()}:** {stage_report.overall_score:.2f} ({'✅ PASS' if stage_report.passed else '❌ FAIL'})\n"
             
+            if usage:
+                totals = usage.totals()
+                quality_section += (
+                    f"\n**LLM Usage:** {totals['calls']} calls, {totals['input_tokens']} prompt + "
+                    f"{totals['output_tokens']} completion tokens (~${totals['cost_usd']:.4f})\n"
+                )
+                if usage.exhausted_by:
+                    quality_section += f"**Run Budget:** {usage.exhausted_by} exhausted; remaining revisions and optional gates were skipped\n"
+
             quality_section += f"""
 *This report was generated with comprehensive quality assurance validation.*
 *Workflow ID: {quality_report.workflow_id}*
@@ -159,9 +622,7 @@ class ReportWorkflow:
             final_report_content = report_text + references_list + quality_section
             
             # Save the report to a Markdown file
-            topic_hash = hashlib.sha256(topic.encode()).hexdigest()[:10]
-            report_filename = f"{topic.replace(' ', '_').replace('/', '_')[:50]}_{topic_hash}_report.txt"
-            report_filepath = os.path.join(os.getcwd(), report_filename)
+            report_filepath = self.report_path(topic, quality_report.workflow_id)
             
             # Ensure the directory exists
             os.makedirs(os.path.dirname(report_filepath), exist_ok=True)
@@ -175,11 +636,34 @@ class ReportWorkflow:
 
     def plan(self, state: AgentState):
         print("---PLANNING---")
-        outline_revisions = state.get("outline_revisions", 0)
         if state.get("critique"):
             outline = self.planner.refine_outline(state["topic"], state["critique"])
         else:
             outline = self.planner.create_outline(state["topic"])
+        update = self._outline_update(state, outline)
+        prefetcher = self._prefetcher()
+        if prefetcher:
+            prefetcher.start(update["outline"], lambda section: self.retriever.retrieve(f"{state['topic']}: {section}"))
+        return update
+
+    async def aplan(self, state: AgentState):
+        print("---PLANNING---")
+        if state.get("critique"):
+            outline = await self.planner.arefine_outline(state["topic"], state["critique"])
+        else:
+            outline = await self.planner.acreate_outline(state["topic"])
+        update = self._outline_update(state, outline)
+        prefetcher = self._prefetcher()
+        if prefetcher:
+            prefetcher.astart(update["outline"], lambda section: self.retriever.aretrieve(f"{state['topic']}: {section}"))
+        return update
+
+    def _prefetcher(self):
+        """The run's prefetcher, unless prefetching is off or the run budget is spent."""
+        return None if self._over_budget() else prefetch.current()
+
+    def _outline_update(self, state: AgentState, outline: str):
+        outline_revisions = state.get("outline_revisions", 0)
         # The outline is now a list of strings
         outline_list = [section.strip() for section in outline.split('\n') if section.strip()]
         return {"outline": outline_list, "outline_revisions": outline_revisions + 1}
@@ -189,7 +673,15 @@ class ReportWorkflow:
         critique = self.critic.critique_outline("\n".join(state["outline"]))
         return {"critique": critique}
 
+    async def acritique_outline(self, state: AgentState):
+        print("---CRITIQUING OUTLINE---")
+        critique = await self.critic.acritique_outline("\n".join(state["outline"]))
+        return {"critique": critique}
+
     def decide_outline(self, state: AgentState):
+        if self._over_budget():
+            print("---RUN BUDGET EXHAUSTED, PROCEEDING WITHOUT REVISION---")
+            return "continue"
         if state["outline_revisions"] > 5:
             print("---OUTLINE REVISION LIMIT REACHED, PROCEEDING ANYWAY---")
             return "continue"
@@ -197,120 +689,161 @@ class ReportWorkflow:
             return "continue"
         return "revise"
 
-    def research_section(self, state: AgentState):
-        section_index = state.get("section_index", 0)
-        current_section = state["outline"][section_index]
+    def dispatch_research(self, state: AgentState):
+        print(f"---DISPATCHING RESEARCH FOR {len(state['outline'])} SECTIONS---")
+        prefetcher = prefetch.current()
+        if prefetcher:
+            discarded = prefetcher.assign(state["outline"])
+            if discarded:
+                print(f"---DISCARDED {discarded} PREFETCHED RETRIEVALS FOR DROPPED SECTIONS---")
+        return {"research_revisions": state.get("research_revisions", 0) + 1}
+
+    def fan_out_research(self, state: AgentState):
+        """Send every outline section to its own research branch."""
+        if not state["outline"]:
+            return "validate_research"
+        return [
+            Send("research_section", {"topic": state["topic"], "section": section})
+            for section in state["outline"]
+        ]
+
+    def research_section(self, state: SectionResearchState):
+        current_section = state["section"]
         main_topic = state["topic"]
         print(f"---RESEARCHING SECTION: {current_section}---")
         
-        # Retrieve sources for the current section
-        sources = self.retriever.retrieve(f"{main_topic}: {current_section}")
+        # Retrieve sources for the current section, unless they were prefetched for the draft outline
+        prefetcher = prefetch.current()
+        sources = prefetcher.take(current_section) if prefetcher else None
+        if sources is None:
+            sources = self.retriever.retrieve(f"{main_topic}: {current_section}")
         
         # Validate research feasibility before proceeding
         validation = self.researcher.validate_research_feasibility(current_section, sources, main_topic)
-        
         if not validation['feasible']:
-            print(f"⚠️  SKIPPING SECTION: {validation['reason']}")
-            print(f"   Recommendation: {validation['recommendation']}")
-            
-            # Track skipped sections
-            skipped_sections = state.get("skipped_sections", [])
-            skipped_sections.append({
-                'section': current_section,
-                'reason': validation['reason'],
-                'recommendation': validation['recommendation']
-            })
-            
-            return {
-                "research_results": state.get("research_results", {}),
-                "sources": state.get("sources", []),
-                "section_index": section_index + 1,
-                "current_section": current_section,
-                "skipped_sections": skipped_sections
-            }
+            return self._section_infeasible(current_section, validation)
         
         print(f"✓ Research feasible: {validation.get('source_count', 0)} sources, avg relevance: {validation.get('quality_score', 0):.2f}")
         
         # Conduct research for the current section with topic context
         research_result = self.researcher.conduct_research(current_section, sources, main_topic)
+        return self._section_research_update(current_section, sources, research_result)
+
+    async def aresearch_section(self, state: SectionResearchState):
+        current_section = state["section"]
+        main_topic = state["topic"]
+        print(f"---RESEARCHING SECTION: {current_section}---")
         
-        # Update the research results
-        current_results = state.get("research_results", {})
+        prefetcher = prefetch.current()
+        sources = await prefetcher.atake(current_section) if prefetcher else None
+        if sources is None:
+            sources = await self.retriever.aretrieve(f"{main_topic}: {current_section}")
         
+        validation = await self.researcher.avalidate_research_feasibility(current_section, sources, main_topic)
+        if not validation['feasible']:
+            return self._section_infeasible(current_section, validation)
+        
+        print(f"✓ Research feasible: {validation.get('source_count', 0)} sources, avg relevance: {validation.get('quality_score', 0):.2f}")
+        
+        research_result = await self.researcher.aconduct_research(current_section, sources, main_topic)
+        return self._section_research_update(current_section, sources, research_result)
+
+    def _section_infeasible(self, current_section, validation):
+        print(f"⚠️  SKIPPING SECTION: {validation['reason']}")
+        print(f"   Recommendation: {validation['recommendation']}")
+        
+        # Track skipped sections
+        return {
+            "skipped_sections": [{
+                'section': current_section,
+                'reason': validation['reason'],
+                'recommendation': validation['recommendation']
+            }]
+        }
+
+    def _section_research_update(self, current_section, sources, research_result):
         if research_result.get('skipped'):
             print(f"⚠️  RESEARCH DECLINED: {research_result['reason']}")
-            skipped_sections = state.get("skipped_sections", [])
-            skipped_sections.append({
-                'section': current_section,
-                'reason': research_result['reason'],
-                'recommendation': research_result.get('recommendation', 'skip_section')
-            })
-            
             return {
-                "research_results": current_results,
-                "sources": state.get("sources", []),
-                "section_index": section_index + 1,
-                "current_section": current_section,
-                "skipped_sections": skipped_sections
-            }
-        else:
-            # Store successful research with quality metrics
-            current_results[current_section] = {
-                'content': research_result['content'],
-                'quality_metrics': research_result.get('quality_metrics', {}),
-                'source_count': research_result.get('source_count', 0)
+                "skipped_sections": [{
+                    'section': current_section,
+                    'reason': research_result['reason'],
+                    'recommendation': research_result.get('recommendation', 'skip_section')
+                }]
             }
-            print(f"✓ Research completed: {research_result.get('source_count', 0)} sources used")
-        
-        # Update all sources gathered so far (only from successful research)
-        all_sources = state.get("sources", [])
-        all_sources.extend(sources)
-        # Remove duplicates
-        # Convert lists to tuples for hashability before creating a set
-        def make_hashable(obj):
-            if isinstance(obj, dict):
-                return frozenset({k: make_hashable(v) for k, v in obj.items()}.items())
-            elif isinstance(obj, list):
-                return tuple(make_hashable(elem) for elem in obj)
-            else:
-                return obj
-
-        unique_sources = [dict(item) for item in {make_hashable(d) for d in all_sources}]
 
+        print(f"✓ Research completed: {research_result.get('source_count', 0)} sources used")
+        
+        # Store successful research with quality metrics; sources are merged and
+        # given global IDs by the AgentState reducers. The notes number sources per
+        # section, so their keys are kept to renumber them before writing. Notes and
+        # abstracts go to the artifact store; the state keeps references. A section
+        # skipped in an earlier research round is no longer skipped. Keys come from the
+        # stashed sources, which are the ones the registry sees.
+        sources = self._stash_sources(sources)
         return {
-            "research_results": current_results,
-            "sources": unique_sources,
-            "section_index": section_index + 1,
-            "current_section": current_section,
-            "skipped_sections": state.get("skipped_sections", [])
+            "skipped_sections": [{'section': current_section, 'resolved': True}],
+            "research_results": {
+                current_section: {
+                    'content': self._stash(research_result['content']),
+                    'quality_metrics': research_result.get('quality_metrics', {}),
+                    'source_count': research_result.get('source_count', 0),
+                    'source_keys': [source_key(source) for source in sources],
+                }
+            },
+            "sources": sources,
         }
 
-    def decide_next_section(self, state: AgentState):
-        if state["section_index"] >= len(state["outline"]):
-            return "end_research"
-        return "continue"
-
     def write(self, state: AgentState):
         print("---WRITING---")
-        report_revisions = state.get("report_revisions", 0)
+        empty_report = self._empty_research_report(state)
+        if empty_report:
+            return empty_report
         
+        if self._is_revision(state):
+            report = self.writer.revise_report(self._report(state), state["feedback"], state.get("revision_targets"))
+        else:
+            # Pass processed research with quality context
+            report = self.writer.write_report(*self._writing_inputs(state), outline=state.get("outline"))
+        return self._writing_update(state, report)
+
+    async def awrite(self, state: AgentState):
+        print("---WRITING---")
+        empty_report = self._empty_research_report(state)
+        if empty_report:
+            return empty_report
+        
+        if self._is_revision(state):
+            report = await self.writer.arevise_report(self._report(state), state["feedback"], state.get("revision_targets"))
+        else:
+            report = await self.writer.awrite_report(*self._writing_inputs(state), outline=state.get("outline"))
+        return self._writing_update(state, report)
+
+    def _is_revision(self, state: AgentState):
+        # Only an existing draft can be revised; the first pass always writes from research
+        return bool(state.get("report")) and bool(state.get("feedback"))
+
+    def _processed_research(self, state: AgentState):
         # Process research results to extract content and add quality context
         processed_research = {}
         quality_summary = {}
+        registry = source_registry.registry_for(state.get("sources", []))
         
-        for section, research_data in state["research_results"].items():
+        for section, research_data in self._research_results(state).items():
             if isinstance(research_data, dict) and 'content' in research_data:
-                # New format with quality metrics
-                processed_research[section] = research_data['content']
+                # New format with quality metrics; per-section source numbers become global IDs
+                processed_research[section] = registry.renumber(research_data['content'], research_data.get('source_keys'))
                 quality_summary[section] = research_data.get('quality_metrics', {})
             else:
                 # Old format - just content string
                 processed_research[section] = research_data
                 quality_summary[section] = {}
-        
-        # Check for completely empty report scenario
+        return processed_research, quality_summary
+
+    def _empty_research_report(self, state: AgentState):
+        """Return a minimal report update when no section could be researched, else None"""
         total_sections = len(state.get("outline", []))
-        completed_sections = len(processed_research)
+        completed_sections = len(state["research_results"])
         skipped_sections = state.get("skipped_sections", [])
         skipped_count = len(skipped_sections)
         
@@ -341,70 +874,193 @@ This system maintains high quality standards by requiring:
 
 *This quality-first approach prevents the generation of inaccurate or irrelevant content.*
 """
-            return {"report": report, "report_revisions": report_revisions + 1}
+            return {"report": report, "report_revisions": state.get("report_revisions", 0) + 1}
+        return None
+
+    def _writing_inputs(self, state: AgentState):
+        """Arguments for WriterAgent.write_report"""
+        processed_research, quality_summary = self._processed_research(state)
+        skipped_sections = state.get("skipped_sections", [])
         
         # Include information about skipped sections
         skipped_info = ""
         if skipped_sections:
             skipped_info = f"\\n\\n**Research Quality Note:** {len(skipped_sections)} sections were skipped due to insufficient or irrelevant sources: {[s['section'] for s in skipped_sections]}"
-        
-        if state.get("feedback"):
-            report = self.writer.refine_report(state["report"], state["feedback"], state["sources"])
-        else:
-            # Pass processed research with quality context
-            report = self.writer.write_report(processed_research, state["sources"], quality_summary, skipped_info)
-        
+        return processed_research, self._sources(state), quality_summary, skipped_info
+
+    def _writing_update(self, state: AgentState, report: str):
         # Log writing statistics
+        total_sections = len(state.get("outline", []))
+        completed_sections = len(state["research_results"])
+        skipped_count = len(state.get("skipped_sections", []))
         print(f"📊 Writing Stats: {completed_sections}/{total_sections} sections completed, {skipped_count} skipped")
         
-        return {"report": report, "report_revisions": report_revisions + 1}
+        change = 1.0
+        if self._is_revision(state):
+            change = convergence.draft_change(self._report(state), report)
+            print(f"📊 Revision changed {change:.1%} of the draft")
+        return {
+            "report": self._stash(report),
+            "report_revisions": state.get("report_revisions", 0) + 1,
+            "revision_targets": [],
+            "revision_change": change,
+        }
 
     def format_report(self, state: AgentState):
         print("---FORMATTING REPORT (APA)---")
-        formatted_report = self.apa_formatter.format_report(state["report"], state["sources"])
-        return {"formatted_report": formatted_report}
+        formatted_report = self._memoized(
+            "apa_formatter", state, lambda: self.apa_formatter.format_report(self._report(state), self._sources(state))
+        )
+        return self._formatting_update(formatted_report)
+
+    async def aformat_report(self, state: AgentState):
+        print("---FORMATTING REPORT (APA)---")
+        formatted_report = await self._amemoized(
+            "apa_formatter", state, lambda: self.apa_formatter.aformat_report(self._report(state), self._sources(state))
+        )
+        return self._formatting_update(formatted_report)
+
+    def _formatting_update(self, formatted_report: FormattedReport):
+        return {"formatted_report": formatted_report.model_copy(update={"report_text": self._stash(formatted_report.report_text)})}
 
     def verify_citations(self, state: AgentState):
         print("---VERIFYING CITATIONS---")
+        verification_result = self._memoized(
+            "citation_verifier", state,
+            lambda: self.citation_verifier.verify_citations(self._formatted_text(state), self._sources(state)),
+            self._citation_result_reusable,
+        )
+        return self._citation_update(state, verification_result)
+
+    async def averify_citations(self, state: AgentState):
+        print("---VERIFYING CITATIONS---")
+        verification_result = await self._amemoized(
+            "citation_verifier", state,
+            lambda: self.citation_verifier.averify_citations(self._formatted_text(state), self._sources(state)),
+            self._citation_result_reusable,
+        )
+        return self._citation_update(state, verification_result)
+
+    @staticmethod
+    def _citation_result_reusable(verification_result):
+        # Verifications that hit a model or lookup error are redone next time
+        return (
+            verification_result.get("status") == "completed"
+            and all(f["label"] != "error" for f in verification_result.get("citation_flags", []))
+            and verification_result.get("content_validation", {}).get("confidence", 0.0) > 0.0
+        )
+
+    def _citation_update(self, state: AgentState, verification_result):
         citation_revisions = state.get("citation_revisions", 0)
-        verification_result = self.citation_verifier.verify_citations(state["formatted_report"].report_text, state["sources"])
+        # Mean of the verified share of citations and the cited share of sources
+        all_flags = verification_result.get("citation_flags", [])
+        source_count = len(state.get("sources", []))
+        verified = sum(f["label"] in ["supported", "verified"] for f in all_flags) / len(all_flags) if all_flags else 1.0
+        used = 1 - len(verification_result.get("unused_sources", [])) / source_count if source_count else 1.0
+        score = (verified + used) / 2
         if verification_result.get("needs_revision"):
-            return {"feedback": "REVISE: Citations need correction or better support.", "citation_revisions": citation_revisions + 1}
-        return {"feedback": "APPROVED: Citations verified.", "citation_revisions": citation_revisions + 1}
+            flags = [f for f in all_flags if f["label"] not in ["supported", "verified"]]
+            details = "".join(f"\n- {f.get('text', f.get('citation', ''))}: {f['label']}" for f in flags)
+            return self._scored("citation_verifier", score, {
+                "feedback": f"REVISE: Citations need correction or better support.{details}",
+                "citation_revisions": citation_revisions + 1,
+                # Only sections with problem citations are rewritten
+                "revision_targets": self.writer.sections_containing(
+                    self._formatted_text(state), [f.get("text") for f in flags]
+                ),
+            })
+        return self._scored(
+            "citation_verifier", score, {"feedback": "APPROVED: Citations verified.", "citation_revisions": citation_revisions + 1}
+        )
+
+    def _scored(self, gate, score, update):
+        """Add a gate's score for this review to its update, for the convergence checks."""
+        update["gate_scores"] = {gate: [{"score": score, "revise": update["feedback"].startswith("REVISE")}]}
+        return update
+
+    def _converged(self, state: AgentState, gates):
+        """True once the last revision barely changed the draft or raised no score of the gates asking for another."""
+        change = state.get("revision_change", 1.0)
+        if self.convergence.draft_converged(change):
+            print(f"---REVISION CONVERGED (draft changed {change:.1%}), PROCEEDING---")
+            return True
+        history = state.get("gate_scores", {})
+        if gates and all(self.convergence.score_stalled(history.get(gate, [])) for gate in gates):
+            print(f"---REVISION CONVERGED (no score gain from {', '.join(gates)}), PROCEEDING---")
+            return True
+        return False
 
     def decide_citation_verification(self, state: AgentState):
+        if self._over_budget():
+            print("---RUN BUDGET EXHAUSTED, PROCEEDING WITHOUT REVISION---")
+            return "continue"
         if state["citation_revisions"] > 3:
             print("---CITATION REVISION LIMIT REACHED, PROCEEDING ANYWAY---")
             return "continue"
         if state["feedback"].startswith("APPROVED"):
             return "continue"
+        if self._converged(state, ["citation_verifier"]):
+            return "continue"
         return "revise"
 
     def critique_report(self, state: AgentState):
         print("---CRITIQUING REPORT---")
-        feedback = self.critic.critique_report(state["formatted_report"].report_text)
+        feedback = self._memoized("critic_report", state, lambda: self.critic.critique_report(self._formatted_text(state)))
+        return {"feedback": feedback}
+
+    async def acritique_report(self, state: AgentState):
+        print("---CRITIQUING REPORT---")
+        feedback = await self._amemoized("critic_report", state, lambda: self.critic.acritique_report(self._formatted_text(state)))
         return {"feedback": feedback}
 
     def decide_report(self, state: AgentState):
+        if self._over_budget():
+            print("---RUN BUDGET EXHAUSTED, PROCEEDING WITHOUT REVISION---")
+            return "continue"
         if state["report_revisions"] > 5:
             print("---REPORT REVISION LIMIT REACHED, PROCEEDING ANYWAY---")
             return "continue"
         if state["feedback"].startswith("APPROVED"):
             return "continue"
+        # The critic gives no score, so only an unchanged draft ends its loop early
+        if self._converged(state, []):
+            return "continue"
         return "revise"
 
     def quality_control(self, state: AgentState):
         print("---QUALITY CONTROL ASSESSMENT---")
         
         try:
-            report_content = state["formatted_report"].report_text
-            sources = state["sources"]
-            section_research_results = state.get("research_results", {})
-            
-            quality_assessment = self.quality_controller.assess_content_quality(
-                report_content, sources, section_research_results
+            quality_assessment = self._memoized(
+                "quality_control", state,
+                lambda: self.quality_controller.assess_content_quality(
+                    self._formatted_text(state), self._sources(state), self._research_results(state)
+                ),
+                lambda assessment: 'error' not in assessment,
             )
-            
+        except Exception as e:
+            print(f"⚠️  Quality control failed: {e}")
+            return {"feedback": "APPROVED: Quality control error, proceeding with manual review"}
+        return self._quality_control_update(quality_assessment)
+
+    async def aquality_control(self, state: AgentState):
+        print("---QUALITY CONTROL ASSESSMENT---")
+        
+        try:
+            quality_assessment = await self._amemoized(
+                "quality_control", state,
+                lambda: self.quality_controller.aassess_content_quality(
+                    self._formatted_text(state), self._sources(state), self._research_results(state)
+                ),
+                lambda assessment: 'error' not in assessment,
+            )
+        except Exception as e:
+            print(f"⚠️  Quality control failed: {e}")
+            return {"feedback": "APPROVED: Quality control error, proceeding with manual review"}
+        return self._quality_control_update(quality_assessment)
+
+    def _quality_control_update(self, quality_assessment):
+        try:
             # Check for assessment errors
             if 'error' in quality_assessment:
                 print(f"⚠️  Quality assessment error: {quality_assessment['error']}")
@@ -423,6 +1079,7 @@ This system maintains high quality standards by requiring:
             else:
                 print("✓ Quality assessment passed")
                 feedback = "APPROVED: Quality control passed"
+            return self._scored("quality_control", quality_assessment['overall_score'], {"feedback": feedback})
                 
         except Exception as e:
             print(f"⚠️  Quality control failed: {e}")
@@ -432,12 +1089,19 @@ This system maintains high quality standards by requiring:
 
     def validate_outline_quality(self, state: AgentState):
         print("---VALIDATING OUTLINE QUALITY---")
-        
-        outline = state["outline"]
-        topic = state["topic"]
-        
-        validation_report = self.quality_pipeline.validate_outline_quality(outline, topic)
-        
+        validation_report = self._memoized(
+            "validate_outline", state, lambda: self.quality_pipeline.validate_outline_quality(state["outline"], state["topic"])
+        )
+        return self._outline_validation_update(state, validation_report)
+
+    async def avalidate_outline_quality(self, state: AgentState):
+        print("---VALIDATING OUTLINE QUALITY---")
+        validation_report = await self._amemoized(
+            "validate_outline", state, lambda: self.quality_pipeline.avalidate_outline_quality(state["outline"], state["topic"])
+        )
+        return self._outline_validation_update(state, validation_report)
+
+    def _outline_validation_update(self, state: AgentState, validation_report):
         # Update state with quality information
         state["quality_report"].add_stage_report(validation_report)
         
@@ -452,8 +1116,8 @@ This system maintains high quality standards by requiring:
     def validate_research_quality(self, state: AgentState):
         print("---VALIDATING RESEARCH QUALITY---")
         
-        research_results = state["research_results"]
-        sources = state["sources"]
+        research_results = self._research_results(state)
+        sources = self._sources(state)
         skipped_sections = state["skipped_sections"]
         
         validation_report = self.quality_pipeline.validate_research_quality(
@@ -464,7 +1128,7 @@ This system maintains high quality standards by requiring:
         state["quality_report"].add_stage_report(validation_report)
         
         # Check for early termination
-        if self.quality_pipeline.should_terminate_early():
+        if self.quality_pipeline.should_terminate_early(state["quality_report"]):
             feedback = "TERMINATE: Multiple quality gates failed - recommend stopping workflow"
         elif validation_report.passed:
             feedback = "APPROVED: Research meets quality standards"
@@ -477,10 +1141,12 @@ This system maintains high quality standards by requiring:
     def validate_content_coherence(self, state: AgentState):
         print("---VALIDATING CONTENT COHERENCE---")
         
-        report_content = state["report"]
+        report_content = self._report(state)
         outline = state["outline"]
         
-        validation_report = self.quality_pipeline.validate_content_coherence(report_content, outline)
+        validation_report = self._memoized(
+            "validate_coherence", state, lambda: self.quality_pipeline.validate_content_coherence(report_content, outline)
+        )
         
         # Update state with quality information
         state["quality_report"].add_stage_report(validation_report)
@@ -491,9 +1157,12 @@ This system maintains high quality standards by requiring:
             recommendations = "; ".join(validation_report.recommendations[:2])
             feedback = f"REVISE: {recommendations}"
         
-        return {"feedback": feedback}
+        return self._scored("validate_coherence", validation_report.overall_score, {"feedback": feedback})
     
     def decide_outline_validation(self, state: AgentState):
+        if self._over_budget():
+            print("---RUN BUDGET EXHAUSTED, PROCEEDING WITHOUT REVISION---")
+            return "continue"
         if state["outline_revisions"] > 3:
             print("---OUTLINE VALIDATION LIMIT REACHED, PROCEEDING---")
             return "continue"
@@ -502,6 +1171,12 @@ This system maintains high quality standards by requiring:
         return "revise"
     
     def decide_research_validation(self, state: AgentState):
+        if self._over_budget():
+            print("---RUN BUDGET EXHAUSTED, PROCEEDING WITHOUT REVISION---")
+            return "continue"
+        if state["research_revisions"] > 2:
+            print("---RESEARCH REVISION LIMIT REACHED, PROCEEDING---")
+            return "continue"
         if "TERMINATE" in state["feedback"]:
             print("---EARLY TERMINATION TRIGGERED---")
             return "revise"
@@ -510,32 +1185,118 @@ This system maintains high quality standards by requiring:
         return "revise"
     
     def decide_coherence_validation(self, state: AgentState):
+        if self._over_budget():
+            print("---RUN BUDGET EXHAUSTED, PROCEEDING WITHOUT REVISION---")
+            return "continue"
         if state["report_revisions"] > 3:
             print("---COHERENCE VALIDATION LIMIT REACHED, PROCEEDING---")
             return "continue"
         if state["feedback"].startswith("APPROVED"):
             return "continue"
+        if self._converged(state, ["validate_coherence"]):
+            return "continue"
         return "revise"
 
     def decide_quality_control(self, state: AgentState):
+        if self._over_budget():
+            print("---RUN BUDGET EXHAUSTED, PROCEEDING WITHOUT REVISION---")
+            return "continue"
         if state["report_revisions"] > 5:
             print("---QUALITY CONTROL REVISION LIMIT REACHED, PROCEEDING ANYWAY---")
             return "continue"
         if state["feedback"].startswith("APPROVED"):
             return "continue"
+        if self._converged(state, ["quality_control"]):
+            return "continue"
         return "revise"
 
     def check_grammar(self, state: AgentState):
         print("---CHECKING GRAMMAR AND STYLE---")
-        grammar_check_result = self.grammar_gate.check_grammar_and_style(state["formatted_report"].report_text)
+        grammar_check_result = self._memoized(
+            "grammar_gate", state, lambda: self.grammar_gate.check_grammar_and_style(self._formatted_text(state)),
+            lambda result: result.get("status") != "error",
+        )
+        return self._grammar_update(state, grammar_check_result)
+
+    async def acheck_grammar(self, state: AgentState):
+        print("---CHECKING GRAMMAR AND STYLE---")
+        grammar_check_result = await self._amemoized(
+            "grammar_gate", state, lambda: self.grammar_gate.acheck_grammar_and_style(self._formatted_text(state)),
+            lambda result: result.get("status") != "error",
+        )
+        return self._grammar_update(state, grammar_check_result)
+
+    def _grammar_update(self, state: AgentState, grammar_check_result):
         error_count = grammar_check_result.get("error_count", 0)
+        # Fewer errors score higher; one error less counts as progress
+        score = -error_count
         if error_count > 2:
-            return {"feedback": f"REVISE: Grammar and style issues found. Errors: {error_count}"}
-        return {"feedback": "APPROVED: Grammar and style check passed."}
+            errors = grammar_check_result.get("errors", [])
+            details = "".join(f"\n- {e['message']} (\"{e['context']}\")" for e in errors[:10])
+            offsets = [e["text_offset"] for e in errors if e.get("text_offset") is not None]
+            return self._scored("grammar_gate", score, {
+                "feedback": f"REVISE: Grammar and style issues found. Errors: {error_count}{details}",
+                "revision_targets": self.writer.sections_at_offsets(self._formatted_text(state), offsets),
+            })
+        return self._scored("grammar_gate", score, {"feedback": "APPROVED: Grammar and style check passed."})
 
     def decide_grammar(self, state: AgentState):
+        if self._over_budget():
+            print("---RUN BUDGET EXHAUSTED, PROCEEDING WITHOUT REVISION---")
+            return "continue"
+        if state["report_revisions"] > 5:
+            print("---GRAMMAR REVISION LIMIT REACHED, PROCEEDING ANYWAY---")
+            return "continue"
+        if state["feedback"].startswith("APPROVED"):
+            return "continue"
+        if self._converged(state, ["grammar_gate"]):
+            return "continue"
+        return "revise"
+
+    def _gate_verdict(self, name, update):
+        """Move a gate's feedback into its gate_feedback entry so concurrent gates don't collide."""
+        update = dict(update)
+        verdict = {"feedback": update.pop("feedback"), "revision_targets": update.pop("revision_targets", [])}
+        update["gate_feedback"] = {name: verdict}
+        return update
+
+    def merge_gate_verdicts(self, state: AgentState):
+        print("---MERGING GATE VERDICTS---")
+        verdicts = dict(state["gate_feedback"])
+        if state["citation_revisions"] > 3 and "citation_verifier" in verdicts:
+            print("---CITATION REVISION LIMIT REACHED, IGNORING CITATION VERDICT---")
+            del verdicts["citation_verifier"]
+
+        revising = {name: v for name, v in verdicts.items() if not v["feedback"].startswith("APPROVED")}
+        if not revising:
+            return {"feedback": "APPROVED: All post-writing gates passed.", "revision_targets": []}
+
+        feedback = "REVISE: " + "\n\n".join(
+            f"[{POST_WRITING_GATES[name]}] {v['feedback'].removeprefix('REVISE:').strip()}" for name, v in revising.items()
+        )
+        # Scope the revision only if every complaining gate could attribute its findings
+        targets = []
+        if all(v["revision_targets"] for v in revising.values()):
+            for v in revising.values():
+                targets.extend(t for t in v["revision_targets"] if t not in targets)
+        print(f"⚠️  {len(revising)}/{len(verdicts)} gates requested revisions: {', '.join(revising)}")
+        return {"feedback": feedback, "revision_targets": targets}
+
+    def decide_gates(self, state: AgentState):
+        if self._over_budget():
+            print("---RUN BUDGET EXHAUSTED, PROCEEDING WITHOUT REVISION---")
+            return "continue"
+        if state["report_revisions"] > 5:
+            print("---REPORT REVISION LIMIT REACHED, PROCEEDING ANYWAY---")
+            return "continue"
         if state["feedback"].startswith("APPROVED"):
             return "continue"
+        revising = [
+            name for name, v in state.get("gate_feedback", {}).items()
+            if not v["feedback"].startswith("APPROVED") and not (name == "citation_verifier" and state["citation_revisions"] > 3)
+        ]
+        if self._converged(state, revising):
+            return "continue"
         return "revise"
 
     def get_human_feedback(self, state: AgentState):
@@ -551,10 +1312,32 @@ This system maintains high quality standards by requiring:
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("topic", help="The topic for the report.")
+    parser.add_argument("topic", nargs="?", help="The topic for the report.")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Run the workflow on the asyncio event loop.")
+    parser.add_argument("--resume", metavar="WORKFLOW_ID", help="Continue an interrupted run from its last checkpoint.")
+    parser.add_argument("--trace", metavar="DIR", nargs="?", const="traces", help="Write a Chrome trace of the run to DIR (default: traces).")
+    cassettes = parser.add_mutually_exclusive_group()
+    cassettes.add_argument("--record", metavar="DIR", nargs="?", const="cassettes", help="Record all model and HTTP traffic to a cassette in DIR (default: cassettes).")
+    cassettes.add_argument("--replay", metavar="DIR", nargs="?", const="cassettes", help="Replay the run offline from its cassette in DIR (default: cassettes).")
+    parser.add_argument("--simulate-latency", action="store_true", default=None, help="Sleep for the recorded latencies when replaying.")
     args = parser.parse_args()
+    if not args.topic and not args.resume:
+        parser.error("a topic is required unless --resume is given")
 
-    workflow = ReportWorkflow()
-    report = workflow.run(args.topic)
+    workflow = ReportWorkflow(
+        trace_dir=args.trace,
+        cassette_mode="record" if args.record else "replay" if args.replay else None,
+        cassette_dir=args.record or args.replay,
+        simulate_latency=args.simulate_latency,
+    )
+    if args.resume:
+        if args.use_async:
+            report = asyncio.run(workflow.aresume(args.resume))
+        else:
+            report = workflow.resume(args.resume)
+    elif args.use_async:
+        report = asyncio.run(workflow.arun(args.topic))
+    else:
+        report = workflow.run(args.topic)
     print("---FINAL REPORT---")
     print(report)
\ No newline at end of file
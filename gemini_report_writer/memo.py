@@ -0,0 +1,134 @@
+"""
+Persistent memoization of node results keyed by a hash of their inputs.
+
+Several nodes compute a pure function of a few AgentState keys: the APA formatter of the
+report and sources, coherence validation of the report and outline, the gates of the
+formatted report. Their results are stored in a local SQLite file under the hash of the
+node name and those inputs, so a loop iteration or a later run of the same topic that
+reaches a node with unchanged inputs reuses the result instead of paying for the model
+calls again. Entries are evicted least recently used first once the file outgrows its
+size limit, and dropped once unused for longer than max_age_seconds.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from checkpointing import CompressedSerializer
+
+DEFAULT_MEMO_PATH = os.path.join(".checkpoints", "node_memo.sqlite")
+
+def _jsonable(value):
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if hasattr(value, "__dict__"):
+        return vars(value)
+    return repr(value)
+
+def input_hash(node, inputs, salt="") -> str:
+    """Stable hash of a node name and its input values."""
+    payload = json.dumps([salt, node, inputs], sort_keys=True, default=_jsonable)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class NodeMemo:
+    """Node results in SQLite keyed by input hash, evicted least recently used first.
+
+    salt is mixed into every key; pass anything results depend on besides the node
+    inputs (configuration, model backend) so a change to it never serves stale results.
+    """
+
+    def __init__(self, path=DEFAULT_MEMO_PATH, max_bytes=64 * 1024 * 1024, max_age_seconds=None, salt="",
+                 compression_level=6):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.salt = salt
+        self.serde = CompressedSerializer(compression_level)
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+        self._conn = None
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            # Sync nodes run on worker threads; every access holds the lock
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            # A lost write only costs a recomputation, so skip the fsync on every commit
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS node_memo (key TEXT PRIMARY KEY, node TEXT, type TEXT, "
+                "value BLOB, size INTEGER, used_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS node_memo_used_at ON node_memo (used_at)")
+            self._conn.commit()
+            self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM node_memo").fetchone()[0]
+        return self._conn
+
+    def key(self, node, inputs) -> str:
+        return input_hash(node, inputs, self.salt)
+
+    def get(self, key):
+        """(True, result) for a stored key, else (False, None)."""
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT type, value, used_at FROM node_memo WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is not None and self.max_age_seconds is not None and row[2] < now - self.max_age_seconds:
+                self._delete(conn, key)
+                conn.commit()
+                row = None
+            if row is None:
+                self.stats["misses"] += 1
+                return False, None
+            conn.execute("UPDATE node_memo SET used_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.stats["hits"] += 1
+        return True, self.serde.loads_typed((row[0], row[1]))
+
+    def put(self, key, node, value):
+        """Store a node result, then evict old entries until the file fits max_bytes again."""
+        type_, data = self.serde.dumps_typed(value)
+        with self._lock:
+            conn = self._connection()
+            self._delete(conn, key)
+            conn.execute(
+                "INSERT INTO node_memo (key, node, type, value, size, used_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, node, type_, data, len(data), time.time()),
+            )
+            self._total_bytes += len(data)
+            self._evict(conn)
+            conn.commit()
+
+    def _delete(self, conn, key):
+        row = conn.execute("SELECT size FROM node_memo WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM node_memo WHERE key = ?", (key,))
+            self._total_bytes -= row[0]
+
+    def _evict(self, conn):
+        if self.max_age_seconds is not None:
+            cutoff = time.time() - self.max_age_seconds
+            expired = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM node_memo WHERE used_at < ?", (cutoff,)).fetchone()
+            if expired[0]:
+                conn.execute("DELETE FROM node_memo WHERE used_at < ?", (cutoff,))
+                self._total_bytes -= expired[1]
+                self.stats["evicted"] += expired[0]
+        if self._total_bytes <= self.max_bytes:
+            return
+        # Keep the newest entry even if it alone exceeds the limit
+        for key, size in conn.execute("SELECT key, size FROM node_memo ORDER BY used_at ASC").fetchall()[:-1]:
+            if self._total_bytes <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM node_memo WHERE key = ?", (key,))
+            self._total_bytes -= size
+            self.stats["evicted"] += 1
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,163 @@
+"""
+Speculative retrieval for draft outlines.
+
+As soon as the planner returns an outline, retrieval for each of its sections starts in
+the background, so the slowest I/O stage overlaps the outline critique and validation.
+When research is dispatched, each section of the approved outline is matched to the
+prefetch of the same or a similar draft section; prefetches no approved section matches
+are cancelled then. One Prefetcher is bound to the current context per run, like the
+run's tracer and budget, and closing it drops whatever was never claimed.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import difflib
+import re
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+import tracing
+
+_current_prefetcher = contextvars.ContextVar("current_prefetcher", default=None)
+
+def normalize_section(section: str) -> str:
+    """Section title without numbering, punctuation or case ("2. Labor-Market Effects" -> "labor market effects")."""
+    title = re.sub(r'^\s*(?:[0-9]+|[ivxlc]+)[.)]\s+', '', section.lower())
+    return " ".join(re.findall(r'[a-z0-9]+', title))
+
+def _similarity(a: str, b: str) -> float:
+    """Similarity of two normalized section titles, 0.0 to 1.0."""
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+class Prefetcher:
+    """Background retrievals keyed by draft section, claimed at most once by approved sections."""
+
+    def __init__(self, max_workers=4, min_similarity=0.8):
+        self.max_workers = max(1, max_workers)
+        self.min_similarity = min_similarity
+        self._pending: Dict[str, object] = {}   # normalized draft section -> future or task
+        self._assigned: Dict[str, object] = {}  # normalized approved section -> future or task
+        self._lock = threading.Lock()
+        self._executor = None
+        self._loop = None
+        self._semaphore = None
+        self.stats = {"started": 0, "reused": 0, "discarded": 0}
+
+    def _track(self, key, future):
+        self._pending[key] = future
+        self.stats["started"] += 1
+
+    def start(self, sections, retrieve):
+        """Run retrieve(section) on worker threads for every section not prefetched yet."""
+        with self._lock:
+            for section in sections:
+                key = normalize_section(section)
+                if key in self._pending or key in self._assigned:
+                    continue
+                if self._executor is None:
+                    self._executor = ContextThreadPoolExecutor(max_workers=self.max_workers)
+                self._track(key, self._executor.submit(self._retrieve, section, retrieve))
+
+    def astart(self, sections, aretrieve):
+        """Run aretrieve(section) as tasks on the running event loop for every section not prefetched yet."""
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.max_workers)
+            for section in sections:
+                key = normalize_section(section)
+                if key in self._pending or key in self._assigned:
+                    continue
+                task = asyncio.ensure_future(self._aretrieve(section, aretrieve))
+                # Failures surface when a section claims the result; never-claimed ones stay quiet
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                self._track(key, task)
+
+    def _retrieve(self, section, retrieve):
+        with tracing.span(f"prefetch {section}", "prefetch"):
+            return retrieve(section)
+
+    async def _aretrieve(self, section, aretrieve):
+        async with self._semaphore:
+            with tracing.span(f"prefetch {section}", "prefetch"):
+                return await aretrieve(section)
+
+    def assign(self, outline):
+        """Match approved sections to prefetches (same section first, then the most similar) and cancel the rest."""
+        with self._lock:
+            wanted = [normalize_section(section) for section in outline]
+            for key in wanted:
+                if key in self._pending:
+                    self._assigned[key] = self._pending.pop(key)
+            for key in wanted:
+                if key in self._assigned or not self._pending:
+                    continue
+                best = max(self._pending, key=lambda draft: _similarity(draft, key))
+                if _similarity(best, key) >= self.min_similarity:
+                    self._assigned[key] = self._pending.pop(best)
+            discarded, self._pending = list(self._pending.values()), {}
+        self._cancel(discarded)
+        return len(discarded)
+
+    def _cancel(self, futures):
+        self.stats["discarded"] += len(futures)
+        for future in futures:
+            if isinstance(future, concurrent.futures.Future):
+                future.cancel()
+            elif self._loop is not None and not self._loop.is_closed():
+                # Tasks belong to the run's event loop; sync nodes run on worker threads
+                self._loop.call_soon_threadsafe(future.cancel)
+
+    def _claim(self, section):
+        with self._lock:
+            return self._assigned.pop(normalize_section(section), None)
+
+    def take(self, section) -> Optional[list]:
+        """Sources prefetched for an approved section, or None if there are none or the prefetch failed."""
+        future = self._claim(section)
+        if future is None:
+            return None
+        try:
+            sources = future.result()
+        except Exception as e:
+            print(f"⚠️  Prefetched retrieval for {section} failed, retrieving again: {e}")
+            return None
+        self.stats["reused"] += 1
+        return sources
+
+    async def atake(self, section) -> Optional[list]:
+        """Async variant of take."""
+        future = self._claim(section)
+        if future is None:
+            return None
+        try:
+            sources = await (asyncio.wrap_future(future) if isinstance(future, concurrent.futures.Future) else future)
+        except Exception as e:
+            print(f"⚠️  Prefetched retrieval for {section} failed, retrieving again: {e}")
+            return None
+        self.stats["reused"] += 1
+        return sources
+
+    def close(self):
+        """Cancel every prefetch that was never claimed."""
+        with self._lock:
+            leftovers = list(self._pending.values()) + list(self._assigned.values())
+            self._pending, self._assigned = {}, {}
+        self._cancel(leftovers)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+def current() -> Optional[Prefetcher]:
+    return _current_prefetcher.get()
+
+@contextmanager
+def use(max_workers=4, min_similarity=0.8):
+    """Bind a new Prefetcher to the current context for the duration of a run."""
+    prefetcher = Prefetcher(max_workers, min_similarity)
+    token = _current_prefetcher.set(prefetcher)
+    try:
+        yield prefetcher
+    finally:
+        _current_prefetcher.reset(token)
+        prefetcher.close()
@@ -0,0 +1,278 @@
+"""
+Process-wide rate limiting and adaptive concurrency for provider model calls.
+
+Every call to a provider model goes through the ModelGovernor of its model. It waits for
+a slot under an adaptive in-flight limit and then for a token from the model's
+requests-per-minute bucket. The in-flight limit grows by one per window of successful
+calls, halves when the provider throttles (HTTP 429 / RESOURCE_EXHAUSTED) and shrinks
+when latency spikes well above its running average, so the process settles at the
+provider's real ceiling instead of running into error storms. Time spent waiting is
+recorded per model and exposed through stats().
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict
+
+# Substrings of errors providers raise when they throttle a caller
+THROTTLE_MARKERS = ("429", "resource_exhausted", "resourceexhausted", "rate limit", "ratelimit", "too many requests")
+
+def is_throttle(error) -> bool:
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in THROTTLE_MARKERS)
+
+class TokenBucket:
+    """Requests-per-minute limit with a burst allowance; callers reserve tokens in arrival order."""
+
+    def __init__(self, rate_per_minute, burst=None):
+        self._lock = threading.Lock()
+        self._tokens = None
+        self.set_rate(rate_per_minute, burst)
+
+    def set_rate(self, rate_per_minute, burst=None):
+        """Change the rate; tokens already earned or owed are kept, up to the new capacity."""
+        with self._lock:
+            now = time.monotonic()
+            if self._tokens is not None:
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+            self.rate_per_second = rate_per_minute / 60.0
+            # Ten seconds' worth by default, so a cold start cannot spend a whole minute's quota at once
+            self.capacity = burst or max(1.0, rate_per_minute / 6.0)
+            self._tokens = self.capacity if self._tokens is None else min(self._tokens, self.capacity)
+            self._updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return how long to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate_per_second)
+
+    def acquire(self) -> float:
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self) -> float:
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+class _Waiter:
+    __slots__ = ("event", "future", "loop", "granted")
+
+    def __init__(self, event=None, future=None, loop=None):
+        self.event, self.future, self.loop = event, future, loop
+        self.granted = False
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+class AdaptiveConcurrency:
+    """In-flight limit adjusted by additive increase, multiplicative decrease; shared by threads and event loops.
+
+    Waiters are served first come, first served. A success raises the limit by 1/limit
+    (one per window of limit calls), a throttled call halves it and a call slower than
+    latency_factor times the running average latency cuts it by a tenth.
+    """
+
+    def __init__(self, max_limit=16, min_limit=1, latency_factor=3.0):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.latency_factor = latency_factor
+        self.limit = float(self.max_limit)
+        self.latency_ewma = None
+        self._in_flight = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def set_limits(self, max_limit, min_limit=1):
+        with self._lock:
+            self.max_limit = max(1, max_limit)
+            self.min_limit = max(1, min(min_limit, self.max_limit))
+            self.limit = min(max(self.limit, self.min_limit), self.max_limit)
+            self._wake()
+
+    def _has_room(self):
+        return self._in_flight < int(self.limit)
+
+    def _wake(self):
+        while self._waiters and self._has_room():
+            waiter = self._waiters.popleft()
+            waiter.granted = True
+            self._in_flight += 1
+            if waiter.event is not None:
+                waiter.event.set()
+                continue
+            try:
+                waiter.loop.call_soon_threadsafe(_resolve, waiter.future)
+            except RuntimeError:
+                # The waiter's event loop is closed; nobody will use the slot
+                waiter.granted = False
+                self._in_flight -= 1
+
+    def acquire(self):
+        with self._lock:
+            if self._has_room() and not self._waiters:
+                self._in_flight += 1
+                return
+            waiter = _Waiter(event=threading.Event())
+            self._waiters.append(waiter)
+        waiter.event.wait()
+
+    async def aacquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._has_room() and not self._waiters:
+                self._in_flight += 1
+                return
+            waiter = _Waiter(future=loop.create_future(), loop=loop)
+            self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    self._in_flight -= 1
+                    self._wake()
+                else:
+                    self._waiters.remove(waiter)
+            raise
+
+    def release(self, latency=None, throttled=False):
+        """Free a slot and adapt the limit to how the call went (latency is None for failed calls)."""
+        with self._lock:
+            self._in_flight -= 1
+            if throttled:
+                self.limit = max(self.min_limit, self.limit / 2)
+            elif latency is not None:
+                if self.latency_ewma is not None and latency > self.latency_ewma * self.latency_factor:
+                    self.limit = max(self.min_limit, self.limit * 0.9)
+                else:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                # A lasting slowdown becomes the new normal, so the limit can grow again
+                self.latency_ewma = latency if self.latency_ewma is None else 0.9 * self.latency_ewma + 0.1 * latency
+            self._wake()
+
+class ModelGovernor:
+    """Rate limit, adaptive concurrency and queue-time metrics for one model."""
+
+    def __init__(self, model_name, rate_per_minute=None, max_concurrency=16, min_concurrency=1, latency_factor=3.0):
+        self.model_name = model_name
+        self.bucket = TokenBucket(rate_per_minute) if rate_per_minute else None
+        self.concurrency = AdaptiveConcurrency(max_concurrency, min_concurrency, latency_factor)
+        self._metrics = {"calls": 0, "throttled": 0, "queue_seconds": 0.0, "max_queue_seconds": 0.0}
+        self._lock = threading.Lock()
+
+    def configure(self, rate_per_minute=None, max_concurrency=16, min_concurrency=1):
+        if not rate_per_minute:
+            self.bucket = None
+        elif self.bucket is None:
+            self.bucket = TokenBucket(rate_per_minute)
+        else:
+            self.bucket.set_rate(rate_per_minute)
+        self.concurrency.set_limits(max_concurrency, min_concurrency)
+
+    def _queued(self, seconds):
+        with self._lock:
+            self._metrics["calls"] += 1
+            self._metrics["queue_seconds"] += seconds
+            self._metrics["max_queue_seconds"] = max(self._metrics["max_queue_seconds"], seconds)
+
+    def _finished(self, started, error):
+        throttled = error is not None and is_throttle(error)
+        if throttled:
+            with self._lock:
+                self._metrics["throttled"] += 1
+        self.concurrency.release(None if error is not None else time.perf_counter() - started, throttled)
+
+    @contextmanager
+    def slot(self):
+        """Hold a concurrency slot and a rate token for the duration of one call; yields the seconds spent queued."""
+        queued = time.perf_counter()
+        self.concurrency.acquire()
+        try:
+            if self.bucket:
+                self.bucket.acquire()
+        except BaseException:
+            self.concurrency.release()
+            raise
+        started = time.perf_counter()
+        self._queued(started - queued)
+        try:
+            yield started - queued
+        except Exception as e:
+            self._finished(started, e)
+            raise
+        except BaseException:
+            self.concurrency.release()
+            raise
+        self._finished(started, None)
+
+    @asynccontextmanager
+    async def aslot(self):
+        """Async variant of slot."""
+        queued = time.perf_counter()
+        await self.concurrency.aacquire()
+        try:
+            if self.bucket:
+                await self.bucket.aacquire()
+        except BaseException:
+            self.concurrency.release()
+            raise
+        started = time.perf_counter()
+        self._queued(started - queued)
+        try:
+            yield started - queued
+        except Exception as e:
+            self._finished(started, e)
+            raise
+        except BaseException:
+            self.concurrency.release()
+            raise
+        self._finished(started, None)
+
+    def stats(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics["avg_queue_seconds"] = metrics["queue_seconds"] / metrics["calls"] if metrics["calls"] else 0.0
+        metrics["concurrency_limit"] = int(self.concurrency.limit)
+        metrics["in_flight"] = self.concurrency.in_flight
+        metrics["rate_per_minute"] = self.bucket.rate_per_second * 60 if self.bucket else None
+        return metrics
+
+# Settings applied to every governor, current and future (see configure)
+_settings = {"rate_per_minute": None, "max_concurrency": 16, "min_concurrency": 1}
+_governors: Dict[str, ModelGovernor] = {}
+_registry_lock = threading.Lock()
+
+def configure(rate_per_minute=None, max_concurrency=16, min_concurrency=1):
+    """Set the per-model request rate and concurrency bounds for the whole process."""
+    with _registry_lock:
+        _settings.update(rate_per_minute=rate_per_minute, max_concurrency=max_concurrency, min_concurrency=min_concurrency)
+        for governor in _governors.values():
+            governor.configure(**_settings)
+
+def governor(model_name) -> ModelGovernor:
+    """The process-wide governor of a model, created on first use."""
+    with _registry_lock:
+        if model_name not in _governors:
+            _governors[model_name] = ModelGovernor(model_name, **_settings)
+        return _governors[model_name]
+
+def stats():
+    """Queue-time, throttling and concurrency metrics per model."""
+    with _registry_lock:
+        governors = list(_governors.values())
+    return {g.model_name: g.stats() for g in governors}
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Long-running report service.
+
+A small local HTTP API in front of a job queue. Jobs run on one warm ReportWorkflow
+and one long-lived event loop, so the compiled graph, model clients, Redis pools and
+HTTP sessions are built once and reused by every job.
+
+    POST /jobs               {"topic": "..."}  -> 202 {"job_id": ..., "status": "queued"}
+    GET  /jobs               list of job statuses
+    GET  /jobs/<id>          job status and timings
+    GET  /jobs/<id>/result   the finished report (409 until the job completes)
+    GET  /health             liveness, queue depth and per-model rate limiter metrics
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from main import ReportWorkflow
+import ratelimit
+from utils import configure_request_limits
+
+class ReportService:
+    """Queues submitted topics and runs them on a warm workflow in a background event loop."""
+
+    def __init__(self, workflow=None, max_concurrent_reports=None):
+        self.workflow = workflow or ReportWorkflow()
+        self.max_concurrent_reports = max_concurrent_reports or self.workflow.quality_pipeline.get_setting(
+            'performance.max_concurrent_reports', 4
+        )
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="report-service-loop", daemon=True)
+        # Jobs submitted before start() wait here until the workers come up
+        self.queue = asyncio.Queue()
+        self._workers = []
+
+    def start(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start_workers(), self.loop).result()
+
+    def stop(self):
+        if not self._thread.is_alive():
+            # Never started: no loop is running to cancel workers on
+            self.loop.close()
+            return
+        asyncio.run_coroutine_threadsafe(self._stop_workers(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        self.loop.close()
+
+    async def _start_workers(self):
+        self._workers = [self.loop.create_task(self._worker()) for _ in range(self.max_concurrent_reports)]
+
+    async def _stop_workers(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    async def _worker(self):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self._run_job(job_id)
+            finally:
+                self.queue.task_done()
+
+    async def _run_job(self, job_id):
+        job = self.jobs[job_id]
+        self._update(job_id, status="running", started_at=time.time())
+        try:
+            report = await self.workflow.arun(job["topic"], workflow_id=job_id)
+            if report == "No report generated.":
+                self._update(job_id, status="no_report")
+            else:
+                self._update(job_id, status="completed", result=report, report_path=self.workflow.report_path(job["topic"], job_id))
+        except Exception as e:
+            # The job's checkpoints survive, so it can be resumed with main.py --resume <job_id>
+            self._update(job_id, status="failed", error=f"{type(e).__name__}: {e}")
+        finished = time.time()
+        self._update(job_id, finished_at=finished, duration_seconds=round(finished - job["started_at"], 3))
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self.jobs[job_id].update(fields)
+
+    def submit(self, topic):
+        job_id = f"job_{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self.jobs[job_id] = {"job_id": job_id, "topic": topic, "status": "queued", "submitted_at": time.time()}
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, job_id)
+        return self.status(job_id)
+
+    def status(self, job_id):
+        """Job record without the report body, or None for unknown jobs."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return {k: v for k, v in job.items() if k != "result"} if job else None
+
+    def result(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return (job["status"], job.get("result")) if job else (None, None)
+
+    def list_jobs(self):
+        with self._lock:
+            job_ids = list(self.jobs)
+        return [self.status(job_id) for job_id in job_ids]
+
+    def queue_depth(self):
+        with self._lock:
+            return sum(1 for job in self.jobs.values() if job["status"] == "queued")
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """JSON API over the ReportService attached to the server."""
+
+    @property
+    def service(self) -> ReportService:
+        return self.server.service
+
+    def _send(self, status, body, content_type="application/json"):
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _path_parts(self):
+        return [part for part in self.path.split("?", 1)[0].split("/") if part]
+
+    def do_GET(self):
+        parts = self._path_parts()
+        if parts == ["health"]:
+            return self._send(200, {"status": "ok", "queued": self.service.queue_depth(), "models": ratelimit.stats()})
+        if parts == ["jobs"]:
+            return self._send(200, {"jobs": self.service.list_jobs()})
+        if len(parts) == 2 and parts[0] == "jobs":
+            job = self.service.status(parts[1])
+            return self._send(200, job) if job else self._send(404, {"error": "unknown job"})
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "result":
+            status, report = self.service.result(parts[1])
+            if status is None:
+                return self._send(404, {"error": "unknown job"})
+            if status in ("queued", "running"):
+                return self._send(409, {"error": f"job is {status}"})
+            if report is None:
+                return self._send(409, {"error": f"job {status}"})
+            return self._send(200, report.encode("utf-8"), content_type="text/markdown; charset=utf-8")
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self._path_parts() != ["jobs"]:
+            return self._send(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            topic = json.loads(self.rfile.read(length) or b"{}").get("topic", "").strip()
+        except (ValueError, AttributeError):
+            return self._send(400, {"error": "body must be a JSON object"})
+        if not topic:
+            return self._send(400, {"error": "topic is required"})
+        self._send(202, self.service.submit(topic))
+
+def create_server(service, host="127.0.0.1", port=8080):
+    server = ThreadingHTTPServer((host, port), ServiceRequestHandler)
+    server.service = service
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve report generation over a local HTTP API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-concurrent-reports", type=int, help="Jobs processed at the same time.")
+    parser.add_argument("--max-llm-requests", type=int, help="Global cap on in-flight LLM calls.")
+    parser.add_argument("--max-search-requests", type=int, help="Global cap on in-flight search and HTTP requests.")
+    args = parser.parse_args()
+
+    service = ReportService(max_concurrent_reports=args.max_concurrent_reports)
+    get_setting = service.workflow.quality_pipeline.get_setting
+    configure_request_limits(
+        max_llm_requests=args.max_llm_requests or get_setting('performance.max_concurrent_llm_requests', 16),
+        max_search_requests=args.max_search_requests or get_setting('performance.max_concurrent_search_requests', 8),
+    )
+    service.start()
+    server = create_server(service, args.host, args.port)
+    print(f"---REPORT SERVICE LISTENING ON http://{args.host}:{args.port}---")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("---SHUTTING DOWN---")
+    finally:
+        server.server_close()
+        service.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Single-flight coalescing of identical in-flight requests.
+
+Concurrent sections and batch topics often issue the same request at the same moment:
+the query-generation prompt of a shared core topic, the same OpenAlex search, the same
+page fetched for author extraction. Callers that arrive with the key of a request that
+is already in flight wait for it and share its result (or its error) instead of sending
+their own; the next caller after it finishes starts a new one, so this complements the
+caches for requests that are not cached yet. Calls are shared across runs, so batch
+topics and service jobs coalesce too; a caller that receives a result another run's call
+produced records it in its own run where that run keeps accounts (see utils.ManagedModel).
+"""
+import asyncio
+import threading
+import cassette
+
+class _Flight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+def _retrieve(task):
+    # Every waiter may have been cancelled; mark the error seen so asyncio does not log it
+    if not task.cancelled():
+        task.exception()
+
+def recording_scope():
+    """Key part for flights whose result a waiter cannot record itself, such as a whole source gathering.
+
+    Runs recording or replaying a cassette need every call they depend on in their own
+    recording, so they only share such flights within the run.
+    """
+    return cassette.current_cassette()
+
+class SingleFlight:
+    """Shares one call among concurrent callers with the same key.
+
+    Threads share calls made by threads, coroutines share calls made on their event loop.
+    copy, if given, gives every caller, the one that made the call included, its own copy
+    of the result, for results callers go on to mutate; the shared result stays untouched.
+    """
+
+    def __init__(self, copy=None):
+        self.copy = copy
+        self.stats = {"calls": 0, "shared": 0}
+        self._flights = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def _share(self, value):
+        return self.copy(value) if self.copy else value
+
+    def do(self, key, call):
+        """(result, shared): call() unless a call with key is in flight, in which case its outcome."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.stats["calls"] += 1
+            else:
+                self.stats["shared"] += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return self._share(flight.value), True
+        try:
+            flight.value = call()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return self._share(flight.value), False
+
+    async def ado(self, key, acall):
+        """Async variant of do; acall returns the awaitable to share.
+
+        The call runs as its own task, so a caller that is cancelled while waiting does not
+        cancel it for the others.
+        """
+        loop = asyncio.get_running_loop()
+        key = (loop, key)
+        with self._lock:
+            task = self._tasks.get(key)
+            leader = task is None
+            if leader:
+                task = self._tasks[key] = asyncio.ensure_future(acall())
+                task.add_done_callback(lambda _: self._tasks.pop(key, None))
+                task.add_done_callback(_retrieve)
+                self.stats["calls"] += 1
+            else:
+                self.stats["shared"] += 1
+        value = await asyncio.shield(task)
+        return self._share(value), not leader
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights) + len(self._tasks)
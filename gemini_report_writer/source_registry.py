@@ -0,0 +1,163 @@
+"""
+Run-wide registry of retrieved sources with stable global IDs.
+
+A source is registered once, keyed by its normalized DOI, URL or title, and gets the next
+global ID; the same paper found by several sections keeps the ID it was first given.
+Source N is the N-th registered source, so the [Source N] references in research notes,
+drafts and the formatted report all point at one entry of the run's source list.
+Registered sources carry their ID and key ("source_id", "source_key"), which lets a
+registry be rebuilt from a checkpointed source list without normalizing anything again.
+
+A workflow run binds one registry to its context (see use). The AgentState reducer grows
+it with each section's sources, so registering a section costs O(new sources) however
+many the run already has, and readers of the run's source list reuse its index.
+"""
+import contextvars
+import hashlib
+import json
+import re
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+DOI_PREFIXES = ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "http://dx.doi.org/", "doi:")
+
+# [Source 3] in drafts and reports
+SOURCE_REF_PATTERN = re.compile(r'\[Source\s+(\d+)\]')
+# "Source 3" and "Sources 1, 2 and 4" in research notes
+SOURCE_MENTION_PATTERN = re.compile(r'\b(Sources?\s+)(\d+(?:\s*(?:,|and|&)\s*\d+)*)')
+
+def normalize_doi(doi: Optional[str]) -> str:
+    doi = (doi or "").strip().lower()
+    for prefix in DOI_PREFIXES:
+        if doi.startswith(prefix):
+            return doi[len(prefix):]
+    return doi
+
+def normalize_url(url: Optional[str]) -> str:
+    """Scheme, a leading "www.", trailing slashes and fragments do not distinguish pages."""
+    url = (url or "").strip()
+    if not url:
+        return ""
+    parts = urlsplit(url if "://" in url else f"//{url}")
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[len("www."):]
+    path = parts.path.rstrip("/")
+    return f"{host}{path}" + (f"?{parts.query}" if parts.query else "")
+
+def normalize_title(title: Optional[str]) -> str:
+    return " ".join(re.findall(r"\w+", (title or "").casefold()))
+
+def source_key(source: Dict) -> str:
+    """Identity of a source: its DOI, else its URL, else its title, else its content."""
+    doi = normalize_doi(source.get("doi"))
+    if doi:
+        return f"doi:{doi}"
+    url = normalize_url(source.get("url"))
+    if url:
+        return f"url:{url}"
+    title = normalize_title(source.get("title"))
+    if title:
+        return f"title:{title}"
+    return "hash:" + hashlib.sha1(json.dumps(source, sort_keys=True, default=str).encode()).hexdigest()
+
+class SourceRegistry:
+    """Sources of a run in global ID order, with O(1) registration and lookup by ID, key or DOI."""
+
+    def __init__(self, sources: Iterable[Dict] = ()):
+        self.reset(sources)
+
+    def reset(self, sources: Iterable[Dict] = ()):
+        """Rebuild the registry from a source list, e.g. one restored from a checkpoint."""
+        self.sources: List[Dict] = []
+        self._ids: Dict[str, int] = {}
+        self.add_all(sources)
+
+    def __len__(self):
+        return len(self.sources)
+
+    def __iter__(self):
+        return iter(self.sources)
+
+    def add(self, source: Dict) -> int:
+        """Register a source and return its global ID; a known source keeps its first ID."""
+        key = source.get("source_key") or source_key(source)
+        source_id = self._ids.get(key)
+        if source_id is None:
+            source_id = len(self.sources) + 1
+            self._ids[key] = source_id
+            # Already registered sources are kept as they are; others are copied, not mutated
+            if source.get("source_id") != source_id or source.get("source_key") != key:
+                source = dict(source, source_id=source_id, source_key=key)
+            self.sources.append(source)
+        return source_id
+
+    def add_all(self, sources: Iterable[Dict]) -> List[int]:
+        return [self.add(source) for source in sources]
+
+    def get(self, source_id: int) -> Optional[Dict]:
+        return self.sources[source_id - 1] if 1 <= source_id <= len(self.sources) else None
+
+    def id_for_key(self, key: str) -> Optional[int]:
+        return self._ids.get(key)
+
+    def id_for(self, source: Dict) -> Optional[int]:
+        return self.id_for_key(source.get("source_key") or source_key(source))
+
+    def find_doi(self, doi: str) -> Optional[Dict]:
+        source_id = self._ids.get(f"doi:{normalize_doi(doi)}")
+        return self.get(source_id) if source_id else None
+
+    def renumber(self, text: str, local_keys: Optional[List[str]]) -> str:
+        """Rewrite per-section "Source N" mentions to global IDs.
+
+        local_keys[i] is the key of the section's Source i+1. Numbers without a registered
+        source are left as they are.
+        """
+        if not local_keys:
+            return text
+        mapping = {}
+        for number, key in enumerate(local_keys, start=1):
+            source_id = self._ids.get(key)
+            if source_id is not None:
+                mapping[number] = source_id
+
+        def renumber_list(match):
+            numbers = re.sub(r'\d+', lambda n: str(mapping.get(int(n.group(0)), n.group(0))), match.group(2))
+            return match.group(1) + numbers
+
+        return SOURCE_MENTION_PATTERN.sub(renumber_list, text)
+
+_current_registry = contextvars.ContextVar("current_source_registry", default=None)
+
+@contextmanager
+def use(registry=None):
+    """Bind a run's source registry (a new empty one by default) to the current context."""
+    token = _current_registry.set(registry if registry is not None else SourceRegistry())
+    try:
+        yield _current_registry.get()
+    finally:
+        _current_registry.reset(token)
+
+def registry_for(sources: List[Dict]) -> SourceRegistry:
+    """The run's registry if it holds exactly this source list, else a new registry of it."""
+    registry = _current_registry.get()
+    if registry is not None and registry.sources is sources:
+        return registry
+    return SourceRegistry(sources)
+
+def merge(left: List[Dict], right: List[Dict]) -> List[Dict]:
+    """left with the new sources of right registered.
+
+    Inside a run the run's registry is grown in place and its source list returned, so
+    only right's sources are processed; it is rebuilt once if left is some other list
+    (a resumed run's restored state).
+    """
+    registry = _current_registry.get()
+    if registry is None:
+        registry = SourceRegistry(left or [])
+    elif registry.sources is not left:
+        registry.reset(left or [])
+    registry.add_all(right or [])
+    return registry.sources
@@ -0,0 +1,196 @@
+"""
+Deterministic offline chat model for running the workflow without a model API.
+
+StubChatModel answers every agent prompt with well-formed, role-appropriate output:
+outlines for the planner, APPROVED/REVISE verdicts for the critic, JSON score maps for
+the retriever's batch validator, assessment JSON for the quality controller, section
+text with [Source N] references for the writer, and so on. Answers depend only on the
+prompt, the role and the seed, so identical runs get identical answers. Synthetic
+latency and failure injection are configurable for load tests.
+
+Select it with LLM_BACKEND=stub (every role) or LLM_BACKEND_<ROLE>=stub (one role);
+see utils.create_gemini_model. Options are read from the environment:
+
+    STUB_LLM_LATENCY            seconds per call (default 0)
+    STUB_LLM_SECONDS_PER_TOKEN  extra seconds per output token (default 0)
+    STUB_LLM_JITTER             relative latency jitter, 0.2 = +/-20% (default 0)
+    STUB_LLM_FAILURE_RATE       probability that a call raises StubModelError (default 0)
+    STUB_LLM_REVISE_RATE        probability that a critic asks for a revision (default 0)
+    STUB_LLM_SEED               seed for latency, failures and verdicts (default 0)
+    STUB_LLM_OUTLINE_SECTIONS   number of sections the planner proposes (default 6)
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from langchain_core.messages import AIMessage
+
+CHARS_PER_TOKEN = 4
+
+class StubModelError(RuntimeError):
+    """Injected model failure."""
+    transient = True  # retried by the call policy, like a provider 503
+
+def _float_env(name, default=0.0):
+    value = os.getenv(name)
+    return float(value) if value else default
+
+def _after(prompt, marker, end=None):
+    """Text of prompt between marker and end (or the end of the prompt)."""
+    start = prompt.find(marker)
+    if start < 0:
+        return ""
+    text = prompt[start + len(marker):]
+    if end and end in text:
+        text = text[:text.index(end)]
+    return text.strip()
+
+def _source_numbers(text, limit=3):
+    numbers = sorted({int(n) for n in re.findall(r'Source (\d+)', text)})
+    return numbers[:limit] or [1]
+
+class StubChatModel:
+    """Chat model double that answers agent prompts locally."""
+
+    def __init__(self, agent_role, latency=0.0, seconds_per_token=0.0, jitter=0.0,
+                 failure_rate=0.0, revise_rate=0.0, seed=0, outline_sections=6):
+        self.agent_role = agent_role
+        self.latency = latency
+        self.seconds_per_token = seconds_per_token
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.revise_rate = revise_rate
+        self.seed = seed
+        self.outline_sections = outline_sections
+        # Repeated prompts draw fresh latencies and failures, so retries can succeed
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, agent_role):
+        return cls(
+            agent_role,
+            latency=_float_env("STUB_LLM_LATENCY"),
+            seconds_per_token=_float_env("STUB_LLM_SECONDS_PER_TOKEN"),
+            jitter=_float_env("STUB_LLM_JITTER"),
+            failure_rate=_float_env("STUB_LLM_FAILURE_RATE"),
+            revise_rate=_float_env("STUB_LLM_REVISE_RATE"),
+            seed=int(_float_env("STUB_LLM_SEED")),
+            outline_sections=int(_float_env("STUB_LLM_OUTLINE_SECTIONS", 6)),
+        )
+
+    def invoke(self, prompt, *args, **kwargs):
+        message, delay, failed = self._call(prompt)
+        time.sleep(delay)
+        if failed:
+            raise StubModelError(f"Injected {self.agent_role} model failure")
+        return message
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        message, delay, failed = self._call(prompt)
+        await asyncio.sleep(delay)
+        if failed:
+            raise StubModelError(f"Injected {self.agent_role} model failure")
+        return message
+
+    def _call(self, prompt):
+        prompt = str(prompt)
+        with self._lock:
+            attempt = self._attempts.get(prompt, 0)
+            self._attempts[prompt] = attempt + 1
+        # The answer is fixed per prompt; latency and failures vary per attempt
+        answer_rng = random.Random(f"{self.seed}:{self.agent_role}:{prompt}")
+        call_rng = random.Random(f"{self.seed}:{self.agent_role}:{prompt}:{attempt}")
+        content = self.respond(prompt, answer_rng)
+        output_tokens = max(1, len(content) // CHARS_PER_TOKEN)
+        input_tokens = max(1, len(prompt) // CHARS_PER_TOKEN)
+        delay = (self.latency + self.seconds_per_token * output_tokens) * (1 + self.jitter * call_rng.uniform(-1, 1))
+        message = AIMessage(content=content, usage_metadata={
+            "input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens,
+        })
+        return message, max(0.0, delay), call_rng.random() < self.failure_rate
+
+    def respond(self, prompt, rng):
+        """Role-appropriate answer to an agent prompt, recognised by its instructions."""
+        if "Generate 3-5 focused search queries" in prompt:
+            topic = _after(prompt, "Topic:", "\n")
+            return json.dumps([topic, f"{topic} empirical evidence", f"{topic} policy analysis"])
+        if "mapping source numbers to scores" in prompt:
+            count = len(re.findall(r'^\s*Source \d+:', _after(prompt, "Sources to evaluate:"), re.MULTILINE))
+            return json.dumps({str(i + 1): round(rng.uniform(0.72, 0.95), 2) for i in range(count)})
+        if "Respond with only the numerical score" in prompt or "Respond with only a number between" in prompt:
+            return f"{rng.uniform(0.72, 0.95):.2f}"
+        if "extract the author's name" in prompt:
+            return rng.choice(["Jane Smith", "Research Institute", "No Author Specified"])
+        if "Generate a concise, descriptive title" in prompt:
+            words = re.findall(r'[A-Za-z]+', _after(prompt, "Abstract:", "\n"))[:6]
+            return " ".join(words).title() or "Untitled Study"
+        if "Respond with only one of these labels" in prompt:
+            return "supported"
+        if "Respond with only a JSON list of section numbers" in prompt:
+            return "[]" if rng.random() >= self.revise_rate else "[1]"
+        if "Respond with JSON" in prompt or "Respond with a JSON object" in prompt:
+            return self._assessment(prompt, rng)
+        if "create a detailed, well-structured outline" in prompt or "revise the outline" in prompt:
+            return self._outline()
+        if 'start your response with "APPROVED"' in prompt or 'start with "REVISE"' in prompt:
+            return self._verdict(rng)
+        if "**Original Report:**" in prompt:
+            # Full-report refinement: return the report unchanged
+            return _after(prompt, "**Original Report:**", "**Critique:**")
+        if "You are revising only its section titled" in prompt:
+            current = _after(prompt, "**Current Text of", "**Critique of the Report:**").split("\n", 1)[-1].strip()
+            return f"{current} This revision clarifies the argument and its supporting evidence."
+        if "write a single, cohesive section" in prompt:
+            return self._section(_after(prompt, "titled: **", "**"), _source_numbers(prompt))
+        if "synthesize information for the following section" in prompt or "refine your research" in prompt:
+            return self._research(_after(prompt, "**Section Title:**", "\n"), _source_numbers(prompt))
+        return "The available evidence supports a measured conclusion."
+
+    def _assessment(self, prompt, rng):
+        """Fill the JSON template given in the prompt: scores, the first listed option and empty lists."""
+        answer = {}
+        template = prompt[prompt.rfind("Respond with"):]
+        for key, value in re.findall(r'"(\w+)":\s*([^\n]+)', template):
+            value = value.strip().rstrip(",")
+            if value.startswith("["):
+                answer[key] = []
+            elif value.startswith('"'):
+                answer[key] = value.strip('"').split("/")[0]
+            elif value.startswith("true"):
+                answer[key] = True
+            else:
+                answer[key] = round(rng.uniform(0.78, 0.95), 2)
+        return json.dumps(answer or {"score": 0.85})
+
+    def _outline(self):
+        core = ["Literature Review", "Methodology", "Analysis", "Policy Implications"]
+        middle = max(0, self.outline_sections - 2)
+        if middle > len(core):
+            core += [f"Analysis of Factor {i}" for i in range(1, middle - len(core) + 1)]
+        return "\n".join(["Introduction"] + core[:middle] + ["Conclusion"][:max(0, self.outline_sections - 1)])
+
+    def _verdict(self, rng):
+        if rng.random() < self.revise_rate:
+            return "REVISE\n1. Strengthen the evidence supporting the Analysis section."
+        return "APPROVED"
+
+    def _section(self, title, sources):
+        refs = " ".join(f"[Source {n}]" for n in sources)
+        return (
+            f"This section examines {title.lower() or 'the topic'} in light of the available research {refs}. "
+            f"The evidence indicates consistent effects across studies, although their magnitude varies with context [Source {sources[0]}]. "
+            f"Furthermore, the literature identifies several mechanisms that explain these patterns [Source {sources[-1]}].\n\n"
+            f"Moreover, limitations in the underlying data suggest that these findings should be interpreted with care, "
+            f"and further work is needed to establish how robust they are [Source {sources[0]}]."
+        )
+
+    def _research(self, title, sources):
+        lines = [f"Research synthesis for {title or 'this section'}:"]
+        lines += [f"- Source {n} reports evidence directly relevant to {title.lower() or 'the section'}." for n in sources]
+        if len(sources) > 1:
+            lines.append(f"- These findings are corroborated across Sources {', '.join(str(n) for n in sources)}.")
+        return "\n".join(lines)
@@ -0,0 +1,92 @@
+"""
+Tests for the content-addressed artifact store and the references AgentState keeps
+"""
+import os
+import tempfile
+import unittest
+from artifacts import ArtifactStore, is_ref
+from main import ReportWorkflow, merge_research_results, merge_sources
+
+class TestArtifactStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ArtifactStore(self.tmp.name, min_size=10)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_and_dedup(self):
+        """Identical payloads share one reference and one file; a fresh store reads them back"""
+        text = "A long research note. " * 20
+        ref = self.store.put(text)
+        self.assertTrue(is_ref(ref))
+        self.assertEqual(self.store.put(text), ref)
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(self.tmp.name)), 1)
+        self.assertEqual(ArtifactStore(self.tmp.name).get(ref), text)
+
+    def test_short_text_stays_inline(self):
+        """Payloads below min_size and non-text values are not stored"""
+        self.assertEqual(self.store.put("short"), "short")
+        self.assertIsNone(self.store.put(None))
+        self.assertEqual(self.store.get("plain text"), "plain text")
+
+    def test_disabled_store_still_resolves(self):
+        """Turning the store off keeps earlier references readable"""
+        ref = self.store.put("x" * 100)
+        disabled = ArtifactStore(self.tmp.name, enabled=False)
+        self.assertEqual(disabled.put("y" * 100), "y" * 100)
+        self.assertEqual(disabled.get(ref), "x" * 100)
+
+    def test_cache_is_bounded(self):
+        """The in-memory cache evicts the least recently used payloads"""
+        store = ArtifactStore(self.tmp.name, min_size=10, cache_bytes=250)
+        refs = [store.put(str(i) * 100) for i in range(5)]
+        self.assertLessEqual(store._cached_bytes, 250)
+        self.assertEqual(store.get(refs[0]), "0" * 100)
+
+    def test_prune_and_missing(self):
+        """Pruned payloads are gone and resolving them fails loudly"""
+        ref = self.store.put("z" * 100)
+        self.assertEqual(self.store.prune(-1), 1)
+        with self.assertRaises(KeyError):
+            ArtifactStore(self.tmp.name).get(ref)
+
+class TestStateReferences(unittest.TestCase):
+
+    def test_research_update_keeps_references(self):
+        """Research notes and abstracts enter the state as references and resolve on read"""
+        with tempfile.TemporaryDirectory() as tmp:
+            workflow = ReportWorkflow.__new__(ReportWorkflow)
+            workflow.artifacts = ArtifactStore(tmp, min_size=10)
+            notes, abstract = "Source 1 finds effects. " * 10, "An abstract of the paper. " * 10
+            update = workflow._section_research_update(
+                "Analysis", [{"title": "T", "abstract": abstract}], {"content": notes, "source_count": 1}
+            )
+            self.assertTrue(is_ref(update["research_results"]["Analysis"]["content"]))
+            self.assertTrue(is_ref(update["sources"][0]["abstract"]))
+            state = {"research_results": update["research_results"], "sources": update["sources"]}
+            self.assertEqual(workflow._research_results(state)["Analysis"]["content"], notes)
+            self.assertEqual(workflow._sources(state)[0]["abstract"], abstract)
+
+    def test_untitled_source_renumbered(self):
+        """A source with no DOI, URL or title keeps the key the registry gives its stashed form"""
+        with tempfile.TemporaryDirectory() as tmp:
+            workflow = ReportWorkflow.__new__(ReportWorkflow)
+            workflow.artifacts = ArtifactStore(tmp, min_size=10)
+            first = workflow._section_research_update(
+                "Intro", [{"title": "Known"}], {"content": "Source 1 says so.", "source_count": 1}
+            )
+            second = workflow._section_research_update(
+                "Analysis", [{"authors": ["A"], "abstract": "An untitled abstract. " * 10}],
+                {"content": "Source 1 finds effects.", "source_count": 1}
+            )
+            state = {
+                "research_results": merge_research_results(first["research_results"], second["research_results"]),
+                "sources": merge_sources(merge_sources([], first["sources"]), second["sources"]),
+            }
+            processed, _ = workflow._processed_research(state)
+            self.assertIn("Source 2 finds effects", processed["Analysis"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+Tests for concurrent batch runs
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import batch
+from main import ReportWorkflow
+
+SOURCES = [{"title": f"Paper {i}", "abstract": "Findings about the topic. " * 5, "doi": f"10.1234/p{i}",
+            "authors": ["Ann Smith"], "year": 2022, "url": f"https://example.org/{i}",
+            "topic_relevance": 0.9} for i in range(4)]
+
+async def _asources(self, topic, k=10):
+    return [dict(source) for source in SOURCES]
+
+async def _aclean(self, text):
+    return {"status": "success", "errors": [], "error_count": 0}
+
+class TestRunBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmp.name)
+        env = {k: v for k, v in os.environ.items() if k != "GOOGLE_API_KEY"}
+        env["LLM_BACKEND"] = "stub"
+        for patcher in (
+            patch.dict(os.environ, env, clear=True),
+            patch("agents.retriever.RetrieverAgent.aretrieve", _asources),
+            patch("agents.grammar_gate.GrammarGateAgent.acheck_grammar_and_style", _aclean),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_concurrent_checkpointed_topics_all_complete(self):
+        """Checkpointed topics run side by side without lock errors; repeated topics get their own reports"""
+        workflow = ReportWorkflow(output_dir=self.tmp.name)
+        self.assertIsNotNone(workflow.checkpoints)
+        entries = [{"topic": f"Topic {i % 4}", "id": None} for i in range(8)]
+        results = asyncio.run(batch.run_batch(workflow, entries, 8))
+        self.assertEqual([r["status"] for r in results], ["completed"] * 8, [r.get("error") for r in results])
+        paths = {r["report_path"] for r in results}
+        self.assertEqual(len(paths), 8)
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+
+    def test_duplicate_ids_rejected(self):
+        """Two entries with one id would share checkpoints, so the file is refused"""
+        path = os.path.join(self.tmp.name, "topics.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"topic": "A", "id": "x"}\n{"topic": "B", "id": "x"}\n{"topic": "C"}\n')
+        with self.assertRaises(ValueError):
+            batch.load_topics(path)
+
+if __name__ == '__main__':
+    unittest.main()
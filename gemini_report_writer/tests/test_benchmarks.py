@@ -0,0 +1,70 @@
+"""
+Tests for the benchmarks' baseline comparisons
+"""
+import unittest
+from benchmarks import micro
+from benchmarks.e2e import find_regressions, load_scenarios
+
+def _result(wall=1.0, calls=10, rss=100.0, hit_rate=0.5):
+    return {
+        "mode": "sync",
+        "wall_seconds": wall,
+        "node_seconds": {"writer": {"count": 1, "seconds": wall / 2}},
+        "llm_calls": {"writer": calls},
+        "peak_rss_mb": rss,
+        "cache_hit_rates": {"retriever_cache": hit_rate},
+    }
+
+class TestFindRegressions(unittest.TestCase):
+
+    def test_within_tolerance(self):
+        """Noise within the tolerances is not a regression"""
+        baseline = {"sync": {"a-5": _result()}}
+        self.assertEqual(find_regressions({"a-5": _result(wall=1.2, rss=110)}, baseline), [])
+
+    def test_regressions_reported(self):
+        """Slower runs, extra LLM calls, memory growth and lost cache hits all fail"""
+        baseline = {"sync": {"a-5": _result()}}
+        regressions = find_regressions({"a-5": _result(wall=3.0, calls=11, rss=200, hit_rate=0.2)}, baseline)
+        self.assertEqual(len(regressions), 5)
+
+    def test_unknown_scenarios_skipped(self):
+        """Scenarios without a baseline are not compared"""
+        self.assertEqual(find_regressions({"b-5": _result(wall=9)}, {"sync": {"a-5": _result()}}), [])
+
+    def test_fixture_scenarios(self):
+        """Every fixture topic runs at every outline size"""
+        scenarios = load_scenarios()
+        self.assertEqual(sorted({s["sections"] for s in scenarios.values()}), [5, 15, 40])
+
+def _micro_result(seconds=(0.001, 0.01), exponent=1.0, alloc=100.0):
+    return {
+        "unit": "KB",
+        "sizes": {str(size): {"seconds_per_op": s, "ops_per_sec": 1 / s, "peak_alloc_kb": alloc}
+                  for size, s in zip((5, 50), seconds)},
+        "scaling_exponent": exponent,
+    }
+
+class TestMicroBenchmarks(unittest.TestCase):
+
+    def test_scaling_exponent(self):
+        """Linear and quadratic growth are told apart; noise-level timings are ignored"""
+        self.assertEqual(micro.scaling_exponent([10, 100], [0.001, 0.01]), 1.0)
+        self.assertEqual(micro.scaling_exponent([10, 100, 1000], [0.001, 0.01, 1.0]), 2.0)
+        self.assertIsNone(micro.scaling_exponent([10, 100], [1e-6, 1e-5]))
+
+    def test_regressions_reported(self):
+        """Slower calls, allocation growth and worse scaling all fail; known quadratics do not"""
+        baseline = {"f": _micro_result(exponent=2.0)}
+        self.assertEqual(micro.find_regressions({"f": _micro_result(exponent=2.1)}, baseline), [])
+        regressions = micro.find_regressions({"f": _micro_result((0.001, 0.05), 2.7, 500.0)}, baseline)
+        self.assertEqual(len(regressions), 4)
+
+    def test_synthetic_report_size(self):
+        """Synthetic reports reach the requested size and cite the given sources"""
+        report = micro.make_report(5 * 1024, 10)
+        self.assertGreaterEqual(len(report), 5 * 1024)
+        self.assertIn("[Source ", report)
+
+if __name__ == '__main__':
+    unittest.main()
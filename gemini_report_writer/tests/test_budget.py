@@ -0,0 +1,70 @@
+"""
+Tests for per-run LLM usage accounting and budget enforcement
+"""
+import unittest
+from types import SimpleNamespace
+import budget
+from convergence import ConvergencePolicy
+from main import ReportWorkflow
+
+class TestRunUsage(unittest.TestCase):
+
+    def test_usage_by_role_and_cost(self):
+        """Calls and tokens are totalled per role and priced per model"""
+        pricing = {'model-a': {'input': 1.0, 'output': 2.0}}
+        with budget.track('wf', pricing=pricing) as usage:
+            response = SimpleNamespace(content='ok', usage_metadata={'input_tokens': 1000, 'output_tokens': 500})
+            budget.record_llm_call('writer', 'model-a', 'prompt', response)
+            budget.record_llm_call('writer', 'model-a', 'prompt', response)
+        summary = usage.summary()
+        self.assertEqual(summary['by_role']['writer']['calls'], 2)
+        self.assertEqual(summary['totals']['input_tokens'], 2000)
+        self.assertAlmostEqual(summary['totals']['cost_usd'], 0.004)
+
+    def test_tokens_estimated_without_metadata(self):
+        """Providers without usage metadata are counted from text length"""
+        with budget.track('wf') as usage:
+            budget.record_llm_call('critic', 'model-b', 'x' * 400, SimpleNamespace(content='y' * 40))
+        entry = usage.by_role['critic']
+        self.assertEqual((entry['input_tokens'], entry['output_tokens'], entry['estimated_calls']), (100, 10, 1))
+
+    def test_no_accounting_outside_a_run(self):
+        """Calls made outside a run are ignored"""
+        budget.record_llm_call('writer', 'model-a', 'prompt', SimpleNamespace(content='ok'))
+        self.assertIsNone(budget.exhausted())
+
+    def test_call_budget_exhausted(self):
+        """The first spent limit is reported"""
+        with budget.track('wf', budget.BudgetLimits(max_llm_calls=2)) as usage:
+            usage.record('writer', 'model-a', 10, 10)
+            self.assertIsNone(budget.exhausted())
+            usage.record('writer', 'model-a', 10, 10)
+            self.assertEqual(budget.exhausted(), 'max_llm_calls')
+        self.assertEqual(usage.exhausted_by, 'max_llm_calls')
+
+class TestBudgetDegradation(unittest.TestCase):
+
+    def setUp(self):
+        # Routing methods do not touch the agents, so skip their construction
+        self.workflow = ReportWorkflow.__new__(ReportWorkflow)
+        self.workflow.convergence = ConvergencePolicy()
+
+    def test_revision_loops_stop_when_exhausted(self):
+        """A revision request is overridden once the budget is spent"""
+        state = {'feedback': 'REVISE: more detail', 'report_revisions': 1}
+        self.assertEqual(self.workflow.decide_gates(state), 'revise')
+        with budget.track('wf', budget.BudgetLimits(max_tokens=1)) as usage:
+            usage.record('writer', 'model-a', 1, 1)
+            self.assertEqual(self.workflow.decide_gates(state), 'continue')
+
+    def test_optional_gate_skipped_when_exhausted(self):
+        """Optional gates approve without running once the budget is spent"""
+        calls = []
+        node = self.workflow._node('critic_report', lambda state: calls.append(state) or {'feedback': 'REVISE: x'},
+                                   budget_skip={'feedback': 'APPROVED: Skipped'})
+        with budget.track('wf', budget.BudgetLimits(max_llm_calls=0)):
+            self.assertEqual(node.invoke({}), {'feedback': 'APPROVED: Skipped'})
+        self.assertEqual(calls, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+"""
+Tests for model call deadlines, retries and hedged requests
+"""
+import asyncio
+import threading
+import time
+import unittest
+from langchain_core.messages import AIMessage
+import budget
+import callpolicy
+from callpolicy import CallPolicy, CallTimeout, is_transient
+from utils import ManagedModel
+
+class FlakyModel:
+    """Fails the first `failures` calls with `error`, then sleeps `delays[i]` (default 0) and answers."""
+
+    def __init__(self, failures=0, error=None, delays=()):
+        self.failures, self.error, self.delays = failures, error, list(delays)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _next(self):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        if call <= self.failures:
+            raise self.error
+        return call, self.delays[call - 1] if call <= len(self.delays) else 0
+
+    def invoke(self, prompt):
+        call, delay = self._next()
+        time.sleep(delay)
+        return AIMessage(content=f"answer {call}")
+
+    async def ainvoke(self, prompt):
+        call, delay = self._next()
+        await asyncio.sleep(delay)
+        return AIMessage(content=f"answer {call}")
+
+class TestCallPolicy(unittest.TestCase):
+
+    def tearDown(self):
+        callpolicy.configure()
+        callpolicy.latencies = callpolicy.LatencyTracker()
+
+    def test_transient_failures_retried(self):
+        """Server errors are retried with backoff; a bad request fails at once"""
+        callpolicy.configure(CallPolicy(max_retries=2, backoff_base_seconds=0.001))
+        model = FlakyModel(failures=2, error=RuntimeError("503 Service Unavailable"))
+        info = {}
+        self.assertEqual(callpolicy.call("planner", lambda: model.invoke("p"), info).content, "answer 3")
+        self.assertEqual(info["attempts"], 3)
+        model = FlakyModel(failures=1, error=ValueError("400 invalid argument"))
+        with self.assertRaises(ValueError):
+            callpolicy.call("planner", lambda: model.invoke("p"))
+        self.assertEqual(model.calls, 1)
+        self.assertFalse(is_transient(ValueError("400 invalid argument")))
+
+    def test_stalled_call_times_out_and_retries(self):
+        """An attempt past its role's deadline is abandoned and the retry answers"""
+        callpolicy.configure(roles={"critic": CallPolicy(timeout_seconds=0.05, max_retries=1, backoff_base_seconds=0.001)})
+        model = ManagedModel(FlakyModel(delays=[1.0]), "critic", "model-a")
+        started = time.monotonic()
+        self.assertEqual(model.invoke("p").content, "answer 2")
+        self.assertLess(time.monotonic() - started, 0.5)
+        model = ManagedModel(FlakyModel(delays=[1.0, 1.0]), "critic", "model-a")
+        with self.assertRaises(CallTimeout):
+            asyncio.run(model.ainvoke("p"))
+
+    def test_slow_call_hedged_past_p95(self):
+        """A latency-critical call running past its p95 is duplicated and the faster answer wins"""
+        callpolicy.configure(roles={"retriever": CallPolicy(hedge=True, hedge_min_samples=5, hedge_min_seconds=0.01)})
+        for _ in range(5):
+            callpolicy.latencies.record("retriever", 0.01)
+        for run in (lambda m: m.invoke("p"), lambda m: asyncio.run(m.ainvoke("p"))):
+            model = ManagedModel(FlakyModel(delays=[1.0, 0.0]), "retriever", "model-a")
+            started = time.monotonic()
+            self.assertEqual(run(model).content, "answer 2")
+            self.assertLess(time.monotonic() - started, 0.5)
+        self.assertGreaterEqual(callpolicy.stats()["hedge_wins"], 2)
+
+    def test_discarded_attempts_charged_and_stalls_capped(self):
+        """A losing hedge is charged to the run on both paths; once too many stalled calls run, timeouts are not retried"""
+        callpolicy.configure(roles={"retriever": CallPolicy(hedge=True, hedge_min_samples=5, hedge_min_seconds=0.01)})
+        for _ in range(5):
+            callpolicy.latencies.record("retriever", 0.01)
+        model = ManagedModel(FlakyModel(delays=[0.2, 0.0]), "retriever", "model-a")
+        with budget.track("wf") as usage:
+            self.assertEqual(model.invoke("p").content, "answer 2")
+            time.sleep(0.3)
+        self.assertEqual(usage.totals()["calls"], 2)
+        self.assertEqual(callpolicy.stats()["abandoned"], 0)
+
+        async def hedged():
+            answer = await model.ainvoke("p")
+            await asyncio.sleep(0.3)
+            return answer
+
+        model = ManagedModel(FlakyModel(delays=[0.2, 0.0]), "retriever", "model-a")
+        with budget.track("wf") as usage:
+            self.assertEqual(asyncio.run(hedged()).content, "answer 2")
+        self.assertEqual(usage.totals()["calls"], 2)
+        self.assertEqual(callpolicy.stats()["abandoned"], 0)
+
+        callpolicy.configure(CallPolicy(timeout_seconds=0.05, max_retries=3, backoff_base_seconds=0.001, max_abandoned=1))
+        model = ManagedModel(FlakyModel(delays=[0.2]), "critic", "model-a")
+        with self.assertRaises(CallTimeout):
+            model.invoke("p")
+        self.assertEqual(model.model.calls, 1)
+        time.sleep(0.3)
+        self.assertEqual(callpolicy.stats()["abandoned"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
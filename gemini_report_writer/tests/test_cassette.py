@@ -0,0 +1,78 @@
+"""
+Tests for record/replay cassettes
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+import cassette
+
+class FakeClient:
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, key):
+        self.calls += 1
+        return f"value-{self.calls}".encode()
+
+    def fail(self):
+        raise ConnectionError("down")
+
+class FakeAsyncClient:
+    async def search(self, query):
+        return {"results": [query]}
+
+class TestCassette(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "run.cassette.json")
+
+    def test_replay_returns_recorded_responses_in_order(self):
+        """Repeated requests replay in recorded order without calling the client"""
+        live = FakeClient()
+        with cassette.use(self.path, "record"):
+            client = cassette.RecordedClient(live, "redis")
+            recorded = [client.get("k"), client.get("k")]
+        offline = FakeClient()
+        with cassette.use(self.path, "replay"):
+            client = cassette.RecordedClient(offline, "redis")
+            replayed = [client.get("k"), client.get("k"), client.get("k")]
+        self.assertEqual(recorded, [b"value-1", b"value-2"])
+        self.assertEqual(replayed, [b"value-1", b"value-2", b"value-2"])
+        self.assertEqual(offline.calls, 0)
+
+    def test_recorded_failures_are_raised_again(self):
+        """A failed call replays as an error of the requested type"""
+        with cassette.use(self.path, "record"):
+            with self.assertRaises(ConnectionError):
+                cassette.RecordedClient(FakeClient(), "http").fail()
+        with cassette.use(self.path, "replay"):
+            with self.assertRaisesRegex(cassette.ReplayedError, "ConnectionError: down"):
+                cassette.RecordedClient(FakeClient(), "http").fail()
+
+    def test_unrecorded_request_misses(self):
+        """Replay never falls through to the network"""
+        with cassette.use(self.path, "record"):
+            cassette.RecordedClient(FakeClient(), "redis").get("a")
+        with cassette.use(self.path, "replay"):
+            with self.assertRaises(cassette.CassetteMiss):
+                cassette.RecordedClient(FakeClient(), "redis").get("b")
+
+    def test_async_client(self):
+        """Async clients are recorded and replayed as awaitables"""
+        async def search():
+            return await cassette.RecordedClient(FakeAsyncClient(), "tavily", is_async=True).search("q")
+
+        with cassette.use(self.path, "record"):
+            recorded = asyncio.run(search())
+        with cassette.use(self.path, "replay"):
+            self.assertEqual(asyncio.run(search()), recorded)
+
+    def test_no_cassette_passes_through(self):
+        """Outside a recording, calls go straight to the client"""
+        live = FakeClient()
+        self.assertEqual(cassette.RecordedClient(live, "redis").get("k"), b"value-1")
+        self.assertEqual(live.calls, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Tests for the compressed checkpoint serializer and resuming interrupted runs
+"""
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from artifacts import REF_PREFIX
+from checkpointing import CompressedSerializer
+from agents.quality_pipeline import SystemQualityReport
+from main import ReportWorkflow
+
+SOURCES = [{"title": f"Paper {i}", "abstract": "Findings about the topic. " * 5, "doi": f"10.1234/p{i}",
+            "authors": ["Ann Smith"], "year": 2022, "url": f"https://example.org/{i}",
+            "topic_relevance": 0.9} for i in range(4)]
+
+def _sources(self, topic, k=10):
+    return [dict(source) for source in SOURCES]
+
+async def _asources(self, topic, k=10):
+    return _sources(self, topic, k)
+
+def _interrupt(self, text):
+    raise KeyboardInterrupt("interrupted")
+
+async def _ainterrupt(self, text):
+    _interrupt(self, text)
+
+def _clean(self, text):
+    return {"status": "success", "errors": [], "error_count": 0}
+
+async def _aclean(self, text):
+    return _clean(self, text)
+
+class TestCompressedSerializer(unittest.TestCase):
+
+    def setUp(self):
+        self.serde = CompressedSerializer()
+
+    def test_large_state_round_trips_compressed(self):
+        """Large snapshots are stored compressed and revive custom state types"""
+        state = {'report': 'word ' * 2000, 'quality_report': SystemQualityReport('workflow_1', 'Topic')}
+        type_, payload = self.serde.dumps_typed(state)
+        self.assertTrue(type_.endswith(CompressedSerializer.SUFFIX))
+        restored = self.serde.loads_typed((type_, payload))
+        self.assertEqual(restored['report'], state['report'])
+        self.assertIsInstance(restored['quality_report'], SystemQualityReport)
+
+    def test_small_values_stored_uncompressed(self):
+        """Payloads below the size threshold skip compression"""
+        type_, payload = self.serde.dumps_typed({'feedback': 'APPROVED'})
+        self.assertFalse(type_.endswith(CompressedSerializer.SUFFIX))
+        self.assertEqual(self.serde.loads_typed((type_, payload)), {'feedback': 'APPROVED'})
+
+class TestResume(unittest.TestCase):
+    """Runs on the stub models with canned sources, in a scratch directory for checkpoints and artifacts."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmp.name)
+        env = {k: v for k, v in os.environ.items() if k != "GOOGLE_API_KEY"}
+        env["LLM_BACKEND"] = "stub"
+        for patcher in (
+            patch.dict(os.environ, env, clear=True),
+            patch("agents.retriever.RetrieverAgent.retrieve", _sources),
+            patch("agents.retriever.RetrieverAgent.aretrieve", _asources),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _workflow(self):
+        workflow = ReportWorkflow(output_dir=self.tmp.name)
+        # Stub answers barely depend on the topic; a memoized gate would skip the interruption
+        workflow.memo = None
+        return workflow
+
+    def _interrupted(self, run):
+        with patch("agents.grammar_gate.GrammarGateAgent.check_grammar_and_style", _interrupt), \
+                patch("agents.grammar_gate.GrammarGateAgent.acheck_grammar_and_style", _ainterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                run()
+
+    def _resumed(self, resume):
+        with patch("agents.grammar_gate.GrammarGateAgent.check_grammar_and_style", _clean), \
+                patch("agents.grammar_gate.GrammarGateAgent.acheck_grammar_and_style", _aclean), \
+                patch("agents.planner.PlannerAgent.create_outline", side_effect=AssertionError("replanned")), \
+                patch("agents.planner.PlannerAgent.acreate_outline", side_effect=AssertionError("replanned")):
+            return resume()
+
+    def test_interrupted_run_resumes(self):
+        """A run stopped at the grammar gate resumes there, sync and async, without planning again"""
+        workflow = self._workflow()
+        self._interrupted(lambda: workflow.run("Sync topic", workflow_id="wf-sync"))
+        report = self._resumed(lambda: self._workflow().resume("wf-sync"))
+        self.assertIn("Smith, A. (2022). Paper 0.", report)
+
+        self._interrupted(lambda: asyncio.run(workflow.arun("Async topic", workflow_id="wf-async")))
+        report = self._resumed(lambda: asyncio.run(self._workflow().aresume("wf-async")))
+        self.assertIn("Smith, A. (2022). Paper 0.", report)
+        with self.assertRaises(ValueError):
+            workflow.resume("wf-async")
+
+    def test_resume_after_prune(self):
+        """Pruning when another run completes keeps the old artifacts an interrupted run still references"""
+        workflow = self._workflow()
+        self._interrupted(lambda: workflow.run("Old topic", workflow_id="wf-old"))
+        month_ago = time.time() - 30 * 24 * 3600
+        for root, _, files in os.walk(workflow.artifacts.directory):
+            for name in files:
+                os.utime(os.path.join(root, name), (month_ago, month_ago))
+        stale = workflow.artifacts.put("An unreferenced payload. " * 40)
+        os.utime(workflow.artifacts._path(stale[len(REF_PREFIX):]), (month_ago, month_ago))
+        # What completing any other run does; a stub run would re-store these same payloads
+        self._workflow()._prune_artifacts()
+
+        self.assertFalse(os.path.exists(workflow.artifacts._path(stale[len(REF_PREFIX):])))
+        report = self._resumed(lambda: self._workflow().resume("wf-old"))
+        self.assertIn("Smith, A. (2022). Paper 0.", report)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Tests for the persistent cache of deterministic model responses
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+from langchain_core.messages import AIMessage
+import budget
+import llm_cache
+from llm_cache import ResponseCache
+from utils import ManagedModel
+
+class CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return AIMessage(content=f"answer {self.calls}", usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15})
+
+    async def ainvoke(self, prompt):
+        return self.invoke(prompt)
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(os.path.join(self.tmp.name, "llm.sqlite"), disabled_roles=["critic"])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _model(self, role="planner", temperature=0):
+        return ManagedModel(CountingModel(), role, "model-a", temperature=temperature,
+                            client_key=("gemini", "model-a", temperature))
+
+    def test_repeated_prompt_served_from_cache(self):
+        """A prompt repeated up to whitespace is answered once and not charged to the budget again"""
+        model = self._model()
+        with llm_cache.use(self.cache), budget.track("wf") as usage:
+            first = model.invoke("Plan the  report\n on wages")
+            second = model.invoke("Plan the report on wages")
+            third = asyncio.run(model.ainvoke("Plan the report on wages"))
+        self.assertEqual(model.model.calls, 1)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(third.content, first.content)
+        self.assertEqual(usage.totals()["calls"], 1)
+        self.assertEqual(self.cache.hit_rates()["planner"], {"hits": 2, "misses": 1, "hit_rate": 0.6667})
+
+    def test_sampled_and_opted_out_calls_bypass(self):
+        """Calls above temperature 0, opted-out roles and calls outside a run always reach the model"""
+        writer, critic = self._model("writer", temperature=0.7), self._model("critic")
+        with llm_cache.use(self.cache):
+            for model in (writer, critic):
+                model.invoke("same prompt")
+                model.invoke("same prompt")
+        planner = self._model()
+        planner.invoke("same prompt")
+        planner.invoke("same prompt")
+        self.assertEqual([writer.model.calls, critic.model.calls, planner.model.calls], [2, 2, 2])
+
+    def test_cache_survives_restart(self):
+        """A later process answers prompts cached by an earlier one"""
+        with llm_cache.use(self.cache):
+            self._model().invoke("prompt")
+        self.cache.store.close()
+        model = self._model()
+        with llm_cache.use(ResponseCache(self.cache.store.path)):
+            self.assertEqual(model.invoke("prompt").content, "answer 1")
+        self.assertEqual(model.model.calls, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Tests for persistent memoization of node results
+"""
+import os
+import tempfile
+import unittest
+from agents.apa_formatter import APAReference, FormattedReport
+from main import ReportWorkflow
+from memo import NodeMemo
+
+class TestNodeMemo(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "memo.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_results_survive_a_new_store(self):
+        """Typed results stored by one run are read back by the next"""
+        memo = NodeMemo(self.path)
+        report = FormattedReport(report_text="Text (Smith, 2020)", references=[
+            APAReference(authors=["Smith, A."], year="2020", title="T", source="J")
+        ])
+        key = memo.key("apa_formatter", {"report": "Text [Source 1]", "sources": [{"title": "T"}]})
+        memo.put(key, "apa_formatter", report)
+        memo.close()
+        self.assertEqual(NodeMemo(self.path).get(key), (True, report))
+
+    def test_key_covers_inputs_and_salt(self):
+        """Different inputs, nodes or salts never share a key"""
+        memo = NodeMemo(self.path)
+        key = memo.key("critic_report", {"formatted_report": "a"})
+        self.assertEqual(key, memo.key("critic_report", {"formatted_report": "a"}))
+        self.assertNotEqual(key, memo.key("critic_report", {"formatted_report": "b"}))
+        self.assertNotEqual(key, memo.key("grammar_gate", {"formatted_report": "a"}))
+        self.assertNotEqual(key, NodeMemo(self.path, salt="other config").key("critic_report", {"formatted_report": "a"}))
+
+    def test_least_recently_used_evicted(self):
+        """Past the size limit the least recently used entries go first"""
+        memo = NodeMemo(self.path, max_bytes=250)
+        keys = [memo.key("n", i) for i in range(3)]
+        memo.put(keys[0], "n", "0" * 100)
+        memo.put(keys[1], "n", "1" * 100)
+        memo.get(keys[0])
+        memo.put(keys[2], "n", "2" * 100)
+        self.assertEqual([memo.get(key)[0] for key in keys], [True, False, True])
+
+    def test_expired_entries_miss(self):
+        """Entries unused for longer than max_age_seconds are not served"""
+        memo = NodeMemo(self.path, max_age_seconds=-1)
+        key = memo.key("n", "inputs")
+        memo.put(key, "n", "result")
+        self.assertEqual(memo.get(key), (False, None))
+
+class TestMemoizedNodes(unittest.TestCase):
+
+    def test_unchanged_inputs_skip_the_call(self):
+        """A node reruns only when its declared inputs change, and error results are never stored"""
+        with tempfile.TemporaryDirectory() as tmp:
+            workflow = ReportWorkflow.__new__(ReportWorkflow)
+            workflow.memo = NodeMemo(os.path.join(tmp, "memo.sqlite"))
+            workflow.memo_nodes = {"grammar_gate"}
+            calls = []
+            def check():
+                calls.append(1)
+                return {"status": "error" if len(calls) == 1 else "success", "error_count": 0}
+            reusable = lambda result: result["status"] != "error"
+            state = {"formatted_report": "draft", "feedback": "unrelated"}
+            for feedback in ["a", "b", "c"]:
+                workflow._memoized("grammar_gate", dict(state, feedback=feedback), check, reusable)
+            workflow._memoized("grammar_gate", dict(state, formatted_report="new draft"), check, reusable)
+            self.assertEqual(len(calls), 3)
+
+if __name__ == '__main__':
+    unittest.main()
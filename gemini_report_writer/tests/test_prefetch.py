@@ -0,0 +1,57 @@
+"""
+Tests for speculative retrieval of draft outline sections
+"""
+import asyncio
+import threading
+import unittest
+import prefetch
+
+class TestPrefetcher(unittest.TestCase):
+
+    def test_exact_and_similar_sections_reuse_results(self):
+        """Approved sections claim the prefetch of the same or a similar draft section; others are cancelled"""
+        release = threading.Event()
+        def retrieve(section):
+            release.wait(5)
+            return [{"title": section}]
+
+        with prefetch.use(max_workers=1, min_similarity=0.8) as prefetcher:
+            prefetcher.start(["1. Introduction", "2. Labor Market Effects", "3. Regional Evidence", "4. History"], retrieve)
+            discarded = prefetcher.assign(["Introduction", "Labour Market Effects", "Policy Options"])
+            release.set()
+            self.assertEqual(discarded, 2)
+            self.assertEqual(prefetcher.take("Introduction"), [{"title": "1. Introduction"}])
+            self.assertEqual(prefetcher.take("Labour Market Effects"), [{"title": "2. Labor Market Effects"}])
+            self.assertIsNone(prefetcher.take("Policy Options"))
+            # A result is claimed once
+            self.assertIsNone(prefetcher.take("Introduction"))
+
+    def test_failed_prefetch_falls_back(self):
+        """A failed prefetch is reported as missing so the section retrieves again"""
+        def retrieve(section):
+            raise ConnectionError("search down")
+
+        with prefetch.use() as prefetcher:
+            prefetcher.start(["Introduction"], retrieve)
+            prefetcher.assign(["Introduction"])
+            self.assertIsNone(prefetcher.take("Introduction"))
+        self.assertIsNone(prefetch.current())
+
+    def test_async_prefetch(self):
+        """Tasks started on the event loop are claimed by atake and unclaimed ones are cancelled"""
+        async def aretrieve(section):
+            await asyncio.sleep(0.01)
+            return [section]
+
+        async def run():
+            with prefetch.use() as prefetcher:
+                prefetcher.astart(["Introduction", "Methods"], aretrieve)
+                prefetcher.assign(["Introduction"])
+                return await prefetcher.atake("Introduction"), prefetcher.stats
+
+        sources, stats = asyncio.run(run())
+        self.assertEqual(sources, ["Introduction"])
+        self.assertEqual(stats, {"started": 2, "reused": 1, "discarded": 1})
+
+if __name__ == '__main__':
+    unittest.main()
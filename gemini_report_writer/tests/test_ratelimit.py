@@ -0,0 +1,119 @@
+"""
+Tests for the per-model rate limiter and adaptive concurrency governor
+"""
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.messages import AIMessage
+from ratelimit import AdaptiveConcurrency, ModelGovernor, TokenBucket, is_throttle
+from utils import ManagedModel
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_paced(self):
+        """Tokens beyond the burst are handed out at the configured rate"""
+        bucket = TokenBucket(600, burst=2)
+        waits = [bucket.reserve() for _ in range(4)]
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 0.1, places=2)
+        self.assertAlmostEqual(waits[3], 0.2, places=2)
+
+    def test_rate_change_keeps_spent_tokens(self):
+        """Reconfiguring the rate, as every new workflow does, does not hand out a fresh burst"""
+        bucket = TokenBucket(600, burst=2)
+        bucket.reserve()
+        bucket.reserve()
+        bucket.set_rate(600, burst=2)
+        self.assertGreater(bucket.reserve(), 0.0)
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+
+    def test_throttle_halves_and_success_recovers(self):
+        """Throttling halves the limit; successful calls grow it back one step per window"""
+        limiter = AdaptiveConcurrency(max_limit=8)
+        limiter.acquire()
+        limiter.release(throttled=True)
+        self.assertEqual(limiter.limit, 4)
+        for _ in range(5):
+            limiter.acquire()
+            limiter.release(latency=0.1)
+        self.assertEqual(int(limiter.limit), 5)
+
+    def test_latency_spike_backs_off(self):
+        """A call far slower than the running average shrinks the limit"""
+        limiter = AdaptiveConcurrency(max_limit=10)
+        for latency in [0.1, 0.1, 5.0]:
+            limiter.acquire()
+            limiter.release(latency=latency)
+        self.assertLess(limiter.limit, 10)
+
+    def test_threads_capped(self):
+        """No more than limit threads hold a slot at once"""
+        limiter = AdaptiveConcurrency(max_limit=2)
+        active, peak, lock = [0], [0], threading.Lock()
+
+        def call(_):
+            limiter.acquire()
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            limiter.release(latency=0.02)
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            list(executor.map(call, range(6)))
+        self.assertEqual(peak[0], 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_cancelled_waiter_frees_its_place(self):
+        """A coroutine cancelled while queued does not keep a slot"""
+        limiter = AdaptiveConcurrency(max_limit=1)
+
+        async def run():
+            await limiter.aacquire()
+            waiter = asyncio.ensure_future(limiter.aacquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            limiter.release(latency=0.01)
+            await asyncio.wait_for(limiter.aacquire(), 1)
+            limiter.release(latency=0.01)
+
+        asyncio.run(run())
+        self.assertEqual(limiter.in_flight, 0)
+
+class TestModelGovernor(unittest.TestCase):
+
+    def test_throttled_calls_counted_and_backed_off(self):
+        """Provider 429s are recognized, counted and shrink the concurrency limit"""
+        governor = ModelGovernor("model-a", max_concurrency=8)
+        with self.assertRaises(RuntimeError):
+            with governor.slot():
+                raise RuntimeError("429 RESOURCE_EXHAUSTED: quota exceeded")
+        with governor.slot() as queued:
+            self.assertGreaterEqual(queued, 0.0)
+        stats = governor.stats()
+        self.assertEqual((stats["calls"], stats["throttled"], stats["in_flight"]), (2, 1, 0))
+        self.assertEqual(stats["concurrency_limit"], 4)
+        self.assertFalse(is_throttle(ValueError("bad JSON")))
+
+    def test_model_calls_go_through_governor(self):
+        """Sync and async calls of a governed model are admitted by its governor"""
+        class Model:
+            def invoke(self, prompt):
+                return AIMessage(content="ok")
+            async def ainvoke(self, prompt):
+                return AIMessage(content="ok")
+        governor = ModelGovernor("model-a", rate_per_minute=6000)
+        model = ManagedModel(Model(), "planner", "model-a", governor=governor)
+        model.invoke("prompt")
+        asyncio.run(model.ainvoke("prompt"))
+        self.assertEqual(governor.stats()["calls"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Tests for the process-wide request gates
+"""
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from utils import RequestGate
+
+class TestRequestGate(unittest.TestCase):
+
+    def _track(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def _enter(self):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def _exit(self):
+        with self.lock:
+            self.active -= 1
+
+    def test_threads_capped(self):
+        """No more than `limit` threads hold a slot at once"""
+        gate = RequestGate(2)
+        self._track()
+
+        def call():
+            with gate.slot():
+                self._enter()
+                time.sleep(0.02)
+                self._exit()
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            list(executor.map(lambda _: call(), range(6)))
+        self.assertEqual(self.peak, 2)
+
+    def test_coroutines_capped(self):
+        """No more than `limit` coroutines hold a slot at once"""
+        gate = RequestGate(3)
+        self._track()
+
+        async def call():
+            async with gate.aslot():
+                self._enter()
+                await asyncio.sleep(0.01)
+                self._exit()
+
+        async def main():
+            await asyncio.gather(*(call() for _ in range(8)))
+
+        asyncio.run(main())
+        self.assertEqual(self.peak, 3)
+
+    def test_unlimited_by_default(self):
+        """Without a limit slots never block"""
+        gate = RequestGate()
+        with gate.slot(), gate.slot():
+            pass
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Tests for the report service job queue
+"""
+import time
+import unittest
+from service import ReportService
+
+class FakeWorkflow:
+    """Stands in for ReportWorkflow; topics starting with 'fail' raise."""
+
+    def __init__(self):
+        self.workflow_ids = []
+
+    async def arun(self, topic, workflow_id=None):
+        self.workflow_ids.append(workflow_id)
+        if topic.startswith('fail'):
+            raise RuntimeError('boom')
+        return f"Report on {topic}"
+
+    def report_path(self, topic, workflow_id):
+        return f"/reports/{topic}_{workflow_id}.txt"
+
+class TestReportService(unittest.TestCase):
+
+    def setUp(self):
+        self.workflow = FakeWorkflow()
+        self.service = ReportService(workflow=self.workflow, max_concurrent_reports=2)
+        self.service.start()
+
+    def tearDown(self):
+        self.service.stop()
+
+    def _wait(self, job_id):
+        deadline = time.time() + 5
+        while self.service.status(job_id)['status'] in ('queued', 'running') and time.time() < deadline:
+            time.sleep(0.01)
+        return self.service.status(job_id)
+
+    def test_completed_job_keeps_result(self):
+        """Finished jobs expose their report and run under their job id"""
+        job = self.service.submit('Quantum')
+        status = self._wait(job['job_id'])
+        self.assertEqual(status['status'], 'completed')
+        self.assertEqual(self.service.result(job['job_id']), ('completed', 'Report on Quantum'))
+        self.assertEqual(self.workflow.workflow_ids, [job['job_id']])
+        self.assertNotIn('result', status)
+
+    def test_failed_job_records_error(self):
+        """Exceptions mark the job failed without stopping the workers"""
+        failed = self.service.submit('fail please')
+        self.assertEqual(self._wait(failed['job_id'])['error'], 'RuntimeError: boom')
+        ok = self.service.submit('after failure')
+        self.assertEqual(self._wait(ok['job_id'])['status'], 'completed')
+
+    def test_job_submitted_before_start_runs(self):
+        """A job queued before the service starts runs once its workers are up"""
+        service = ReportService(workflow=FakeWorkflow(), max_concurrent_reports=1)
+        job = service.submit('Early')
+        self.assertEqual(job['status'], 'queued')
+        service.start()
+        try:
+            deadline = time.time() + 5
+            while service.status(job['job_id'])['status'] != 'completed' and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(service.status(job['job_id'])['status'], 'completed')
+        finally:
+            service.stop()
+
+    def test_stop_before_start(self):
+        """A service that never started stops cleanly"""
+        service = ReportService(workflow=FakeWorkflow(), max_concurrent_reports=1)
+        service.submit('Never run')
+        service.stop()
+        self.assertTrue(service.loop.is_closed())
+
+if __name__ == '__main__':
+    unittest.main()
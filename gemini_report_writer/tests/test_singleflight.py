@@ -0,0 +1,118 @@
+"""
+Tests for single-flight coalescing of identical in-flight requests
+"""
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.messages import AIMessage
+import budget
+import cassette
+from singleflight import SingleFlight
+from utils import ManagedModel
+
+class SlowModel:
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _count(self):
+        with self._lock:
+            self.calls += 1
+            return self.calls
+
+    def invoke(self, prompt):
+        call = self._count()
+        time.sleep(0.05)
+        return AIMessage(content=f"answer {call}")
+
+    async def ainvoke(self, prompt):
+        call = self._count()
+        await asyncio.sleep(0.05)
+        return AIMessage(content=f"answer {call}")
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_concurrent_callers_share_result_and_error(self):
+        """Threads with the same key share one call, each get a copy of its result and see its error"""
+        group = SingleFlight(copy=list)
+        calls, made = [], []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            made.append(["source"])
+            return made[0]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda _: group.do("q", fetch), range(4)))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(shared for _, shared in results), [False, True, True, True])
+        self.assertEqual(len({id(value) for value, _ in results} | {id(made[0])}), 5)
+
+        def fail():
+            time.sleep(0.05)
+            raise ConnectionError("reset")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(group.do, "bad", fail) for _ in range(2)]
+            for future in futures:
+                self.assertIsInstance(future.exception(), ConnectionError)
+        self.assertEqual(group.in_flight(), 0)
+        self.assertEqual(group.do("q", lambda: ["fresh"]), (["fresh"], False))
+
+    def test_cancelled_waiter_does_not_cancel_call(self):
+        """A coroutine cancelled while waiting leaves the shared call running for the others"""
+        group = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def run():
+            first = asyncio.ensure_future(group.ado("k", fetch))
+            second = asyncio.ensure_future(group.ado("k", fetch))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(run()), ("done", True))
+
+    def test_identical_model_calls_coalesced(self):
+        """Concurrent identical deterministic prompts reach the model once; sampled prompts do not share"""
+        model = ManagedModel(SlowModel(), "retriever", "model-a", temperature=0, client_key=("stub", "model-a", 0))
+
+        async def burst():
+            return await asyncio.gather(*(model.ainvoke("queries for wages") for _ in range(3)))
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            answers = list(executor.map(lambda _: model.invoke("queries for wages"), range(3)))
+        self.assertEqual({a.content for a in answers}, {"answer 1"})
+        self.assertEqual({a.content for a in asyncio.run(burst())}, {"answer 2"})
+        sampled = ManagedModel(SlowModel(), "writer", "model-a", temperature=0.7, client_key=("stub", "model-a", 0.7))
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(lambda _: sampled.invoke("write"), range(3)))
+        self.assertEqual(sampled.model.calls, 3)
+
+    def test_runs_share_calls_and_each_records_them(self):
+        """Concurrent runs share one call; each run's budget and recording still see it"""
+        model = ManagedModel(SlowModel(), "retriever", "model-a", temperature=0, client_key=("stub", "model-a", 0))
+        barrier = threading.Barrier(2)
+
+        def run(workflow_id):
+            with tempfile.TemporaryDirectory() as tmp, \
+                    cassette.use(os.path.join(tmp, "run.json"), "record") as recording, \
+                    budget.track(workflow_id) as usage:
+                barrier.wait()
+                model.invoke("queries for wages")
+            return usage.totals()["calls"], sum(len(entries) for entries in recording.interactions.values())
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(list(executor.map(run, ["wf-1", "wf-2"])), [(1, 1), (1, 1)])
+        self.assertEqual(model.model.calls, 1)
+
+if __name__ == '__main__':
+    unittest.main()
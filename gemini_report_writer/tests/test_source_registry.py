@@ -0,0 +1,73 @@
+"""
+Tests for the run-wide source registry and the agents that use its global IDs
+"""
+import unittest
+from agents.apa_formatter import APAFormatterAgent
+from agents.citation_verifier import CitationVerifierAgent
+import source_registry
+from source_registry import SourceRegistry, source_key
+
+class TestSourceRegistry(unittest.TestCase):
+
+    def test_run_registry_grows_in_place(self):
+        """Inside a run each merge registers only the new sources; a restored list is rebuilt once"""
+        with source_registry.use() as registry:
+            merged = source_registry.merge([], [{"title": "One"}])
+            merged = source_registry.merge(merged, [{"title": "Two"}, {"title": "One"}])
+            self.assertIs(merged, registry.sources)
+            self.assertIs(source_registry.registry_for(merged), registry)
+            restored = [dict(source) for source in merged]
+            merged = source_registry.merge(restored, [{"title": "Three"}])
+        self.assertEqual([(s["title"], s["source_id"]) for s in merged], [("One", 1), ("Two", 2), ("Three", 3)])
+
+    def test_normalized_keys_share_an_id(self):
+        """DOI prefixes, case, "www." and trailing slashes do not create new sources"""
+        registry = SourceRegistry()
+        self.assertEqual(registry.add({"doi": "10.1/ABC"}), 1)
+        self.assertEqual(registry.add({"doi": "https://doi.org/10.1/abc", "title": "Other"}), 1)
+        self.assertEqual(registry.add({"url": "https://www.example.org/a/"}), 2)
+        self.assertEqual(registry.add({"url": "http://example.org/a#part"}), 2)
+        self.assertEqual(registry.add({"title": "A  Title!"}), 3)
+        self.assertEqual(registry.add({"title": "a title"}), 3)
+        self.assertEqual(registry.find_doi("10.1/abc")["source_id"], 1)
+
+    def test_rebuilt_registry_keeps_ids_and_objects(self):
+        """A registry rebuilt from registered sources reuses them without copying"""
+        sources = SourceRegistry([{"title": "One"}, {"title": "Two"}]).sources
+        rebuilt = SourceRegistry(sources)
+        self.assertTrue(all(a is b for a, b in zip(rebuilt.sources, sources)))
+        self.assertEqual(rebuilt.add({"title": "Three"}), 3)
+
+    def test_renumber_research_notes(self):
+        """Per-section source numbers in research notes become global IDs"""
+        registry = SourceRegistry([{"title": "One"}, {"title": "Two"}, {"title": "Three"}])
+        local_keys = [source_key({"title": "Three"}), source_key({"title": "One"})]
+        text = "Source 1 agrees [Source 2]; see Sources 1 and 2, and Source 7."
+        self.assertEqual(registry.renumber(text, local_keys), "Source 3 agrees [Source 1]; see Sources 3 and 1, and Source 7.")
+
+class TestGlobalSourceIds(unittest.TestCase):
+
+    def setUp(self):
+        self.sources = SourceRegistry([
+            {"title": "First", "authors": ["Ann Smith"], "year": 2020, "doi": "10.1/a"},
+            {"title": "Second", "authors": ["Bo Chen"], "year": 2021, "doi": "10.1/b"},
+        ]).sources
+
+    def test_formatter_replaces_by_id(self):
+        """[Source N] is replaced with the citation of the source whose ID is N"""
+        formatter = APAFormatterAgent.__new__(APAFormatterAgent)
+        formatter.min_year, formatter.max_year = 1900, 2030
+        report = formatter._build_formatted_report("A [Source 2] B [Source 1] C [Source 9]", self.sources, [None, None])
+        self.assertEqual(report.report_text, "A (Chen, 2021) B (Smith, 2020) C [Source 9]")
+
+    def test_inline_citations_count_as_used(self):
+        """Sources cited as (Author, Year) after formatting are not reported unused"""
+        verifier = CitationVerifierAgent.__new__(CitationVerifierAgent)
+        verifier.unused_source_threshold = 0.3
+        registry = SourceRegistry(self.sources)
+        source, _ = verifier._match_citation({"type": "inline", "author": "Chen", "year": "2021"}, registry)
+        result = verifier._verification_result([], [], {"accurate": True}, registry, {source["source_id"]})
+        self.assertEqual(result["unused_sources"], [1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Tests for the offline stub model backend
+"""
+import asyncio
+import os
+import unittest
+from unittest.mock import patch
+from agents.quality_controller import QualityControllerAgent
+from agents.retriever import RetrieverAgent
+from stub_models import StubChatModel, StubModelError
+import utils
+from utils import ClientPool, ManagedModel, create_gemini_model
+
+class TestStubBackend(unittest.TestCase):
+
+    def test_selected_per_role_without_api_key(self):
+        """LLM_BACKEND_<ROLE> picks the stub for one role; no Gemini key is needed"""
+        env = {k: v for k, v in os.environ.items() if k != "GOOGLE_API_KEY"}
+        env["LLM_BACKEND_PLANNER"] = "stub"
+        with patch.dict(os.environ, env, clear=True):
+            model = create_gemini_model("planner")
+            self.assertIsInstance(model, ManagedModel)
+            self.assertIsInstance(model.model, StubChatModel)
+            with self.assertRaises(ValueError):
+                create_gemini_model("critic")
+
+    def test_unknown_backend(self):
+        """Misconfigured backends fail loudly"""
+        with patch.dict(os.environ, {"LLM_BACKEND": "nope"}):
+            with self.assertRaises(ValueError):
+                create_gemini_model("planner")
+
+    def test_clients_are_lazy_and_shared(self):
+        """Gemini clients are built on first use, once per model and temperature"""
+        built = []
+        def backend(agent_role, model_name, temperature):
+            built.append((model_name, temperature))
+            return object()
+        env = {"GOOGLE_API_KEY": "test-key", "LLM_BACKEND": "gemini"}
+        with patch.dict(os.environ, env), patch.dict(utils.MODEL_BACKENDS, {"gemini": backend}), \
+                patch.object(utils, "CHAT_CLIENTS", ClientPool()):
+            planner, critic, writer = create_gemini_model("planner"), create_gemini_model("critic"), \
+                create_gemini_model("writer", temperature=0.7)
+            self.assertEqual(built, [])
+            self.assertIs(planner.model, critic.model)
+            self.assertIsNot(planner.model, writer.model)
+            self.assertEqual(len(built), 2)
+
+class TestStubChatModel(unittest.TestCase):
+
+    def test_batch_scores_parse(self):
+        """The retriever's batch validator gets one score per source"""
+        retriever = RetrieverAgent.__new__(RetrieverAgent)
+        sources = [{"title": f"T{i}", "abstract": "A"} for i in range(4)]
+        content = StubChatModel("retriever").invoke(retriever._batch_validation_prompt(sources, "topic")).content
+        self.assertEqual(sorted(retriever._parse_batch_scores(content, 4)), [0, 1, 2, 3])
+
+    def test_assessment_follows_prompt_template(self):
+        """Assessment JSON has the keys the prompt asks for"""
+        controller = QualityControllerAgent.__new__(QualityControllerAgent)
+        content = StubChatModel("quality_controller").invoke(controller._coherence_prompt("Some text.")).content
+        assessment = controller._parse_assessment(content, "coherence")
+        self.assertTrue(0 <= assessment["score"] <= 1)
+        self.assertEqual(assessment["issues"], [])
+
+    def test_answers_are_deterministic(self):
+        """Same role, seed and prompt give the same answer"""
+        prompt = 'start your response with "APPROVED". Outline: A'
+        first = StubChatModel("critic", revise_rate=0.5, seed=3).invoke(prompt).content
+        self.assertEqual(StubChatModel("critic", revise_rate=0.5, seed=3).invoke(prompt).content, first)
+
+    def test_failure_injection(self):
+        """Injected failures are raised on both call paths"""
+        model = StubChatModel("writer", failure_rate=1.0)
+        with self.assertRaises(StubModelError):
+            model.invoke("prompt")
+        with self.assertRaises(StubModelError):
+            asyncio.run(model.ainvoke("prompt"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+Tests for workflow tracing and Chrome trace export
+"""
+import asyncio
+import unittest
+import tracing
+
+class FakeClient:
+    def get(self, key):
+        return f"value:{key}"
+
+class FakeAsyncClient:
+    async def get(self, key):
+        await asyncio.sleep(0.01)
+        return f"value:{key}"
+
+class TestTracing(unittest.TestCase):
+
+    def test_span_without_tracer_is_noop(self):
+        """Spans outside a traced run record nothing and still run the block"""
+        with tracing.span("x", "node") as info:
+            info["k"] = 1
+        self.assertIsNone(tracing.current_tracer())
+
+    def test_chrome_trace_export(self):
+        """Spans become complete ('X') events carrying their args"""
+        with tracing.trace("wf") as tracer:
+            with tracing.span("writer", "node"):
+                with tracing.span("llm.writer", "llm", model="m") as info:
+                    info["response_chars"] = 10
+        events = tracer.to_chrome_trace()["traceEvents"]
+        self.assertEqual([e["name"] for e in events], ["writer", "llm.writer"])
+        self.assertTrue(all(e["ph"] == "X" for e in events))
+        self.assertEqual(events[1]["args"], {"model": "m", "response_chars": 10})
+        self.assertEqual(tracer.summary()["llm"]["count"], 1)
+
+    def test_traced_client_sync_and_async(self):
+        """Client proxies trace each call, timing the await for async clients"""
+        sync_client = tracing.TracedClient(FakeClient(), "redis")
+        async_client = tracing.TracedClient(FakeAsyncClient(), "redis")
+
+        async def run():
+            return await async_client.get("b")
+
+        with tracing.trace("wf") as tracer:
+            self.assertEqual(sync_client.get("a"), "value:a")
+            self.assertEqual(asyncio.run(run()), "value:b")
+        self.assertEqual([s["name"] for s in tracer.spans], ["redis.get", "redis.get"])
+        self.assertGreaterEqual(tracer.spans[1]["end"] - tracer.spans[1]["start"], 0.01)
+
+if __name__ == '__main__':
+    unittest.main()
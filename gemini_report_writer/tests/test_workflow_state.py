@@ -0,0 +1,155 @@
+"""
+Tests for ReportWorkflow state reducers and graph routing
+"""
+import unittest
+from langgraph.types import Send
+from convergence import ConvergencePolicy, draft_change
+from main import (
+    ReportWorkflow,
+    merge_gate_scores,
+    merge_research_results,
+    merge_sources,
+    merge_skipped_sections,
+)
+
+class TestStateReducers(unittest.TestCase):
+
+    def test_merge_research_results(self):
+        """Branch results are merged by section, newer results win"""
+        merged = merge_research_results({'A': {'content': 'old'}}, {'A': {'content': 'new'}, 'B': {'content': 'b'}})
+        self.assertEqual(merged, {'A': {'content': 'new'}, 'B': {'content': 'b'}})
+
+    def test_merge_sources_deduplicates_in_order(self):
+        """Duplicate sources from different branches are dropped, first-seen order kept as global IDs"""
+        first = {'title': 'One', 'authors': ['A']}
+        second = {'title': 'Two', 'authors': ['B']}
+        merged = merge_sources(merge_sources([], [first]), [dict(first), second, dict(second)])
+        self.assertEqual([(s['title'], s['source_id']) for s in merged], [('One', 1), ('Two', 2)])
+
+    def test_merge_skipped_sections_one_entry_per_section(self):
+        """Re-running a section replaces its previous skip record"""
+        merged = merge_skipped_sections(
+            [{'section': 'A', 'reason': 'old'}],
+            [{'section': 'A', 'reason': 'new'}, {'section': 'B', 'reason': 'b'}]
+        )
+        self.assertEqual([s['reason'] for s in merged], ['new', 'b'])
+
+    def test_merge_skipped_sections_drops_resolved(self):
+        """A section that succeeds on a later round is no longer listed as skipped"""
+        merged = merge_skipped_sections(
+            [{'section': 'A', 'reason': 'old'}, {'section': 'B', 'reason': 'b'}],
+            [{'section': 'A', 'resolved': True}, {'section': 'C', 'resolved': True}]
+        )
+        self.assertEqual(merged, [{'section': 'B', 'reason': 'b'}])
+
+class TestResearchFanOut(unittest.TestCase):
+
+    def setUp(self):
+        # Routing methods do not touch the agents, so skip their construction
+        self.workflow = ReportWorkflow.__new__(ReportWorkflow)
+
+    def test_fan_out_sends_every_section(self):
+        """Each outline section gets its own research branch"""
+        sends = self.workflow.fan_out_research({'topic': 'T', 'outline': ['Intro', 'Body']})
+        self.assertTrue(all(isinstance(s, Send) for s in sends))
+        self.assertEqual([s.arg['section'] for s in sends], ['Intro', 'Body'])
+        self.assertTrue(all(s.node == 'research_section' for s in sends))
+
+    def test_fan_out_empty_outline(self):
+        """An empty outline goes straight to research validation"""
+        self.assertEqual(self.workflow.fan_out_research({'topic': 'T', 'outline': []}), 'validate_research')
+
+class TestGateMerge(unittest.TestCase):
+
+    def setUp(self):
+        self.workflow = ReportWorkflow.__new__(ReportWorkflow)
+
+    def _state(self, verdicts, citation_revisions=1):
+        return {'gate_feedback': verdicts, 'citation_revisions': citation_revisions}
+
+    def test_all_approved(self):
+        """No complaints means a single approval"""
+        verdicts = {'critic_report': {'feedback': 'APPROVED', 'revision_targets': []}}
+        update = self.workflow.merge_gate_verdicts(self._state(verdicts))
+        self.assertTrue(update['feedback'].startswith('APPROVED'))
+
+    def test_revisions_merged_with_scoped_targets(self):
+        """Complaints are combined into one revision over the union of attributed sections"""
+        verdicts = {
+            'citation_verifier': {'feedback': 'REVISE: bad cite', 'revision_targets': ['Method']},
+            'grammar_gate': {'feedback': 'REVISE: typos', 'revision_targets': ['Intro', 'Method']},
+            'critic_report': {'feedback': 'APPROVED', 'revision_targets': []},
+        }
+        update = self.workflow.merge_gate_verdicts(self._state(verdicts))
+        self.assertTrue(update['feedback'].startswith('REVISE: [Citations] bad cite'))
+        self.assertIn('[Grammar] typos', update['feedback'])
+        self.assertEqual(update['revision_targets'], ['Method', 'Intro'])
+
+    def test_unattributed_complaint_unscopes_revision(self):
+        """A complaint without section targets leaves attribution to the writer"""
+        verdicts = {
+            'grammar_gate': {'feedback': 'REVISE: typos', 'revision_targets': ['Intro']},
+            'quality_control': {'feedback': 'REVISE: weak flow', 'revision_targets': []},
+        }
+        self.assertEqual(self.workflow.merge_gate_verdicts(self._state(verdicts))['revision_targets'], [])
+
+    def test_citation_verdict_dropped_after_limit(self):
+        """Citation complaints stop blocking once the citation revision limit is hit"""
+        verdicts = {'citation_verifier': {'feedback': 'REVISE: bad cite', 'revision_targets': []}}
+        update = self.workflow.merge_gate_verdicts(self._state(verdicts, citation_revisions=4))
+        self.assertTrue(update['feedback'].startswith('APPROVED'))
+
+class TestRevisionConvergence(unittest.TestCase):
+
+    def setUp(self):
+        self.workflow = ReportWorkflow.__new__(ReportWorkflow)
+        self.workflow.convergence = ConvergencePolicy(min_draft_change=0.01, min_score_gain=0.05)
+
+    def _state(self, scores, change=0.2, revisions=2):
+        return {
+            'feedback': 'REVISE: issues', 'report_revisions': revisions, 'citation_revisions': 1,
+            'revision_change': change, 'gate_scores': merge_gate_scores({}, scores),
+        }
+
+    def test_draft_change(self):
+        """Identical drafts change nothing and a rewritten one changes everything"""
+        self.assertEqual(draft_change("a b c", "a b c"), 0.0)
+        self.assertAlmostEqual(draft_change("a b c d", "a b c e"), 0.25)
+        self.assertEqual(draft_change("a b", "c d"), 1.0)
+
+    def test_unchanged_draft_ends_loop(self):
+        """A revision that barely changed the draft is not sent back again"""
+        self.assertEqual(self.workflow.decide_report(self._state({}, change=0.001)), 'continue')
+        self.assertEqual(self.workflow.decide_report(self._state({})), 'revise')
+
+    def test_stalled_score_ends_loop(self):
+        """A gate whose score did not improve after the revision it asked for stops asking"""
+        stalled = {'quality_control': [{'score': 0.60, 'revise': True}, {'score': 0.62, 'revise': True}]}
+        improving = {'quality_control': [{'score': 0.60, 'revise': True}, {'score': 0.70, 'revise': True}]}
+        self.assertEqual(self.workflow.decide_quality_control(self._state(stalled)), 'continue')
+        self.assertEqual(self.workflow.decide_quality_control(self._state(improving)), 'revise')
+
+    def test_regression_after_other_gate_revision_still_revises(self):
+        """A score drop caused by another gate's revision is not mistaken for convergence"""
+        scores = {'grammar_gate': [{'score': -1, 'revise': False}, {'score': -6, 'revise': True}]}
+        self.assertEqual(self.workflow.decide_grammar(self._state(scores)), 'revise')
+
+    def test_grammar_loop_is_capped(self):
+        """Grammar revisions stop at the report revision limit"""
+        self.assertEqual(self.workflow.decide_grammar(self._state({}, revisions=6)), 'continue')
+
+    def test_merged_gates_converge_only_when_all_stall(self):
+        """Concurrent gates end the loop early only if every complaining gate has stopped improving"""
+        state = self._state({
+            'grammar_gate': [{'score': -5, 'revise': True}, {'score': -5, 'revise': True}],
+            'quality_control': [{'score': 0.5, 'revise': True}, {'score': 0.7, 'revise': True}],
+        })
+        state['gate_feedback'] = {
+            'grammar_gate': {'feedback': 'REVISE: typos'}, 'quality_control': {'feedback': 'REVISE: flow'},
+        }
+        self.assertEqual(self.workflow.decide_gates(state), 'revise')
+        state['gate_feedback']['quality_control'] = {'feedback': 'APPROVED'}
+        self.assertEqual(self.workflow.decide_gates(state), 'continue')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Tests for WriterAgent section scheduling
+"""
+import unittest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+from agents.writer import WriterAgent
+
+class TestConcurrentWriting(unittest.TestCase):
+
+    def setUp(self):
+        with patch('agents.writer.create_gemini_model') as mock_create:
+            mock_create.return_value = Mock()
+            self.writer = WriterAgent(max_concurrent_sections=3)
+        self.prompts = {}
+
+        def invoke(prompt):
+            title = prompt.split('titled: **', 1)[1].split('**', 1)[0]
+            self.prompts[title] = prompt
+            return SimpleNamespace(content=f"Text for {title}. Second sentence. Third sentence.")
+
+        self.writer.model.invoke.side_effect = invoke
+
+    def test_output_keeps_outline_order(self):
+        """Sections appear in research order regardless of completion order"""
+        research = {'Introduction': 'i', 'Method': 'm', 'Findings': 'f', 'Conclusion': 'c'}
+        report = self.writer.write_report(research, [])
+        headings = [line[3:] for line in report.split('\n') if line.startswith('## ')]
+        self.assertEqual(headings, list(research))
+
+    def test_late_section_placed_by_outline(self):
+        """A section researched in a later round still appears at its outline position"""
+        research = {'Introduction': 'i', 'Conclusion': 'c', 'Method': 'm'}
+        report = self.writer.write_report(research, [], outline=['Introduction', 'Method', 'Conclusion'])
+        headings = [line[3:] for line in report.split('\n') if line.startswith('## ')]
+        self.assertEqual(headings, ['Introduction', 'Method', 'Conclusion'])
+
+    def test_framing_sections_receive_body_summaries(self):
+        """Introduction and conclusion are written from summaries of the body sections"""
+        self.writer.write_report({'Introduction': 'i', 'Method': 'm', 'Conclusion': 'c'}, [])
+        self.assertIn('- Method: Text for Method. Second sentence.', self.prompts['Introduction'])
+        self.assertIn('- Method: Text for Method.', self.prompts['Conclusion'])
+        self.assertNotIn('Summaries of the Finished Body Sections', self.prompts['Method'])
+
+    def test_only_framing_sections(self):
+        """Reports without body sections are written in a single round"""
+        report = self.writer.write_report({'Introduction': 'i'}, [])
+        self.assertIn('## Introduction', report)
+        self.assertNotIn('Summaries of the Finished Body Sections', self.prompts['Introduction'])
+
+class TestSectionScopedRevision(unittest.TestCase):
+
+    def setUp(self):
+        with patch('agents.writer.create_gemini_model') as mock_create:
+            mock_create.side_effect = lambda agent_role, temperature=0: Mock()
+            self.writer = WriterAgent()
+        self.writer.model.invoke.side_effect = lambda prompt: SimpleNamespace(
+            content="Revised " + prompt.split('titled: **', 1)[1].split('**', 1)[0] + "."
+        )
+        self.report = "**Note:** preamble\n\n## Introduction\n\nIntro text.\n\n## Method\n\nMethod text [Source 2].\n\n## Conclusion\n\nEnd text."
+
+    def test_only_target_sections_rewritten(self):
+        """Untargeted sections are carried over byte for byte"""
+        revised = self.writer.revise_report(self.report, "REVISE: fix citation", ["Method"])
+        expected = self.report.replace("Method text [Source 2].", "Revised Method.")
+        self.assertEqual(revised, expected)
+        self.writer.router_model.invoke.assert_not_called()
+
+    def test_named_sections_targeted_without_router(self):
+        """Sections named in the critique are revised without a routing call"""
+        revised = self.writer.revise_report(self.report, "REVISE: the conclusion is too short")
+        self.assertIn("Revised Conclusion.", revised)
+        self.assertIn("Intro text.", revised)
+        self.writer.router_model.invoke.assert_not_called()
+
+    def test_unattributed_critique_is_routed(self):
+        """Critique that names no section is routed by section number"""
+        self.writer.router_model.invoke.return_value = SimpleNamespace(content="[1]")
+        revised = self.writer.revise_report(self.report, "REVISE: improve flow")
+        self.assertIn("Revised Introduction.", revised)
+        self.assertIn("Method text [Source 2].", revised)
+
+    def test_section_lookup_by_offset_and_snippet(self):
+        """Gate findings are attributed to the sections that contain them"""
+        offset = self.report.index("End text")
+        self.assertEqual(self.writer.sections_at_offsets(self.report, [offset]), ["Conclusion"])
+        self.assertEqual(self.writer.sections_containing(self.report, ["[Source 2]"]), ["Method"])
+
+if __name__ == '__main__':
+    unittest.main()
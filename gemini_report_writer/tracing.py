@@ -0,0 +1,141 @@
+"""
+Lightweight tracing for ReportWorkflow runs.
+
+Spans for graph nodes, model calls and external requests are recorded into the tracer
+bound to the current context (one per workflow run), and exported as a Chrome trace
+JSON timeline that chrome://tracing or Perfetto can open. Without an active tracer,
+span() is a no-op.
+"""
+import asyncio
+import contextvars
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+_current_tracer = contextvars.ContextVar("current_tracer", default=None)
+
+class Tracer:
+    """Collects the spans of one workflow run."""
+
+    def __init__(self, workflow_id):
+        self.workflow_id = workflow_id
+        self.started_at = time.time()
+        self.origin = time.perf_counter()
+        self.spans = []
+        self._lanes = {}
+        self._lock = threading.Lock()
+
+    def lane(self):
+        """Timeline row for the current thread or asyncio task, so concurrent spans don't overlap."""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        key = (threading.get_ident(), id(task) if task else None)
+        with self._lock:
+            return self._lanes.setdefault(key, len(self._lanes) + 1)
+
+    def record(self, name, category, start, end, args, lane):
+        with self._lock:
+            self.spans.append({"name": name, "category": category, "start": start, "end": end, "args": args, "lane": lane})
+
+    def summary(self):
+        """Span count and total seconds per category."""
+        totals = {}
+        with self._lock:
+            for span in self.spans:
+                total = totals.setdefault(span["category"], {"count": 0, "seconds": 0.0})
+                total["count"] += 1
+                total["seconds"] += span["end"] - span["start"]
+        return totals
+
+    def to_chrome_trace(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start"])
+        events = [{
+            "name": span["name"],
+            "cat": span["category"],
+            "ph": "X",
+            "ts": round((span["start"] - self.origin) * 1e6),
+            "dur": round((span["end"] - span["start"]) * 1e6),
+            "pid": 1,
+            "tid": span["lane"],
+            "args": span["args"],
+        } for span in spans]
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"workflow_id": self.workflow_id, "started_at": self.started_at},
+        }
+
+    def export(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+        return path
+
+def current_tracer():
+    return _current_tracer.get()
+
+@contextmanager
+def trace(workflow_id, output_dir=None):
+    """Bind a new tracer to the current context; export it to output_dir on exit (even after a failure)."""
+    tracer = Tracer(workflow_id)
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+        if output_dir:
+            path = tracer.export(os.path.join(output_dir, f"{workflow_id}.trace.json"))
+            totals = ", ".join(f"{category}: {t['count']} in {t['seconds']:.1f}s" for category, t in sorted(tracer.summary().items()))
+            print(f"---TRACE SAVED TO {path} ({totals})---")
+
+@contextmanager
+def span(name, category, **args):
+    """Record a span around the enclosed block. Yields the span's args so callers can add results."""
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield args
+        return
+    lane = tracer.lane()
+    start = time.perf_counter()
+    try:
+        yield args
+    except BaseException as e:
+        args["error"] = type(e).__name__
+        raise
+    finally:
+        if not args.pop("_discard", False):
+            tracer.record(name, category, start, time.perf_counter(), args, lane)
+
+async def _traced_await(name, category, awaitable):
+    with span(name, category):
+        return await awaitable
+
+class TracedClient:
+    """Proxy that records a span for every method call on a sync or async client."""
+
+    def __init__(self, client, service):
+        self._client = client
+        self._service = service
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+        label = f"{self._service}.{name}"
+
+        def call(*args, **kwargs):
+            with span(label, self._service) as info:
+                result = attr(*args, **kwargs)
+                if not inspect.isawaitable(result):
+                    return result
+                # Async client: time the await rather than the coroutine's creation
+                info["_discard"] = True
+            return _traced_await(label, self._service, result)
+
+        return call
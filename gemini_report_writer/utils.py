@@ -1,6 +1,20 @@
 import os
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from langchain_core.messages import AIMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
+from stub_models import StubChatModel
+import budget
+import callpolicy
+import cassette
+import llm_cache
+import ratelimit
+import tracing
+from singleflight import SingleFlight
 
 load_dotenv()
 
@@ -10,6 +24,7 @@ AGENT_MODEL_MAPPING = {
     "critic": "gemini-2.5-flash",
     "researcher": "gemini-2.5-flash-lite-preview-06-17",
     "writer": "gemini-2.5-flash-lite-preview-06-17",
+    "revision_router": "gemini-2.5-flash-lite-preview-06-17",
     "citation_verifier": "gemini-2.5-flash-lite-preview-06-17",
     "retriever": "gemini-2.5-flash",
     "apa_formatter": "gemini-2.5-flash-lite-preview-06-17",
@@ -18,13 +33,321 @@ AGENT_MODEL_MAPPING = {
     "quality_pipeline": "gemini-2.5-flash",
 }
 
+def _google_api_key():
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("GOOGLE_API_KEY environment variable not set!")
+    return api_key
+
+def _gemini_backend(agent_role, model_name, temperature):
+    # One attempt per request; deadlines and retries are the role's call policy (see callpolicy)
+    return ChatGoogleGenerativeAI(model=model_name, temperature=temperature, google_api_key=_google_api_key(),
+                                  max_retries=1)
+
+def _stub_backend(agent_role, model_name, temperature):
+    return StubChatModel.from_env(agent_role)
+
+# Chat model factories by backend name; each takes (agent_role, model_name, temperature)
+MODEL_BACKENDS = {
+    "gemini": _gemini_backend,
+    "stub": _stub_backend,
+}
+
+# Backends with network clients worth sharing; stub models are per role and hold no connections
+POOLED_BACKENDS = {"gemini"}
+
+class ClientPool:
+    """Process-wide chat model clients, shared by every agent with the same backend, model and temperature.
+
+    Each client keeps its own connection pool, so sharing them lets all agents, workflows
+    and batch runs in the process reuse connections instead of opening a channel per agent.
+    """
+
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, factory):
+        """The client for key, built with factory() the first time it is asked for."""
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = factory()
+            return client
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self):
+        return len(self._clients)
+
+CHAT_CLIENTS = ClientPool()
+
+def model_backend(agent_role: str) -> str:
+    """Backend for a role: LLM_BACKEND_<ROLE> overrides LLM_BACKEND, which defaults to gemini."""
+    return os.getenv(f"LLM_BACKEND_{agent_role.upper()}") or os.getenv("LLM_BACKEND") or "gemini"
+
 def create_gemini_model(agent_role: str, temperature: float = 0):
-    """Creates a Gemini model instance based on the agent's role."""
+    """Creates the chat model for an agent role on the role's configured backend."""
     model_name = AGENT_MODEL_MAPPING.get(agent_role)
     if not model_name:
         raise ValueError(f"No model specified for agent role: {agent_role}")
 
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY environment variable not set!")
-    return ChatGoogleGenerativeAI(model=model_name, temperature=temperature, google_api_key=api_key)
\ No newline at end of file
+    backend = model_backend(agent_role)
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model backend {backend!r} for agent role {agent_role}; expected one of {', '.join(MODEL_BACKENDS)}")
+    if backend == "gemini":
+        # Missing credentials fail at startup even though the client is only built on first use
+        _google_api_key()
+    # Stub models keep the role's Gemini model name, so traces and cost estimates stay comparable
+    factory = lambda: MODEL_BACKENDS[backend](agent_role, model_name, temperature)
+    if backend in POOLED_BACKENDS:
+        key = (backend, model_name, temperature)
+        return ManagedModel(None, agent_role, model_name, client_factory=lambda: CHAT_CLIENTS.get(key, factory),
+                            temperature=temperature, client_key=key, governor=ratelimit.governor(model_name))
+    return ManagedModel(None, agent_role, model_name, client_factory=factory,
+                        temperature=temperature, client_key=(backend, model_name, temperature, agent_role))
+
+class LoopLocal:
+    """Lazily creates one instance of an asyncio-bound resource per running event loop.
+
+    Async clients (httpx, redis.asyncio, ...) must not be shared across event loops,
+    but should be reused by every coroutine running on the same loop.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instances = weakref.WeakKeyDictionary()
+
+    def get(self):
+        loop = asyncio.get_running_loop()
+        instance = self._instances.get(loop)
+        if instance is None:
+            instance = self._factory()
+            self._instances[loop] = instance
+        return instance
+
+class RequestGate:
+    """Caps the number of in-flight requests of one kind across the whole process.
+
+    Threads share one semaphore and coroutines share one per event loop. A limit of
+    None (the default) leaves requests uncapped.
+    """
+
+    def __init__(self, limit=None):
+        self.set_limit(limit)
+
+    def set_limit(self, limit):
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit) if limit else None
+        self._async_semaphores = LoopLocal(lambda: asyncio.Semaphore(limit)) if limit else None
+
+    @contextmanager
+    def slot(self):
+        semaphore = self._semaphore
+        if semaphore is None:
+            yield
+            return
+        with semaphore:
+            yield
+
+    @asynccontextmanager
+    async def aslot(self):
+        semaphores = self._async_semaphores
+        if semaphores is None:
+            yield
+            return
+        async with semaphores.get():
+            yield
+
+# Process-wide caps shared by every workflow in the process (see configure_request_limits)
+LLM_REQUESTS = RequestGate()
+SEARCH_REQUESTS = RequestGate()
+
+# Identical deterministic model calls in flight at once share one request
+LLM_FLIGHTS = SingleFlight()
+
+def configure_request_limits(max_llm_requests=None, max_search_requests=None):
+    """Set the global caps on in-flight LLM calls and search/HTTP requests."""
+    LLM_REQUESTS.set_limit(max_llm_requests)
+    SEARCH_REQUESTS.set_limit(max_search_requests)
+
+def _message_data(message):
+    return {"content": message.content, "usage_metadata": getattr(message, "usage_metadata", None)}
+
+def _message_from_data(data):
+    return AIMessage(content=data["content"], usage_metadata=data.get("usage_metadata"))
+
+class ManagedModel:
+    """Chat model wrapper used by every agent.
+
+    Each call holds an LLM request slot, is traced, is counted against the run's budget
+    and goes through the run's cassette when one is recording or replaying. Given a
+    client_factory instead of a model, the model is fetched on first use. Models with a
+    client_key answer repeated deterministic prompts from the run's response cache, and
+    calls that reach the provider wait for the model's governor when one is given and
+    follow the role's call policy (deadline, retries, hedging). Identical deterministic
+    calls in flight at the same time share one request.
+    """
+
+    def __init__(self, model, agent_role, model_name, client_factory=None, temperature=None, client_key=None,
+                 governor=None):
+        self._model = model
+        self.governor = governor
+        self._client_factory = client_factory
+        self.agent_role = agent_role
+        self.model_name = model_name
+        self.temperature = temperature
+        self.client_key = client_key
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self._client_factory()
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+
+    def invoke(self, prompt, *args, **kwargs):
+        cache, key, cached = self._cached(prompt, args, kwargs)
+        if cached is not None:
+            return cached
+        flight = self._flight_key(prompt, args, kwargs)
+        if flight is None:
+            return self._invoke(cache, key, prompt, args, kwargs)
+        origin = (budget.current_usage(), cache)
+        with self._span(prompt, "llm_shared") as info:
+            started = time.perf_counter()
+            (response, made_by), _ = LLM_FLIGHTS.do(flight, lambda: (self._invoke(cache, key, prompt, args, kwargs), origin))
+            self._record_shared(info, made_by, cache, key, prompt, response, time.perf_counter() - started)
+        return response
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        cache, key, cached = self._cached(prompt, args, kwargs)
+        if cached is not None:
+            return cached
+        flight = self._flight_key(prompt, args, kwargs)
+        if flight is None:
+            return await self._ainvoke(cache, key, prompt, args, kwargs)
+        origin = (budget.current_usage(), cache)
+
+        async def call():
+            return await self._ainvoke(cache, key, prompt, args, kwargs), origin
+
+        with self._span(prompt, "llm_shared") as info:
+            started = time.perf_counter()
+            (response, made_by), _ = await LLM_FLIGHTS.ado(flight, call)
+            self._record_shared(info, made_by, cache, key, prompt, response, time.perf_counter() - started)
+        return response
+
+    def _invoke(self, cache, key, prompt, args, kwargs):
+        with LLM_REQUESTS.slot(), self._span(prompt) as info:
+            response = cassette.intercept(
+                "llm", f"llm.{self.agent_role}", self._cassette_request(prompt),
+                lambda: self._call(info, prompt, *args, **kwargs), _message_data, _message_from_data,
+            )
+            self._record_response(info, prompt, response)
+        if key is not None:
+            cache.put(self.agent_role, key, _message_data(response))
+        return response
+
+    async def _ainvoke(self, cache, key, prompt, args, kwargs):
+        async with LLM_REQUESTS.aslot():
+            with self._span(prompt) as info:
+                response = await cassette.aintercept(
+                    "llm", f"llm.{self.agent_role}", self._cassette_request(prompt),
+                    lambda: self._acall(info, prompt, *args, **kwargs), _message_data, _message_from_data,
+                )
+                self._record_response(info, prompt, response)
+        if key is not None:
+            cache.put(self.agent_role, key, _message_data(response))
+        return response
+
+    def _flight_key(self, prompt, args, kwargs):
+        """Key under which identical concurrent calls share one request, or None for calls that must not share."""
+        # Sampled output is meant to differ between calls
+        if self.client_key is None or self.temperature != 0 or args or kwargs:
+            return None
+        # A replaying run answers from its own recording and sends nothing worth sharing
+        recording = cassette.current_cassette()
+        if recording is not None and recording.mode == "replay":
+            return None
+        return (self.client_key, llm_cache.normalize_prompt(prompt))
+
+    def _record_shared(self, info, made_by, cache, key, prompt, response, elapsed):
+        """Record a response another run's call produced in this run's budget, trace, recording and cache."""
+        run, leader_cache = made_by
+        if run is budget.current_usage():
+            # This run made the call (or shared it within the run); it is already accounted
+            info["_discard"] = True
+            return
+        cassette.record("llm", f"llm.{self.agent_role}", self._cassette_request(prompt), response, _message_data, elapsed)
+        self._record_response(info, prompt, response)
+        if key is not None and cache is not leader_cache:
+            cache.put(self.agent_role, key, _message_data(response))
+
+    def _call(self, info, prompt, *args, **kwargs):
+        return callpolicy.call(self.agent_role, lambda: self._attempt(info, prompt, args, kwargs), info,
+                               self._discarded(prompt))
+
+    async def _acall(self, info, prompt, *args, **kwargs):
+        return await callpolicy.acall(self.agent_role, lambda: self._aattempt(info, prompt, args, kwargs), info,
+                                      self._discarded(prompt))
+
+    def _discarded(self, prompt):
+        # Hedges that lose and attempts that finish past their deadline are paid for all the same
+        return lambda response: budget.record_llm_call(self.agent_role, self.model_name, prompt, response)
+
+    def _attempt(self, info, prompt, args, kwargs):
+        if self.governor is None:
+            return self.model.invoke(prompt, *args, **kwargs)
+        with self.governor.slot() as queued:
+            info["queue_seconds"] = round(queued, 4)
+            return self.model.invoke(prompt, *args, **kwargs)
+
+    async def _aattempt(self, info, prompt, args, kwargs):
+        if self.governor is None:
+            return await self.model.ainvoke(prompt, *args, **kwargs)
+        async with self.governor.aslot() as queued:
+            info["queue_seconds"] = round(queued, 4)
+            return await self.model.ainvoke(prompt, *args, **kwargs)
+
+    def _cached(self, prompt, args, kwargs):
+        """(cache, key, cached response) for a call; key is None for calls the cache does not cover."""
+        cache = llm_cache.current()
+        # Extra call arguments can change the output, so only plain prompts are cached
+        if cache is None or self.client_key is None or args or kwargs:
+            return cache, None, None
+        key = cache.key(self.agent_role, self.client_key, self.temperature, prompt)
+        if key is None:
+            return cache, None, None
+        data = cache.get(self.agent_role, key)
+        if data is None:
+            return cache, key, None
+        # Cache hits are traced apart from model calls and cost nothing against the budget
+        with tracing.span(f"llm.{self.agent_role}", "llm_cache", role=self.agent_role, model=self.model_name):
+            return cache, key, _message_from_data(data)
+
+    def _cassette_request(self, prompt):
+        return {"role": self.agent_role, "model": self.model_name, "prompt": str(prompt)}
+
+    def _span(self, prompt, category="llm"):
+        return tracing.span(
+            f"llm.{self.agent_role}", category, role=self.agent_role, model=self.model_name, prompt_chars=len(str(prompt))
+        )
+
+    def _record_response(self, info, prompt, response):
+        budget.record_llm_call(self.agent_role, self.model_name, prompt, response)
+        info["response_chars"] = len(str(getattr(response, "content", "")))
+        usage = getattr(response, "usage_metadata", None) or {}
+        if usage:
+            info["input_tokens"] = usage.get("input_tokens")
+            info["output_tokens"] = usage.get("output_tokens")
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.model, name)